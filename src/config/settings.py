@@ -1,7 +1,7 @@
 """Configuration settings for the MCP server"""
 
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from dotenv import load_dotenv
@@ -17,14 +17,100 @@ class Settings(BaseSettings):
     debug: bool = Field(default=False, env="DEBUG")
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     
+    # Transport settings
+    mcp_transport: str = Field(default="stdio", env="MCP_TRANSPORT")  # stdio, sse or streamable-http
+    http_host: str = Field(default="127.0.0.1", env="HTTP_HOST")
+    http_port: int = Field(default=8000, env="HTTP_PORT")
+    http_path: str = Field(default="/mcp", env="HTTP_PATH")
+    session_concurrency: int = Field(default=4, env="SESSION_CONCURRENCY")  # In-flight calls per client session
+    
     # API settings
     api_timeout: int = Field(default=30, env="API_TIMEOUT")
     max_file_size: int = Field(default=10485760, env="MAX_FILE_SIZE")  # 10MB
     
+    # Response settings
+    response_max_bytes: int = Field(default=4194304, env="RESPONSE_MAX_BYTES")  # 4MB
+    response_compact: bool = Field(default=False, env="RESPONSE_COMPACT")
+    
+    # System sampler settings
+    system_sample_seconds: float = Field(default=5.0, env="SYSTEM_SAMPLE_SECONDS")
+    system_history_size: int = Field(default=720, env="SYSTEM_HISTORY_SIZE")  # 1 hour at 5s
+    
+    # Metrics settings
+    metrics_dump_seconds: float = Field(default=60.0, env="METRICS_DUMP_SECONDS")  # 0 disables the dump
+    startup_budget_ms: float = Field(default=1500.0, env="STARTUP_BUDGET_MS")
+    
+    # Concurrency settings
+    worker_threads: int = Field(default=8, env="WORKER_THREADS")
+    tool_concurrency_default: int = Field(default=4, env="TOOL_CONCURRENCY_DEFAULT")
+    tool_concurrency_limits: Dict[str, int] = Field(
+        default_factory=lambda: {"analyze_csv": 2, "read_file": 4, "import_notes": 1},
+        env="TOOL_CONCURRENCY_LIMITS"  # JSON object, e.g. {"analyze_csv": 2}
+    )
+    
+    # Directory listing settings
+    directory_page_size: int = Field(default=500, env="DIRECTORY_PAGE_SIZE")
+    directory_max_page_size: int = Field(default=5000, env="DIRECTORY_MAX_PAGE_SIZE")
+    
+    # Workspace index settings
+    workspace_index_refresh_seconds: float = Field(default=2.0, env="WORKSPACE_INDEX_REFRESH_SECONDS")
+    workspace_index_full_refresh_seconds: float = Field(default=300.0, env="WORKSPACE_INDEX_FULL_REFRESH_SECONDS")
+    workspace_index_exclude: List[str] = Field(
+        default_factory=lambda: [".git", "node_modules", "__pycache__", ".venv", "venv",
+                                 "mcp-env", ".mypy_cache", ".pytest_cache"],
+        env="WORKSPACE_INDEX_EXCLUDE"  # JSON list of directory names
+    )
+    
+    # Directory size tree settings
+    tree_max_nodes: int = Field(default=20000, env="TREE_MAX_NODES")
+    tree_walk_threads: int = Field(default=8, env="TREE_WALK_THREADS")
+    
+    # Content search settings
+    search_processes: int = Field(default_factory=lambda: min(4, os.cpu_count() or 1), env="SEARCH_PROCESSES")
+    search_max_results: int = Field(default=200, env="SEARCH_MAX_RESULTS")
+    search_max_bytes: int = Field(default=1048576, env="SEARCH_MAX_BYTES")  # 1MB of match text
+    
+    # CPU worker processes (CSV parsing)
+    cpu_processes: int = Field(default_factory=lambda: min(2, os.cpu_count() or 1), env="CPU_PROCESSES")
+    
+    # CSV profiling settings
+    csv_chunk_rows: int = Field(default=100000, env="CSV_CHUNK_ROWS")
+    csv_sample_size: int = Field(default=20, env="CSV_SAMPLE_SIZE")
+    csv_profile_timeout: float = Field(default=0, env="CSV_PROFILE_TIMEOUT")  # 0: until the client cancels
+    
+    # Result cache settings
+    cache_max_entries: int = Field(default=256, env="CACHE_MAX_ENTRIES")
+    cache_max_bytes: int = Field(default=67108864, env="CACHE_MAX_BYTES")  # 64MB
+    cache_disk_enabled: bool = Field(default=False, env="CACHE_DISK_ENABLED")
+    cache_disk_max_bytes: int = Field(default=268435456, env="CACHE_DISK_MAX_BYTES")  # 256MB
+    
     # Paths
     data_dir: str = Field(default="./data", env="DATA_DIR")
     logs_dir: str = Field(default="./logs", env="LOGS_DIR")
     
+    # Database settings
+    db_cache_size_kb: int = Field(default=65536, env="DB_CACHE_SIZE_KB")  # 64MB page cache per connection
+    db_mmap_size: int = Field(default=268435456, env="DB_MMAP_SIZE")  # 256MB
+    db_busy_timeout_ms: int = Field(default=5000, env="DB_BUSY_TIMEOUT_MS")
+    db_statement_cache_size: int = Field(default=256, env="DB_STATEMENT_CACHE_SIZE")
+    notes_page_size: int = Field(default=20, env="NOTES_PAGE_SIZE")
+    notes_max_page_size: int = Field(default=200, env="NOTES_MAX_PAGE_SIZE")
+    sql_max_rows: int = Field(default=500, env="SQL_MAX_ROWS")
+    sql_max_bytes: int = Field(default=1048576, env="SQL_MAX_BYTES")  # 1MB
+    sql_cursor_ttl_seconds: float = Field(default=300.0, env="SQL_CURSOR_TTL_SECONDS")
+    sql_max_open_cursors: int = Field(default=8, env="SQL_MAX_OPEN_CURSORS")
+    slow_query_ms: float = Field(default=100.0, env="SLOW_QUERY_MS")
+    slow_query_history: int = Field(default=100, env="SLOW_QUERY_HISTORY")
+    slow_query_log_max_bytes: int = Field(default=5242880, env="SLOW_QUERY_LOG_MAX_BYTES")  # 5MB
+    slow_query_log_backups: int = Field(default=3, env="SLOW_QUERY_LOG_BACKUPS")
+    import_batch_size: int = Field(default=500, env="IMPORT_BATCH_SIZE")
+    import_max_reported_errors: int = Field(default=100, env="IMPORT_MAX_REPORTED_ERRORS")
+    
+    # Note similarity index settings
+    vector_dim: int = Field(default=262144, env="VECTOR_DIM")  # 2**18 hashed n-gram buckets
+    vector_save_every: int = Field(default=500, env="VECTOR_SAVE_EVERY")
+    duplicate_threshold: float = Field(default=0.8, env="DUPLICATE_THRESHOLD")
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
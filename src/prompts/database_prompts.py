@@ -1,6 +1,7 @@
 # src/prompts/database_prompts.py
 """Database-specific prompt templates and workflows"""
 
+from typing import Any, Dict, List, Optional
 from mcp.types import TextContent
 
 def get_analyze_notes_prompt(focus: str = "content") -> str:
@@ -26,18 +27,34 @@ Analyze my notes database focusing on {focus}:
 Please use the available database tools to gather information and provide detailed analysis.
 """
 
-def get_optimize_database_prompt(table_name: str = "notes") -> str:
-    """Database optimization and performance prompt"""
+def get_optimize_database_prompt(table_name: str = "notes", slow_queries: Optional[List[Dict[str, Any]]] = None,
+                                 statements: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Database optimization and performance prompt, grounded in recorded query stats when given"""
+    observed = ""
+    if statements:
+        lines = [f"   - `{s['statement']}`: {s['calls']} calls, avg {s['avg_ms']}ms, max {s['max_ms']}ms"
+                 for s in statements]
+        observed += "\n**Most expensive statements (by total time)**:\n" + "\n".join(lines) + "\n"
+    if slow_queries:
+        lines = []
+        for q in slow_queries:
+            scan = " (full table scan)" if q.get("full_scan") else ""
+            plan = "; ".join(q.get("plan") or []) or "no plan captured"
+            lines.append(f"   - `{q['statement']}`: {q['elapsed_ms']}ms{scan} — plan: {plan}")
+        observed += "\n**Recent slow queries with EXPLAIN QUERY PLAN**:\n" + "\n".join(lines) + "\n"
+    if not observed:
+        observed = "\nNo query statistics recorded yet; read notes://slow-queries after some use.\n"
+    
     return f"""
 Optimize the {table_name} database:
-
+{observed}
 1. **Schema Analysis**:
    - Review table structure and relationships
-   - Identify missing indexes
+   - Identify missing indexes (look for full table scans in the plans above)
    - Check for normalization opportunities
 
 2. **Query Performance**:
-   - Analyze slow queries
+   - Analyze the slow queries and their plans
    - Suggest optimization strategies
    - Review query patterns
 
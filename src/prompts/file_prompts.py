@@ -94,7 +94,7 @@ Organize and manage project files:
 
 2. **Cleanup Opportunities**:
    - Find temporary and backup files
-   - Identify large or unused files
+   - Identify large or unused files (directory_tree shows where the space goes)
    - Check for duplicate content
 
 3. **Organization Strategy**:
@@ -2,5 +2,13 @@
 
 from resources.data_resources import DataResources
 from resources.file_resources import FileResources
+from resources.directory_tree import DirectoryTreeWalker, get_directory_tree_walker, close_directory_tree_walker
+from resources.workspace_index import (
+    WorkspaceIndex, get_workspace_index, close_workspace_index, workspace_file_written
+)
+from resources.system_sampler import SystemSampler, get_system_sampler
 
-__all__ = ["DataResources", "FileResources"]
+__all__ = ["DataResources", "FileResources", "WorkspaceIndex", "get_workspace_index", "close_workspace_index",
+           "workspace_file_written",
+           "SystemSampler", "get_system_sampler", "DirectoryTreeWalker", "get_directory_tree_walker",
+           "close_directory_tree_walker"]
@@ -1,37 +1,54 @@
 """Data resource handlers"""
 
 import json
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from utils.logging import get_logger
 from tools.database_tools import DatabaseTools
+from resources.system_sampler import get_system_sampler
 
 logger = get_logger(__name__)
 
 class DataResources:
     """Data resource handlers for MCP server"""
     
-    def __init__(self):
-        self.db_tools = DatabaseTools()
+    def __init__(self, db_tools: Optional[DatabaseTools] = None):
+        """
+        Args:
+            db_tools: Shared database layer; a private one is opened if omitted
+        """
+        self._owns_db = db_tools is None
+        self.db_tools = db_tools or DatabaseTools()
     
-    def get_system_info(self) -> Dict[str, Any]:
-        """Get system information resource"""
+    def close(self):
+        """Release the database connections, if this resource opened its own"""
+        if self._owns_db:
+            self.db_tools.close()
+    
+    def get_system_info(self, minutes: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get system information resource
+        
+        Served from the background sampler's newest sample, so no psutil
+        calls are made on the read path while the sampler is running.
+        
+        Args:
+            minutes: Also return min/avg/max over this many recent minutes
+        """
         try:
-            import platform
-            import psutil
+            sampler = get_system_sampler()
+            sample = sampler.latest()
             
-            return {
-                "system": {
-                    "platform": platform.platform(),
-                    "python_version": platform.python_version(),
-                    "cpu_count": psutil.cpu_count(),
-                    "memory_total": psutil.virtual_memory().total,
-                    "disk_usage": {
-                        "total": psutil.disk_usage('/').total,
-                        "used": psutil.disk_usage('/').used,
-                        "free": psutil.disk_usage('/').free
-                    }
-                }
+            result = {
+                "system": dict(sampler.static_info(), disk_usage={
+                    "total": sample["disk_total"],
+                    "used": sample["disk_used"],
+                    "free": sample["disk_free"]
+                }),
+                "current": sample
             }
+            if minutes:
+                result["history"] = sampler.summary(minutes)
+            return result
         except ImportError:
             return {
                 "system": {
@@ -0,0 +1,244 @@
+"""du-style directory size trees from a parallel, mtime-cached os.scandir walk"""
+
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from utils.logging import get_logger
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Largest files remembered per directory and reported per walk
+LARGEST_FILES = 10
+
+# Directory listings kept in the cache (least recently used go first)
+CACHE_MAX_DIRS = 100000
+
+class _Listing(NamedTuple):
+    """What one scandir of a directory found, valid while its mtime is unchanged"""
+    mtime_ns: int
+    size: int
+    files: int
+    subdirs: Tuple[str, ...]
+    largest: Tuple[Tuple[int, str], ...]
+    error: Optional[str] = None
+
+class DirectoryTreeWalker:
+    """
+    Cumulative size and file counts per directory, like du
+
+    Each level of the tree is listed with os.scandir on a thread pool
+    (scandir and lstat release the GIL). A directory's listing (total size
+    and count of its own files, its subdirectory names and largest files)
+    is cached against the directory's mtime, so a repeat walk stats each
+    directory once and only re-lists those where entries were added,
+    removed or renamed. Like the workspace index, in-place edits to an
+    existing file do not change its directory's mtime; clear() forces a
+    full re-walk. Symlinks are counted by their own size and not followed.
+    A deadline bounds the wall-clock time of a walk, so a hung mount returns
+    a truncated tree rather than blocking the caller.
+    """
+
+    def __init__(self, threads: Optional[int] = None):
+        self.threads = threads or settings.tree_walk_threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cache: "OrderedDict[str, _Listing]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="mcp-tree")
+            return self._executor
+
+    def _list(self, path: str) -> Tuple[_Listing, bool]:
+        """Listing of one directory and whether it came from the cache"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError as e:
+            return _Listing(0, 0, 0, (), (), e.strerror or str(e)), False
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                self._cache.move_to_end(path)
+                return cached, True
+
+        size = files = 0
+        subdirs: List[str] = []
+        largest: List[Tuple[int, str]] = []
+        error = None
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            continue
+                        file_size = entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue  # Vanished mid-walk
+                    size += file_size
+                    files += 1
+                    if len(largest) < LARGEST_FILES:
+                        heapq.heappush(largest, (file_size, entry.name))
+                    elif file_size > largest[0][0]:
+                        heapq.heapreplace(largest, (file_size, entry.name))
+        except OSError as e:
+            error = e.strerror or str(e)
+
+        # mtime was read before listing, so a change during the scan misses next time
+        listing = _Listing(mtime_ns, size, files, tuple(sorted(subdirs)), tuple(largest), error)
+        with self._lock:
+            self._cache[path] = listing
+            self._cache.move_to_end(path)
+            while len(self._cache) > CACHE_MAX_DIRS:
+                self._cache.popitem(last=False)
+        return listing, False
+
+    def walk(self, directory_path: str, max_depth: int = 3, max_nodes: Optional[int] = None,
+             timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Walk a directory breadth-first and aggregate sizes bottom-up
+
+        Args:
+            directory_path: Root of the walk
+            max_depth: Depth of directories included in the returned tree;
+                totals always cover everything walked below it
+            max_nodes: Stop listing new directories once this many entries
+                (files and directories) have been seen (default: settings.tree_max_nodes)
+            timeout: Stop waiting for listings after this many seconds, e.g. on a
+                hung network mount (default: settings.api_timeout)
+
+        Returns:
+            Dictionary with the tree, grand totals, the largest files and
+            whether the node budget or the deadline cut the walk short
+        """
+        root = os.path.abspath(directory_path)
+        budget = max_nodes or settings.tree_max_nodes
+        deadline = time.monotonic() + (settings.api_timeout if timeout is None else timeout)
+        timed_out = False
+        batch_size = self.threads * 4
+        executor = self._get_executor()
+
+        listings: Dict[str, _Listing] = {}
+        order: List[str] = []  # Breadth-first: every directory comes after its parent
+        nodes = scanned = 0
+        frontier = [root]
+        while frontier and nodes < budget and not timed_out:
+            next_frontier = []
+            for start in range(0, len(frontier), batch_size):
+                if nodes >= budget:
+                    break
+                futures = {executor.submit(self._list, path): path for path in frontier[start:start + batch_size]}
+                done, pending = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+                for future in pending:
+                    future.cancel()  # A listing stuck in the kernel keeps its thread, but not the caller
+                for future in sorted(done, key=futures.get):
+                    path = futures[future]
+                    listing, cached = future.result()
+                    listings[path] = listing
+                    order.append(path)
+                    nodes += listing.files + len(listing.subdirs)
+                    scanned += not cached
+                    next_frontier.extend(os.path.join(path, name) for name in listing.subdirs)
+                if pending:
+                    timed_out = True
+                    logger.warning(f"Directory walk of {root} passed its deadline; "
+                                   f"{len(pending)} listings abandoned")
+                    break
+            frontier = next_frontier
+
+        # Children before parents: fold each directory's totals into its parent
+        totals: Dict[str, List[Any]] = {}
+        for path in reversed(order):
+            listing = listings[path]
+            size, files, dirs, truncated = listing.size, listing.files, 0, False
+            for name in listing.subdirs:
+                child = totals.get(os.path.join(path, name))
+                dirs += 1
+                if child is None:
+                    truncated = True  # Never listed: over budget or past the deadline
+                    continue
+                size += child[0]
+                files += child[1]
+                dirs += child[2]
+                truncated = truncated or child[3]
+            totals[path] = [size, files, dirs, truncated]
+
+        def build(path: str, depth: int) -> Dict[str, Any]:
+            listing = listings.get(path)
+            size, files, dirs, truncated = totals.get(path, (0, 0, 0, True))
+            node: Dict[str, Any] = {"name": os.path.basename(path) or path, "size": size,
+                                    "files": files, "dirs": dirs}
+            if truncated:
+                node["truncated"] = True
+            if listing is not None and listing.error:
+                node["error"] = listing.error
+            if listing is None or not listing.subdirs:
+                return node
+            if depth >= max_depth:
+                node["children_omitted"] = len(listing.subdirs)
+                return node
+            children = [build(os.path.join(path, name), depth + 1) for name in listing.subdirs]
+            children.sort(key=lambda child: (-child["size"], child["name"]))
+            node["children"] = children
+            return node
+
+        largest = heapq.nlargest(LARGEST_FILES, (
+            (file_size, os.path.join(path, name))
+            for path in order for file_size, name in listings[path].largest
+        ))
+        tree = build(root, 0)
+        return {
+            "directory_tree": tree,
+            "path": root,
+            "total_size": tree["size"],
+            "total_files": tree["files"],
+            "total_dirs": tree["dirs"],
+            "largest_files": [{"path": path, "size": file_size} for file_size, path in largest],
+            "max_depth": max_depth,
+            "nodes": nodes,
+            "max_nodes": budget,
+            "truncated": bool(tree.get("truncated")),
+            "timed_out": timed_out,
+            "dirs_listed": len(order),
+            "dirs_rescanned": scanned
+        }
+
+    def clear(self) -> None:
+        """Forget every cached listing"""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        """Stop the walker threads without waiting for listings stuck past their deadline"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)  # Outside the lock: _list takes it
+
+# Global walker instance, so the listing cache is shared between calls
+_walker: Optional[DirectoryTreeWalker] = None
+_walker_lock = threading.Lock()
+
+def get_directory_tree_walker() -> DirectoryTreeWalker:
+    """Get the shared directory tree walker (singleton pattern)"""
+    global _walker
+    if _walker is None:
+        with _walker_lock:
+            if _walker is None:
+                _walker = DirectoryTreeWalker()
+    return _walker
+
+def close_directory_tree_walker() -> None:
+    """Stop the walker threads if the walker was ever used"""
+    global _walker
+    with _walker_lock:
+        if _walker is not None:
+            _walker.close()
+            _walker = None
@@ -2,9 +2,11 @@
 
 import os
 import mimetypes
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from utils.logging import get_logger
 from utils.validators import validate_file_path
+from utils.result_cache import get_result_cache
+from resources.directory_tree import get_directory_tree_walker
 
 logger = get_logger(__name__)
 
@@ -27,36 +29,46 @@ class FileResources:
             if not is_valid:
                 return {"error": error}
             
-            file_stats = os.stat(file_path)
-            mime_type, encoding = mimetypes.guess_type(file_path)
-            
-            return {
-                "file_path": file_path,
-                "file_name": os.path.basename(file_path),
-                "file_size": file_stats.st_size,
-                "mime_type": mime_type,
-                "encoding": encoding,
-                "created": file_stats.st_ctime,
-                "modified": file_stats.st_mtime,
-                "is_readable": os.access(file_path, os.R_OK),
-                "is_writable": os.access(file_path, os.W_OK)
-            }
+            return get_result_cache().get_or_compute(
+                "get_file_info", file_path, {},
+                lambda: FileResources._build_file_info(file_path)
+            )
             
         except Exception as e:
             logger.error(f"Error getting file info for {file_path}: {str(e)}")
             return {"error": str(e)}
     
     @staticmethod
-    def get_directory_tree(directory_path: str, max_depth: int = 3) -> Dict[str, Any]:
+    def _build_file_info(file_path: str) -> Dict[str, Any]:
+        """Stat the file and build its metadata (uncached)"""
+        file_stats = os.stat(file_path)
+        mime_type, encoding = mimetypes.guess_type(file_path)
+        
+        return {
+            "file_path": file_path,
+            "file_name": os.path.basename(file_path),
+            "file_size": file_stats.st_size,
+            "mime_type": mime_type,
+            "encoding": encoding,
+            "created": file_stats.st_ctime,
+            "modified": file_stats.st_mtime,
+            "is_readable": os.access(file_path, os.R_OK),
+            "is_writable": os.access(file_path, os.W_OK)
+        }
+    
+    @staticmethod
+    def get_directory_tree(directory_path: str, max_depth: int = 3,
+                           max_nodes: Optional[int] = None) -> Dict[str, Any]:
         """
-        Get directory tree structure
+        Get directory tree with du-style cumulative sizes and file counts
         
         Args:
             directory_path: Path to directory
-            max_depth: Maximum depth to traverse
+            max_depth: Depth of directories included in the tree (totals cover everything walked)
+            max_nodes: Entry budget for the walk (default: settings.tree_max_nodes)
             
         Returns:
-            Dictionary with directory tree
+            Dictionary with directory tree, totals and largest files
         """
         try:
             if not os.path.exists(directory_path):
@@ -65,38 +77,7 @@ class FileResources:
             if not os.path.isdir(directory_path):
                 return {"error": "Path is not a directory"}
             
-            def build_tree(path: str, current_depth: int = 0) -> Dict[str, Any]:
-                """Recursively build directory tree"""
-                if current_depth >= max_depth:
-                    return {"name": os.path.basename(path), "type": "directory", "truncated": True}
-                
-                items = []
-                try:
-                    for item in sorted(os.listdir(path)):
-                        item_path = os.path.join(path, item)
-                        
-                        if os.path.isdir(item_path):
-                            items.append(build_tree(item_path, current_depth + 1))
-                        else:
-                            file_stats = os.stat(item_path)
-                            items.append({
-                                "name": item,
-                                "type": "file",
-                                "size": file_stats.st_size
-                            })
-                except PermissionError:
-                    items.append({"name": "Permission denied", "type": "error"})
-                
-                return {
-                    "name": os.path.basename(path) or path,
-                    "type": "directory",
-                    "children": items
-                }
-            
-            return {
-                "directory_tree": build_tree(directory_path),
-                "max_depth": max_depth
-            }
+            return get_directory_tree_walker().walk(directory_path, max_depth, max_nodes)
             
         except Exception as e:
             logger.error(f"Error getting directory tree for {directory_path}: {str(e)}")
@@ -0,0 +1,144 @@
+"""Background sampling of host and server process statistics"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from utils.logging import get_logger
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Numeric sample fields summarised as min/avg/max
+SUMMARY_FIELDS = ("cpu_percent", "memory_percent", "memory_available", "disk_percent", "disk_free",
+                  "process_rss", "process_cpu_percent", "process_open_fds", "process_threads")
+
+class SystemSampler:
+    """
+    Fixed-size ring buffer of system samples, filled by a daemon thread
+
+    Readers get the newest sample without touching psutil. If the thread is
+    not running (or a sample is older than the interval) the next read
+    takes one synchronously, so the newest sample acts as a TTL cache.
+    """
+
+    def __init__(self, interval: Optional[float] = None, history: Optional[int] = None):
+        self.interval = interval or settings.system_sample_seconds
+        self.samples: deque = deque(maxlen=history or settings.system_history_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._static: Optional[Dict[str, Any]] = None
+        self._process = None
+
+    def _psutil(self):
+        """Import psutil and set up the process handle on first use"""
+        import psutil  # Deferred: only needed once sampling starts
+        if self._process is None:
+            self._process = psutil.Process(os.getpid())
+            psutil.cpu_percent(interval=None)  # Prime the counters; the first reading is meaningless
+            self._process.cpu_percent(interval=None)
+        return psutil
+
+    def static_info(self) -> Dict[str, Any]:
+        """Facts that do not change while the server runs"""
+        if self._static is None:
+            import platform
+            psutil = self._psutil()
+            self._static = {
+                "platform": platform.platform(),
+                "python_version": platform.python_version(),
+                "cpu_count": psutil.cpu_count(),
+                "memory_total": psutil.virtual_memory().total
+            }
+        return self._static
+
+    def sample(self) -> Dict[str, Any]:
+        """Take one sample and append it to the ring buffer"""
+        psutil = self._psutil()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage("/")
+        with self._process.oneshot():
+            rss = self._process.memory_info().rss
+            process_cpu = self._process.cpu_percent(interval=None)
+            threads = self._process.num_threads()
+            open_fds = self._process.num_fds() if hasattr(self._process, "num_fds") else None
+        sample = {
+            "timestamp": time.time(),
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_percent": memory.percent,
+            "memory_available": memory.available,
+            "disk_total": disk.total,
+            "disk_used": disk.used,
+            "disk_free": disk.free,
+            "disk_percent": disk.percent,
+            "process_rss": rss,
+            "process_cpu_percent": process_cpu,
+            "process_open_fds": open_fds,
+            "process_threads": threads
+        }
+        with self._lock:
+            self.samples.append(sample)
+        return sample
+
+    def latest(self) -> Dict[str, Any]:
+        """Newest sample, taking a fresh one if the cached sample is older than the interval"""
+        # Allow the running thread one missed tick before sampling on the read path
+        max_age = self.interval * 2 if self._thread is not None else self.interval
+        with self._lock:
+            newest = self.samples[-1] if self.samples else None
+        if newest is None or time.time() - newest["timestamp"] > max_age:
+            newest = self.sample()
+        return newest
+
+    def summary(self, minutes: float) -> Dict[str, Any]:
+        """min/avg/max of each numeric field over the last N minutes"""
+        cutoff = time.time() - minutes * 60
+        with self._lock:
+            window: List[Dict[str, Any]] = [s for s in self.samples if s["timestamp"] >= cutoff]
+        stats = {}
+        for field in SUMMARY_FIELDS:
+            values = [s[field] for s in window if s[field] is not None]
+            if values:
+                stats[field] = {"min": min(values), "avg": round(sum(values) / len(values), 2), "max": max(values)}
+        return {"minutes": minutes, "samples": len(window), "stats": stats}
+
+    def start(self) -> None:
+        """Start the sampling thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while True:
+                try:
+                    self.sample()
+                except Exception as e:
+                    logger.warning(f"System sample failed: {str(e)}")
+                if self._stop.wait(self.interval):
+                    break
+
+        self._thread = threading.Thread(target=run, name="system-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sampling thread"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+# Global sampler instance
+_system_sampler: Optional[SystemSampler] = None
+_system_sampler_lock = threading.Lock()
+
+def get_system_sampler() -> SystemSampler:
+    """Get the shared system sampler (singleton pattern)"""
+    global _system_sampler
+    if _system_sampler is None:
+        with _system_sampler_lock:
+            if _system_sampler is None:
+                _system_sampler = SystemSampler()
+    return _system_sampler
@@ -0,0 +1,415 @@
+"""Persistent, incrementally refreshed index of workspace files"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from utils.logging import get_logger
+from utils.sqlite_pool import SQLitePool
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+class WorkspaceIndex:
+    """
+    SQLite-backed index of files under a workspace root
+
+    Each directory's mtime is recorded when it is scanned. A refresh still
+    stats every indexed directory, but only re-lists the ones whose mtime
+    changed, i.e. where entries were added, removed or renamed. In-place
+    edits to an existing file do not touch its directory's mtime: files
+    written by save_file/edit_file are updated through file_written(), and
+    anything else is caught by the full rescan that runs once the last one
+    (recorded in the index, so it survives restarts) is older than
+    settings.workspace_index_full_refresh_seconds. The
+    server's own data and log directories are never indexed.
+
+    A refresh is bounded like the directory tree walk (settings.api_timeout
+    and settings.tree_max_nodes); one cut short reports truncated and the
+    next refresh resumes its pass where it stopped. Callers arriving while
+    a refresh runs are answered from the current index instead of waiting.
+    """
+
+    def __init__(self, root: str = ".", db_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or os.path.join(settings.data_dir, "workspace_index.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.pool = SQLitePool(self.db_path, cache_size_kb=8192, mmap_size=settings.db_mmap_size)
+        self.exclude = set(settings.workspace_index_exclude)
+        self.exclude_paths = {os.path.abspath(settings.data_dir), os.path.abspath(settings.logs_dir)}
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._resume: Optional[List[str]] = None  # Directories left by a pass cut short
+        self._resume_full = False
+        self._ensure_schema()
+        conn = self.pool.connection()
+        row = conn.execute("SELECT value FROM index_state WHERE key = ?", (self._full_refresh_key,)).fetchone()
+        self._last_full_refresh: Optional[float] = row[0] if row else None  # Wall clock, survives restarts
+        for path in self.exclude_paths:
+            self._forget_subtree(conn, path)  # Indexed before they were excluded
+
+    def _ensure_schema(self) -> None:
+        """Create the index tables"""
+        conn = self.pool.connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    path TEXT PRIMARY KEY,
+                    parent TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    extension TEXT,
+                    size INTEGER,
+                    mtime REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_parent ON entries (parent)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_extension ON entries (extension)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_size ON entries (size)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_mtime ON entries (mtime)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scanned_dirs (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS index_state (
+                    key TEXT PRIMARY KEY,
+                    value REAL
+                )
+            """)
+
+    def close(self) -> None:
+        """Close the index database connections"""
+        self.pool.close_all()
+
+    @staticmethod
+    def _subtree_bounds(path: str) -> tuple:
+        """Key range covering every path strictly below a directory"""
+        prefix = path.rstrip(os.sep) + os.sep
+        return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    @property
+    def _full_refresh_key(self) -> str:
+        return f"full_refresh:{self.root}"
+
+    def _excluded(self, path: str) -> bool:
+        return os.path.basename(path) in self.exclude or path in self.exclude_paths
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the last refresh pass was cut short and has not finished yet"""
+        return self._resume is not None
+
+    def refresh(self, full: bool = False, max_age: Optional[float] = None,
+                timeout: Optional[float] = None, max_nodes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Bring the index up to date with the filesystem
+
+        Args:
+            full: Re-list every directory, not just those whose mtime changed;
+                also done when the last full rescan is older than
+                settings.workspace_index_full_refresh_seconds
+            max_age: Skip the refresh if the last one is younger than this many
+                seconds, or if another refresh is already running
+            timeout: Stop after this many seconds (default: settings.api_timeout)
+            max_nodes: Stop once this many directories and listed entries have
+                been seen (default: settings.tree_max_nodes)
+
+        Returns:
+            Dictionary with refresh statistics; truncated means the pass
+            stopped early and the next refresh continues it
+        """
+        if max_age is not None and time.monotonic() - self._last_refresh < max_age:
+            return {"skipped": True, "truncated": self.truncated}
+        if not self._refresh_lock.acquire(blocking=max_age is None):
+            return {"skipped": True, "in_progress": True, "truncated": self.truncated}
+
+        try:
+            started = time.perf_counter()
+            deadline = time.monotonic() + (settings.api_timeout if timeout is None else timeout)
+            budget = max_nodes or settings.tree_max_nodes
+            now = time.time()
+            if self._resume is not None:
+                stack, full = self._resume, full or self._resume_full
+            else:
+                stack = [self.root]
+                if (self._last_full_refresh is None
+                        or now - self._last_full_refresh >= settings.workspace_index_full_refresh_seconds):
+                    full = True
+            conn = self.pool.connection()
+            known_mtimes = dict(conn.execute(
+                "SELECT path, mtime_ns FROM scanned_dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                (self.root,) + self._subtree_bounds(self.root)
+            ).fetchall())
+            visited = 0
+            rescanned = 0
+            nodes = 0
+
+            while stack and nodes < budget and time.monotonic() < deadline:
+                directory = stack.pop()
+                visited += 1
+                nodes += 1
+                try:
+                    mtime_ns = os.stat(directory).st_mtime_ns
+                except OSError:
+                    self._forget_subtree(conn, directory)
+                    continue
+
+                if full or known_mtimes.get(directory) != mtime_ns:
+                    subdirs, listed = self._rescan_directory(conn, directory, mtime_ns)
+                    nodes += listed
+                    rescanned += 1
+                else:
+                    subdirs = [row[0] for row in conn.execute(
+                        "SELECT path FROM entries WHERE parent = ? AND type = 'directory'",
+                        (directory,)
+                    )]
+                stack.extend(d for d in subdirs if not self._excluded(d))
+
+            self._last_refresh = time.monotonic()
+            if stack:
+                self._resume, self._resume_full = stack, full
+                logger.warning(f"Workspace index refresh of {self.root} stopped after {visited} directories; "
+                               f"{len(stack)} left for the next refresh")
+            else:
+                self._resume, self._resume_full = None, False
+                if full:
+                    self._last_full_refresh = now
+                    with conn:
+                        conn.execute("INSERT OR REPLACE INTO index_state VALUES (?, ?)",
+                                     (self._full_refresh_key, now))
+            elapsed = time.perf_counter() - started
+            logger.debug(f"Workspace index refresh: {rescanned}/{visited} directories rescanned in {elapsed:.3f}s")
+            return {
+                "full": full,
+                "directories_checked": visited,
+                "directories_rescanned": rescanned,
+                "truncated": bool(stack),
+                "seconds": round(elapsed, 4)
+            }
+        finally:
+            self._refresh_lock.release()
+
+    def _rescan_directory(self, conn, directory: str, mtime_ns: int) -> Tuple[List[str], int]:
+        """Replace the index rows for one directory's direct children; returns its subdirectories and entry count"""
+        rows = []
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.path in self.exclude_paths:
+                        continue
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        stats = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    extension = "" if is_dir else os.path.splitext(entry.name)[1].lower()
+                    rows.append((entry.path, directory, entry.name,
+                                 "directory" if is_dir else "file", extension,
+                                 0 if is_dir else stats.st_size, stats.st_mtime))
+                    if is_dir:
+                        subdirs.append(entry.path)
+        except OSError as e:
+            logger.warning(f"Cannot index {directory}: {str(e)}")
+
+        with conn:
+            previous = {row[0] for row in conn.execute(
+                "SELECT path FROM entries WHERE parent = ? AND type = 'directory'", (directory,)
+            )}
+            for removed in previous.difference(subdirs):
+                self._forget_subtree(conn, removed, commit=False)
+            conn.execute("DELETE FROM entries WHERE parent = ?", (directory,))
+            conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO scanned_dirs VALUES (?, ?)", (directory, mtime_ns))
+        return subdirs, len(rows)
+
+    def file_written(self, file_path: str) -> None:
+        """Update one file's row after the server wrote it (its directory mtime may not change)"""
+        paths = {os.path.abspath(file_path), os.path.realpath(file_path)}
+        rows = []
+        for path in paths:
+            directory = os.path.dirname(path)
+            if not (directory == self.root or directory.startswith(self.root.rstrip(os.sep) + os.sep)):
+                continue
+            if any(self._excluded(parent) for parent in self._parents(directory)):
+                continue
+            try:
+                stats = os.stat(path)
+            except OSError:
+                continue
+            name = os.path.basename(path)
+            rows.append((path, directory, name, "file", os.path.splitext(name)[1].lower(),
+                         stats.st_size, stats.st_mtime))
+        if rows:
+            conn = self.pool.connection()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _parents(self, directory: str) -> List[str]:
+        """directory and its ancestors up to (not including) the root"""
+        parents = []
+        while directory != self.root and len(directory) > len(self.root):
+            parents.append(directory)
+            directory = os.path.dirname(directory)
+        return parents
+
+    def _forget_subtree(self, conn, directory: str, commit: bool = True) -> None:
+        """Drop a directory that no longer exists, and everything below it"""
+        def forget():
+            low, high = self._subtree_bounds(directory)
+            conn.execute("DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)", (directory, low, high))
+            conn.execute("DELETE FROM scanned_dirs WHERE path = ? OR (path >= ? AND path < ?)", (directory, low, high))
+        if commit:
+            with conn:
+                forget()
+        else:
+            forget()
+
+    def _fresh_connection(self):
+        """Refresh if stale, then return this thread's connection"""
+        self.refresh(max_age=settings.workspace_index_refresh_seconds)
+        return self.pool.connection()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Workspace totals answered from the index"""
+        conn = self._fresh_connection()
+        low, high = self._subtree_bounds(self.root)
+        top_level = dict(conn.execute(
+            "SELECT type, COUNT(*) FROM entries WHERE parent = ? GROUP BY type", (self.root,)
+        ).fetchall())
+        totals = conn.execute("""
+            SELECT SUM(type = 'file'), SUM(type = 'directory'), COALESCE(SUM(size), 0)
+            FROM entries WHERE path >= ? AND path < ?
+        """, (low, high)).fetchone()
+        extensions = conn.execute("""
+            SELECT extension, COUNT(*) AS files, SUM(size) AS bytes
+            FROM entries WHERE path >= ? AND path < ? AND type = 'file'
+            GROUP BY extension ORDER BY files DESC LIMIT 10
+        """, (low, high)).fetchall()
+        return {
+            "current_directory": self.root,
+            "total_files": top_level.get("file", 0),
+            "total_directories": top_level.get("directory", 0),
+            "recursive_files": totals[0] or 0,
+            "recursive_directories": totals[1] or 0,
+            "total_bytes": totals[2],
+            "top_extensions": [dict(row) for row in extensions],
+            "workspace_type": "Daily Productivity Workspace",
+            "truncated": self.truncated
+        }
+
+    def get_tree(self, directory: Optional[str] = None, max_depth: int = 3) -> Dict[str, Any]:
+        """Directory tree answered from the index"""
+        conn = self._fresh_connection()
+        start = os.path.abspath(directory) if directory else self.root
+
+        def build(path: str, depth: int) -> Dict[str, Any]:
+            node = {"name": os.path.basename(path) or path, "type": "directory"}
+            if depth >= max_depth:
+                node["truncated"] = True
+                return node
+            children = []
+            for row in conn.execute(
+                "SELECT path, name, type, size FROM entries WHERE parent = ? ORDER BY name", (path,)
+            ).fetchall():
+                if row["type"] == "directory":
+                    children.append(build(row["path"], depth + 1))
+                else:
+                    children.append({"name": row["name"], "type": "file", "size": row["size"]})
+            node["children"] = children
+            return node
+
+        return {"directory_tree": build(start, 0), "max_depth": max_depth, "truncated": self.truncated}
+
+    def find_files(self, name_pattern: Optional[str] = None, extension: Optional[str] = None,
+                   min_size: Optional[int] = None, max_size: Optional[int] = None,
+                   modified_within_hours: Optional[float] = None,
+                   older_than_hours: Optional[float] = None,
+                   order_by: str = "path", limit: int = 100) -> Dict[str, Any]:
+        """
+        Find indexed files by name, extension, size and age
+
+        Args:
+            name_pattern: Glob matched against the file name, e.g. "test_*.py"
+            extension: File extension, e.g. ".py"
+            min_size: Minimum size in bytes
+            max_size: Maximum size in bytes
+            modified_within_hours: Only files modified in the last N hours
+            older_than_hours: Only files not modified in the last N hours
+            order_by: "path", "size" (largest first) or "mtime" (newest first)
+            limit: Maximum number of files to return
+
+        Returns:
+            Dictionary with matching files
+        """
+        conn = self._fresh_connection()
+        low, high = self._subtree_bounds(self.root)
+        clauses = ["path >= ?", "path < ?", "type = 'file'"]
+        params: List[Any] = [low, high]
+        if name_pattern:
+            clauses.append("name GLOB ?")
+            params.append(name_pattern)
+        if extension:
+            clauses.append("extension = ?")
+            params.append(extension.lower() if extension.startswith(".") else "." + extension.lower())
+        if min_size is not None:
+            clauses.append("size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            clauses.append("size <= ?")
+            params.append(max_size)
+        now = time.time()
+        if modified_within_hours is not None:
+            clauses.append("mtime >= ?")
+            params.append(now - modified_within_hours * 3600)
+        if older_than_hours is not None:
+            clauses.append("mtime < ?")
+            params.append(now - older_than_hours * 3600)
+        order = {"path": "path", "size": "size DESC", "mtime": "mtime DESC"}.get(order_by, "path")
+        params.append(limit)
+
+        rows = conn.execute(
+            f"SELECT path, size, mtime FROM entries WHERE {' AND '.join(clauses)} ORDER BY {order} LIMIT ?",
+            params
+        ).fetchall()
+        return {
+            "success": True,
+            "files": [dict(row) for row in rows],
+            "count": len(rows),
+            "truncated": self.truncated
+        }
+
+# Global index instance for the current workspace
+_workspace_index: Optional[WorkspaceIndex] = None
+_workspace_index_lock = threading.Lock()
+
+def get_workspace_index() -> WorkspaceIndex:
+    """Get the index of the current working directory (singleton pattern)"""
+    global _workspace_index
+    if _workspace_index is None:
+        with _workspace_index_lock:
+            if _workspace_index is None:
+                _workspace_index = WorkspaceIndex(os.getcwd())
+    return _workspace_index
+
+def workspace_file_written(file_path: str) -> None:
+    """Tell the workspace index (if open) that the server wrote a file"""
+    index = _workspace_index
+    if index is None:
+        return
+    try:
+        index.file_written(file_path)
+    except Exception as e:
+        logger.warning(f"Could not update workspace index for {file_path}: {str(e)}")
+
+def close_workspace_index() -> None:
+    """Close the workspace index if it was ever opened"""
+    global _workspace_index
+    with _workspace_index_lock:
+        if _workspace_index is not None:
+            _workspace_index.close()
+            _workspace_index = None
@@ -2,19 +2,26 @@
 
 import sys
 import os
+import asyncio
 from pathlib import Path
 
 # Add the src directory to Python path for absolute imports
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
-from mcp.server.fastmcp import FastMCP
-from mcp.types import TextContent
-import json
+from utils.startup import startup_timer
+
+from mcp.server.fastmcp import FastMCP, Context
+from mcp.types import CallToolResult, TextContent
+startup_timer.mark("import mcp")
 
 # Import only the essential tools and resources
-from tools import DatabaseTools, FileTools
-from resources import DataResources, FileResources
+from tools import DatabaseTools, FileTools, SearchTools
+from tools.search_tools import shutdown_search_pool
+from resources import (
+    DataResources, FileResources, get_workspace_index, close_workspace_index, get_system_sampler,
+    workspace_file_written, close_directory_tree_walker
+)
 from prompts import (
     get_analyze_notes_prompt,
     get_optimize_database_prompt,
@@ -26,161 +33,385 @@ from prompts import (
 )
 from config.settings import get_settings
 from utils.logging import setup_logging, get_logger
+from utils.concurrency import run_blocking, run_cancellable, session_stats, shutdown_executor
+from utils.result_cache import get_result_cache
+from utils.process_pool import get_process_pool, shutdown_process_pool
+from utils.serialization import resource_text, to_json, tool_result
+from utils.metrics import metrics, start_metrics_dump, stop_metrics_dump
+startup_timer.mark("import server modules")
 
 # Setup logging and configuration
 setup_logging()
 logger = get_logger(__name__)
 settings = get_settings()
+startup_timer.mark("settings and logging")
 
-# Initialize MCP server with a more personal name
-mcp = FastMCP("Cole-Daily-MCP")
+# Initialize MCP server with a more personal name; host/port only matter for the HTTP transports
+mcp = FastMCP(
+    "Cole-Daily-MCP",
+    host=settings.http_host,
+    port=settings.http_port,
+    streamable_http_path=settings.http_path
+)
 
 # Initialize essential tool and resource classes
 db_tools = DatabaseTools()
+startup_timer.mark("open notes database")
 file_tools = FileTools()
-data_resources = DataResources()
+data_resources = DataResources(db_tools)  # Shares the pool instead of opening a second one
 file_resources = FileResources()
 
 # ==================== NOTES & KNOWLEDGE MANAGEMENT ====================
 
 @mcp.tool()
-def quick_note(title: str, content: str) -> str:
+@metrics.instrument("tool")
+async def quick_note(title: str, content: str) -> CallToolResult:
     """Quickly save a note - your primary capture tool"""
-    result = db_tools.create_note(title, content)
-    return str(result)
+    result = await run_blocking("quick_note", db_tools.create_note, title, content)
+    return tool_result(result)
+
+@mcp.tool()
+@metrics.instrument("tool")
+async def find_notes(search_term: str, limit: int = 20, offset: int = 0, after: str = None) -> CallToolResult:
+    """Find notes by searching title or content (ranked, with snippets); pass next_cursor as after"""
+    result = await run_blocking("find_notes", db_tools.search_notes, search_term, limit, offset, after)
+    return tool_result(result)
+
+@mcp.tool()
+@metrics.instrument("tool")
+async def recent_notes(limit: int = 10, after: str = None) -> CallToolResult:
+    """Get your most recent notes (default: last 10); pass next_cursor as after for older ones"""
+    result = await run_blocking("recent_notes", db_tools.get_notes, limit, after)
+    return tool_result(result)
+
+@mcp.tool()
+@metrics.instrument("tool")
+async def related_notes(note_id: int, limit: int = 5) -> CallToolResult:
+    """Find the notes most similar to a given note (local TF-IDF vectors, no network)"""
+    result = await run_blocking("related_notes", db_tools.related_notes, note_id, limit)
+    return tool_result(result)
 
 @mcp.tool()
-def find_notes(search_term: str) -> str:
-    """Find notes by searching title or content"""
-    result = db_tools.search_notes(search_term)
-    return str(result)
+@metrics.instrument("tool")
+async def semantic_search(query: str, limit: int = 10) -> CallToolResult:
+    """Rank notes by similarity to free text rather than exact keyword matches"""
+    result = await run_blocking("semantic_search", db_tools.semantic_search, query, limit)
+    return tool_result(result)
 
 @mcp.tool()
-def recent_notes(limit: int = 10) -> str:
-    """Get your most recent notes (default: last 10)"""
-    result = db_tools.get_notes(limit)
-    return str(result)
+@metrics.instrument("tool")
+async def find_duplicates(threshold: float = None, limit: int = 20, merge: bool = False) -> CallToolResult:
+    """List clusters of near-identical notes; merge=True keeps the most complete note of each and deletes the rest"""
+    result = await run_blocking("find_duplicates", db_tools.find_duplicates, threshold, limit, merge)
+    return tool_result(result)
 
 @mcp.tool()
-def sql_query(query: str, params: tuple = None) -> str:
-    """Execute custom SQL query on your notes database"""
-    result = db_tools.execute_query(query, params)
-    return str(result)
+@metrics.instrument("tool")
+async def import_notes(notes: list[dict] = None, directory: str = None, batch_size: int = 500) -> CallToolResult:
+    """Bulk-import notes from a list of {title, content} objects or a directory of .md/.jsonl files"""
+    if directory:
+        result = await run_blocking("import_notes", db_tools.import_notes_from_directory, directory, batch_size)
+    else:
+        result = await run_blocking("import_notes", db_tools.bulk_create_notes, notes or [], batch_size)
+    return tool_result(result)
+
+@mcp.tool()
+@metrics.instrument("tool")
+async def sql_query(query: str = None, params: tuple = None, max_rows: int = None,
+                    max_bytes: int = None, format: str = "rows", continuation: str = None,
+                    timeout: float = None) -> CallToolResult:
+    """Execute custom SQL on your notes database; large results are truncated with a continuation token, and queries are stopped after timeout seconds (capped by the server's API timeout)"""
+    max_rows = max_rows or settings.sql_max_rows
+    max_bytes = max_bytes or settings.sql_max_bytes
+    if continuation:
+        result = await run_cancellable("sql_query", db_tools.fetch_more, continuation, max_rows,
+                                       max_bytes, format, timeout=timeout)
+    elif query:
+        result = await run_cancellable("sql_query", db_tools.execute_query, query, params, max_rows,
+                                       max_bytes, format, timeout=timeout)
+    else:
+        result = {"success": False, "error": "Provide a query or a continuation token"}
+    return tool_result(result)
 
 # ==================== FILE & PROJECT OPERATIONS ====================
 
 @mcp.tool()
-def read_file(file_path: str) -> str:
-    """Read any text file in your workspace"""
-    result = file_tools.read_text_file(file_path)
-    return str(result)
+@metrics.instrument("tool")
+async def read_file(file_path: str, start_line: int = None, max_lines: int = None,
+                    byte_offset: int = None, max_bytes: int = None,
+                    tail_lines: int = None, cursor: str = None) -> CallToolResult:
+    """Read a text file in pages: by line range, byte range, tail, or a next_cursor"""
+    result = await run_blocking(
+        "read_file", file_tools.read_text_file, file_path,
+        start_line, max_lines, byte_offset, max_bytes, tail_lines, cursor
+    )
+    return tool_result(result)
 
 @mcp.tool()
-def save_file(file_path: str, content: str) -> str:
+@metrics.instrument("tool")
+async def save_file(file_path: str, content: str) -> CallToolResult:
     """Save content to a file"""
-    result = file_tools.write_text_file(file_path, content)
-    return str(result)
+    result = await run_blocking("save_file", file_tools.write_text_file, file_path, content)
+    if result.get("success"):
+        await run_blocking("save_file", workspace_file_written, file_path)
+    return tool_result(result)
+
+@mcp.tool()
+@metrics.instrument("tool")
+async def edit_file(file_path: str, operation: str, diff: str = None, start_line: int = None,
+                    end_line: int = None, content: str = None, expected_mtime: float = None,
+                    expected_sha256: str = None) -> CallToolResult:
+    """Edit a file without resending it: apply a unified diff ("patch"), replace a line range ("replace_lines") or "append"; pass expected_mtime/expected_sha256 from a previous read or edit to refuse stale edits"""
+    result = await run_blocking(
+        "edit_file", file_tools.edit_text_file, file_path, operation, diff,
+        start_line, end_line, content, expected_mtime, expected_sha256
+    )
+    if result.get("success"):
+        await run_blocking("edit_file", workspace_file_written, file_path)
+    return tool_result(result)
+
+@mcp.tool()
+@metrics.instrument("tool")
+async def explore_directory(directory_path: str, sort_by: str = "name", descending: bool = False,
+                            pattern: str = None, entry_type: str = None,
+                            limit: int = None, cursor: str = None) -> CallToolResult:
+    """Explore a directory: sort by name/size/mtime, filter by glob or type, page with next_cursor"""
+    result = await run_blocking(
+        "explore_directory", file_tools.list_directory, directory_path,
+        sort_by, descending, pattern, entry_type, limit, cursor
+    )
+    return tool_result(result)
+
+@mcp.tool()
+@metrics.instrument("tool")
+async def directory_tree(directory_path: str = ".", max_depth: int = 3, max_nodes: int = None) -> CallToolResult:
+    """du-style tree: cumulative size, file and directory counts per directory (largest first) plus the largest files; repeat calls only re-list directories whose mtime changed"""
+    result = await run_blocking("directory_tree", file_resources.get_directory_tree,
+                                directory_path, max_depth, max_nodes)
+    return tool_result({"success": "error" not in result, **result})
+
+@mcp.tool()
+@metrics.instrument("tool")
+async def find_files(name_pattern: str = None, extension: str = None, min_size: int = None,
+                     max_size: int = None, modified_within_hours: float = None,
+                     older_than_hours: float = None, order_by: str = "path", limit: int = 100) -> CallToolResult:
+    """Find workspace files by name glob, extension, size and age using the workspace index"""
+    result = await run_blocking(
+        "find_files", get_workspace_index().find_files, name_pattern, extension,
+        min_size, max_size, modified_within_hours, older_than_hours, order_by, limit
+    )
+    return tool_result(result)
 
 @mcp.tool()
-def explore_directory(directory_path: str) -> str:
-    """Explore what's in a directory"""
-    result = file_tools.list_directory(directory_path)
-    return str(result)
+@metrics.instrument("tool")
+async def search_files(pattern: str, ctx: Context, directory: str = ".", regex: bool = False,
+                       file_glob: str = None, ignore_case: bool = False, context_lines: int = 2,
+                       max_results: int = None, max_bytes: int = None) -> CallToolResult:
+    """Search file contents in parallel (literal or regex); matches stream as progress notifications"""
+    loop = asyncio.get_running_loop()
+    streamed = 0
+    
+    def on_match(entry: dict) -> None:
+        nonlocal streamed
+        streamed += len(entry["matches"])
+        asyncio.run_coroutine_threadsafe(
+            ctx.report_progress(streamed, max_results, to_json(entry, compact=True)), loop
+        )
+    
+    result = await run_blocking(
+        "search_files", SearchTools.search_content, pattern, directory, regex,
+        file_glob, ignore_case, context_lines, max_results, max_bytes, on_match
+    )
+    return tool_result(result)
 
 @mcp.tool()
-def analyze_csv(file_path: str, max_rows: int = 100) -> str:
-    """Quick CSV analysis and preview"""
-    result = file_tools.read_csv_file(file_path, max_rows)
-    return str(result)
+@metrics.instrument("tool")
+async def analyze_csv(file_path: str, max_rows: int = 100, profile: bool = False) -> CallToolResult:
+    """Quick CSV preview, or a whole-file column profile with profile=True"""
+    result = await run_cancellable("analyze_csv", file_tools.read_csv_file, file_path, max_rows, profile)
+    return tool_result(result)
 
 # ==================== SMART RESOURCES ====================
 
 @mcp.resource("notes://schema")
-def notes_database_info() -> str:
+@metrics.instrument("resource")
+async def notes_database_info() -> str:
     """Your notes database structure and stats"""
-    result = data_resources.get_database_schema()
-    return str(result)
+    result = await run_blocking("notes://schema", data_resources.get_database_schema)
+    return resource_text(result)
 
 @mcp.resource("workspace://current")
-def current_workspace() -> str:
-    """Current workspace overview"""
-    try:
-        import os
-        workspace_info = {
-            "current_directory": os.getcwd(),
-            "total_files": len([f for f in os.listdir('.') if os.path.isfile(f)]),
-            "total_directories": len([d for d in os.listdir('.') if os.path.isdir(d)]),
-            "workspace_type": "Daily Productivity Workspace"
-        }
-        return json.dumps(workspace_info, indent=2)
-    except Exception as e:
-        return json.dumps({"error": str(e)})
+@metrics.instrument("resource")
+async def current_workspace() -> str:
+    """Current workspace overview (served from the workspace index)"""
+    result = await run_blocking("workspace://current", get_workspace_index().get_stats)
+    return resource_text(result)
+
+@mcp.resource("workspace://tree")
+@metrics.instrument("resource")
+async def workspace_tree() -> str:
+    """Workspace directory tree (served from the workspace index)"""
+    result = await run_blocking("workspace://tree", get_workspace_index().get_tree)
+    return resource_text(result)
 
 @mcp.resource("system://status")
-def system_status() -> str:
-    """Quick system information"""
-    result = data_resources.get_system_info()
-    return str(result)
+@metrics.instrument("resource")
+async def system_status() -> str:
+    """Quick system information from the latest background sample (CPU, memory, disk, server RSS and fds)"""
+    result = await run_blocking("system://status", data_resources.get_system_info)
+    return resource_text(result)
+
+@mcp.resource("system://status/{minutes}")
+@metrics.instrument("resource")
+async def system_status_history(minutes: str) -> str:
+    """System information plus min/avg/max over the last N minutes of samples"""
+    try:
+        window = float(minutes)
+    except ValueError:
+        return resource_text({"error": f"Invalid number of minutes: {minutes}"})
+    result = await run_blocking("system://status", data_resources.get_system_info, window)
+    return resource_text(result)
 
 @mcp.resource("config://current")
-def server_settings() -> str:
+@metrics.instrument("resource")
+async def server_settings() -> str:
     """Current MCP server configuration"""
     result = data_resources.get_configuration()
-    return str(result)
+    return resource_text(result)
+
+@mcp.resource("cache://stats")
+@metrics.instrument("resource")
+async def cache_stats() -> str:
+    """Hit/miss counters and size of the file analysis cache"""
+    result = get_result_cache().stats()
+    return resource_text(result)
+
+@mcp.resource("notes://slow-queries")
+@metrics.instrument("resource")
+async def slow_queries() -> str:
+    """Recent slow notes-database queries with their query plans, plus per-statement totals"""
+    result = {
+        "threshold_ms": db_tools.query_stats.slow_ms,
+        "slow_queries": db_tools.query_stats.slow_queries(),
+        "statements": db_tools.query_stats.summary()
+    }
+    return resource_text(result)
+
+@mcp.resource("metrics://server")
+@metrics.instrument("resource")
+async def server_metrics() -> str:
+    """Per-handler call counts, error counts, latency percentiles and response sizes, plus startup timings"""
+    return resource_text(dict(metrics.snapshot(), startup=startup_timer.report(), **session_stats(),
+                              process_pool=get_process_pool().stats()))
 
 @mcp.resource("project://file/{file_path}")
-def file_details(file_path: str) -> str:
+@metrics.instrument("resource")
+async def file_details(file_path: str) -> str:
     """Get detailed file information"""
     import urllib.parse
     decoded_path = urllib.parse.unquote(file_path)
-    result = file_resources.get_file_info(decoded_path)
-    return str(result)
+    result = await run_blocking("project://file", file_resources.get_file_info, decoded_path)
+    return resource_text(result)
+
+@mcp.resource("project://tree/{directory_path}")
+@metrics.instrument("resource")
+async def directory_sizes(directory_path: str) -> str:
+    """du-style size tree of a directory (3 levels, default node budget)"""
+    import urllib.parse
+    decoded_path = urllib.parse.unquote(directory_path)
+    result = await run_blocking("project://tree", file_resources.get_directory_tree, decoded_path)
+    return resource_text(result)
 
 # ==================== WORKFLOW PROMPTS ====================
 
 @mcp.prompt("daily_review")
+@metrics.instrument("prompt")
 def daily_review_prompt(focus: str = "recent") -> list[TextContent]:
     """Review your recent notes and identify patterns"""
     template = get_analyze_notes_prompt(focus)
     return [TextContent(type="text", text=template)]
 
 @mcp.prompt("project_cleanup")
+@metrics.instrument("prompt")
 def project_cleanup_prompt() -> list[TextContent]:
     """Organize and clean up your current project"""
     template = get_file_organization_prompt()
     return [TextContent(type="text", text=template)]
 
 @mcp.prompt("code_review")
+@metrics.instrument("prompt")
 def code_review_prompt(language: str = "python") -> list[TextContent]:
     """Review code quality and suggest improvements"""
     template = get_code_review_prompt(language)
     return [TextContent(type="text", text=template)]
 
 @mcp.prompt("knowledge_gaps")
+@metrics.instrument("prompt")
 def knowledge_gaps_prompt() -> list[TextContent]:
     """Identify gaps in your knowledge base"""
     template = get_analyze_project_prompt("knowledge")
     return [TextContent(type="text", text=template)]
 
+@mcp.prompt("optimize_database")
+@metrics.instrument("prompt")
+def optimize_database_prompt() -> list[TextContent]:
+    """Tune the notes database using recorded slow queries and their plans"""
+    template = get_optimize_database_prompt(
+        "notes",
+        slow_queries=db_tools.query_stats.slow_queries(limit=10),
+        statements=db_tools.query_stats.summary(limit=10)
+    )
+    return [TextContent(type="text", text=template)]
+
+startup_timer.mark("register handlers")
+
 # ==================== SERVER STARTUP ====================
 
 def main():
     """Daily workflow MCP server entry point"""
     logger.info("🚀 Starting Cole's Daily Workflow MCP Server")
     logger.info("=== Streamlined for Productivity ===")
-    logger.info("📝 NOTES: 4 tools (quick_note, find_notes, recent_notes, sql_query)")
-    logger.info("📁 FILES: 4 tools (read_file, save_file, explore_directory, analyze_csv)") 
-    logger.info("📊 RESOURCES: 5 resources (workspace, notes, system, config, file details)")
-    logger.info("💡 PROMPTS: 4 workflows (daily_review, project_cleanup, code_review, knowledge_gaps)")
-    logger.info("TOTAL: 8 tools, 5 resources, 4 prompts optimized for daily use")
+    logger.info("📝 NOTES: 8 tools (quick_note, find_notes, recent_notes, related_notes, semantic_search, find_duplicates, import_notes, sql_query)")
+    logger.info("📁 FILES: 8 tools (read_file, save_file, edit_file, explore_directory, directory_tree, find_files, search_files, analyze_csv)") 
+    logger.info("📊 RESOURCES: 11 resources (workspace, workspace tree, notes, slow queries, system, system history, config, cache stats, metrics, file details, directory sizes)")
+    logger.info("💡 PROMPTS: 5 workflows (daily_review, project_cleanup, code_review, knowledge_gaps, optimize_database)")
+    logger.info("TOTAL: 16 tools, 11 resources, 5 prompts optimized for daily use")
+    
+    startup = startup_timer.report()
+    phases = ", ".join(f"{name} {ms}ms" for name, ms in startup["phases_ms"].items())
+    logger.info(f"⏱️ Startup: {startup['total_ms']}ms ({phases})")
+    if startup["total_ms"] > settings.startup_budget_ms:
+        logger.warning(f"Startup took {startup['total_ms']}ms, over the {settings.startup_budget_ms}ms budget")
+    
+    transport = settings.mcp_transport
+    if transport not in ("stdio", "sse", "streamable-http"):
+        raise ValueError(f"Unknown MCP_TRANSPORT {transport!r} (use stdio, sse or streamable-http)")
+    if transport != "stdio":
+        path = settings.http_path if transport == "streamable-http" else "/sse"
+        logger.info(f"🌐 Serving {transport} on http://{settings.http_host}:{settings.http_port}{path} "
+                    f"(up to {settings.session_concurrency} concurrent calls per session)")
     
+    start_metrics_dump()
+    get_system_sampler().start()
+    get_process_pool().start()  # Workers import pandas while the client connects
     try:
-        mcp.run(transport="stdio")
+        mcp.run(transport=transport)
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
         logger.error(f"Server error: {str(e)}")
         raise
+    finally:
+        stop_metrics_dump()
+        get_system_sampler().stop()
+        shutdown_executor()
+        shutdown_search_pool()
+        shutdown_process_pool()
+        close_directory_tree_walker()
+        db_tools.close()
+        data_resources.close()
+        close_workspace_index()
+        logger.info("Database connections closed")
 
 if __name__ == "__main__":
     main()
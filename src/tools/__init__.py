@@ -2,5 +2,6 @@
 
 from tools.database_tools import DatabaseTools
 from tools.file_tools import FileTools
+from tools.search_tools import SearchTools
 
-__all__ = ["DatabaseTools", "FileTools"]
\ No newline at end of file
+__all__ = ["DatabaseTools", "FileTools", "SearchTools"]
\ No newline at end of file
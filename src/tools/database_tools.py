@@ -1,28 +1,63 @@
 """Database operation tools"""
 
+import os
 import sqlite3
 import json
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
 from utils.logging import get_logger
+from utils.cursors import encode_cursor, decode_cursor
+from tools.note_import import ParsedNote, iter_notes, iter_directory_notes
+from tools.query_cursors import ResultCursor, ResultCursorStore
+from tools.query_stats import QueryStats
+from tools.note_vectors import NoteVectorIndex
+from tools.note_duplicates import NoteDuplicateIndex
+from utils.sqlite_pool import SQLitePool
+from utils.sqlite_guard import QueryGuard
 from config.settings import get_settings
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Rows requested per fetchmany() call
+FETCH_BATCH_SIZE = 256
+
 class DatabaseTools:
     """Database operation tools for MCP server"""
     
     def __init__(self, db_path: str = "data/app.db"):
         self.db_path = db_path
+        self.fts_enabled = False
+        self.pool = SQLitePool(
+            db_path,
+            cache_size_kb=settings.db_cache_size_kb,
+            mmap_size=settings.db_mmap_size,
+            busy_timeout_ms=settings.db_busy_timeout_ms,
+            cached_statements=settings.db_statement_cache_size
+        )
+        self.result_cursors = ResultCursorStore(
+            ttl=settings.sql_cursor_ttl_seconds,
+            max_open=settings.sql_max_open_cursors
+        )
+        self.query_stats = QueryStats()
+        self.vectors = NoteVectorIndex(self.pool, f"{db_path}.vectors.npz")
+        self.duplicates = NoteDuplicateIndex(self.pool)
         self._ensure_db_exists()
     
+    def close(self):
+        """Save the vector index, then close open result cursors and pooled connections"""
+        self.vectors.close()
+        self.result_cursors.close_all()
+        self.pool.close_all()
+    
     def _ensure_db_exists(self):
         """Ensure database and basic tables exist"""
         try:
-            import os
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            with sqlite3.connect(self.db_path) as conn:
+            conn = self.pool.connection()
+            with conn:
                 cursor = conn.cursor()
                 
                 # Create a sample table
@@ -36,52 +71,284 @@ class DatabaseTools:
                     )
                 """)
                 
-                conn.commit()
+                # Supports newest-first listing and keyset pagination
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_notes_created_at_id
+                    ON notes (created_at, id)
+                """)
+                
+                # MinHash side tables for near-duplicate detection
+                self.duplicates.ensure_schema(cursor)
+                
+                # Change log that lets the vector index follow deletes and edits
+                self.vectors.ensure_schema(cursor)
+                
+            self.fts_enabled = self._ensure_fts_index()
                 
         except Exception as e:
             logger.error(f"Error creating database: {str(e)}")
     
-    def execute_query(self, query: str, params: Optional[tuple] = None) -> Dict[str, Any]:
+    def _ensure_fts_index(self) -> bool:
+        """
+        Create the FTS5 index over notes and the triggers keeping it in sync
+        
+        Returns:
+            True if full-text search is available, False if SQLite lacks FTS5
+        """
+        try:
+            conn = self.pool.connection()
+            with conn:
+                cursor = conn.cursor()
+                
+                exists = cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='notes_fts'"
+                ).fetchone()
+                
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                        title, content, content='notes', content_rowid='id'
+                    )
+                """)
+                
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+                        INSERT INTO notes_fts(rowid, title, content)
+                        VALUES (new.id, new.title, new.content);
+                    END
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+                        INSERT INTO notes_fts(notes_fts, rowid, title, content)
+                        VALUES ('delete', old.id, old.title, old.content);
+                    END
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE ON notes BEGIN
+                        INSERT INTO notes_fts(notes_fts, rowid, title, content)
+                        VALUES ('delete', old.id, old.title, old.content);
+                        INSERT INTO notes_fts(rowid, title, content)
+                        VALUES (new.id, new.title, new.content);
+                    END
+                """)
+                
+                # Backfill databases created before the index existed
+                if not exists:
+                    cursor.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+                    logger.info("Built full-text index for existing notes")
+            return True
+            
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, falling back to LIKE search: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _to_fts_query(search_term: str) -> str:
+        """Quote each word of a free-text search term as an FTS5 string"""
+        tokens = search_term.split()
+        return " ".join('"' + token.replace('"', '""') + '"' for token in tokens)
+    
+    def _query_timeout(self, timeout: Optional[float]) -> float:
+        """Per-call time limit, capped by settings.api_timeout"""
+        if timeout is None or timeout <= 0:
+            return float(settings.api_timeout)
+        return min(float(timeout), float(settings.api_timeout))
+    
+    def execute_query(self, query: str, params: Optional[tuple] = None,
+                      max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+                      result_format: str = "rows", timeout: Optional[float] = None,
+                      cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
         """
         Execute a SQL query
         
+        Every call is timed and recorded in query_stats; statements slower
+        than settings.slow_query_ms have their plan captured and logged.
+        
+        Result rows are read with fetchmany until the row or byte budget is
+        reached. A truncated result keeps its cursor open server-side and
+        returns a continuation token for fetch_more().
+        
+        The statement is interrupted once the time limit passes or
+        cancel_event is set; rows read before that are returned as a
+        partial result, and writes are rolled back.
+        
         Args:
             query: SQL query string
             params: Optional query parameters
+            max_rows: Maximum rows to return (None for no limit)
+            max_bytes: Approximate maximum size of returned values (None for no limit)
+            result_format: "rows" for a list of dicts, or "columnar" for
+                column names once followed by row arrays
+            timeout: Time limit in seconds (default and cap: settings.api_timeout)
+            cancel_event: Set from another thread to abort the query
             
         Returns:
             Dictionary with query results
         """
+        conn = None
+        guard = None
+        columns: List[str] = []
+        rows: List[tuple] = []
+        writes_pending = False
+        error = None
+        started = time.perf_counter()
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row  # Enable dict-like access
-                cursor = conn.cursor()
-                
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
-                
-                # For SELECT queries, fetch results
-                if query.strip().upper().startswith('SELECT'):
-                    rows = cursor.fetchall()
-                    return {
-                        "success": True,
-                        "data": [dict(row) for row in rows],
-                        "count": len(rows)
-                    }
-                else:
-                    # For INSERT, UPDATE, DELETE
-                    conn.commit()
-                    return {
-                        "success": True,
-                        "affected_rows": cursor.rowcount,
-                        "last_row_id": cursor.lastrowid
-                    }
+            conn = self.pool.connection()
+            with QueryGuard(conn, self._query_timeout(timeout), cancel_event) as guard:
+                with conn:  # Commits on success, rolls back on error
+                    cursor = conn.cursor()
+                    
+                    if params:
+                        cursor.execute(query, params)
+                    else:
+                        cursor.execute(query)
+                    
+                    # Statements that produce a result set (SELECT, WITH, PRAGMA, RETURNING)
+                    if cursor.description is not None:
+                        columns = [column[0] for column in cursor.description]
+                        if conn.in_transaction:
+                            # Writes with RETURNING must run to completion before commit
+                            max_rows = max_bytes = None
+                            writes_pending = True  # An interrupt rolls these rows back
+                        result_cursor = ResultCursor(conn, cursor, columns, [], 0)
+                        exhausted = self._fetch_page(result_cursor, max_rows, max_bytes, rows)
+                        result = self._format_rows(columns, rows, result_format)
+                        if not exhausted:
+                            self.pool.detach()  # The cursor keeps this connection from now on
+                            token = self.result_cursors.open(conn, cursor, columns, result_cursor.buffered)
+                            result.update({"truncated": True, "continuation": token})
+                    else:
+                        # For INSERT, UPDATE, DELETE
+                        result = {
+                            "success": True,
+                            "affected_rows": cursor.rowcount,
+                            "last_row_id": cursor.lastrowid
+                        }
+            return result
                     
         except Exception as e:
-            logger.error(f"Database query error: {str(e)}")
+            error = str(e)
+            if guard is not None and guard.interrupted(e):
+                logger.warning(f"Database query interrupted ({guard.reason}): {query[:200]}")
+                return self._interrupted_result(guard, columns, [] if writes_pending else rows, result_format)
+            logger.error(f"Database query error: {error}")
+            return {"success": False, "error": error}
+        finally:
+            if conn is not None:
+                self.query_stats.record(conn, query, params, (time.perf_counter() - started) * 1000,
+                                        len(rows), guard.vm_steps if guard else 0, error)
+    
+    def fetch_more(self, continuation: str, max_rows: Optional[int] = None,
+                   max_bytes: Optional[int] = None, result_format: str = "rows",
+                   timeout: Optional[float] = None,
+                   cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Continue a truncated query result
+        
+        Args:
+            continuation: Token returned with a truncated result
+            max_rows: Maximum rows to return (None for no limit)
+            max_bytes: Approximate maximum size of returned values (None for no limit)
+            result_format: "rows" or "columnar"
+            timeout: Time limit in seconds (default and cap: settings.api_timeout)
+            cancel_event: Set from another thread to abort the fetch
+            
+        Returns:
+            Dictionary with the next rows, and a new continuation if still truncated
+        """
+        result_cursor = self.result_cursors.get(continuation)
+        if result_cursor is None:
+            return {"success": False, "error": "Continuation expired or unknown; re-run the query"}
+        
+        rows: List[tuple] = []
+        guard = None
+        try:
+            with result_cursor.lock:
+                with QueryGuard(result_cursor.conn, self._query_timeout(timeout), cancel_event) as guard:
+                    exhausted = self._fetch_page(result_cursor, max_rows, max_bytes, rows)
+            result = self._format_rows(result_cursor.columns, rows, result_format)
+        except Exception as e:
+            self.result_cursors.close(continuation)
+            if guard is not None and guard.interrupted(e):
+                return self._interrupted_result(guard, result_cursor.columns, rows, result_format)
+            logger.error(f"Database fetch error: {str(e)}")
             return {"success": False, "error": str(e)}
+        
+        if exhausted:
+            self.result_cursors.close(continuation)
+        else:
+            result.update({"truncated": True, "continuation": continuation})
+        return result
+    
+    def _interrupted_result(self, guard: QueryGuard, columns: List[str], rows: List[tuple],
+                            result_format: str) -> Dict[str, Any]:
+        """Describe a query stopped by its deadline or by cancellation"""
+        flag = "cancelled" if guard.reason == "cancelled" else "timed_out"
+        if not rows:
+            return {"success": False, "error": guard.describe(), flag: True}
+        result = self._format_rows(columns, rows, result_format)
+        result.update({"partial": True, flag: True, "warning": f"{guard.describe()}; returning rows read so far"})
+        return result
+    
+    @staticmethod
+    def _row_size(row: tuple) -> int:
+        """Approximate encoded size of one row"""
+        size = 0
+        for value in row:
+            if value is None:
+                size += 4
+            elif isinstance(value, (bytes, str)):
+                size += len(value) + 2
+            else:
+                size += 8
+        return size
+    
+    def _fetch_page(self, result_cursor: ResultCursor, max_rows: Optional[int],
+                    max_bytes: Optional[int], rows: List[tuple]) -> bool:
+        """
+        Read rows into the given list until a budget is hit
+        
+        Rows are appended in place so a caller can still return them if
+        the fetch is interrupted part way.
+        
+        Returns:
+            True if the cursor is exhausted; rows read past the budget are pushed back onto it
+        """
+        used_bytes = 0
+        while max_rows is None or len(rows) < max_rows:
+            want = FETCH_BATCH_SIZE if max_rows is None else min(FETCH_BATCH_SIZE, max_rows - len(rows))
+            batch = result_cursor.fetchmany(want)
+            if not batch:
+                return True
+            for i, row in enumerate(batch):
+                row_size = self._row_size(row)
+                if max_bytes is not None and rows and used_bytes + row_size > max_bytes:
+                    result_cursor.push_back(list(batch[i:]))
+                    return False
+                rows.append(row)
+                used_bytes += row_size
+        
+        # Row budget reached exactly; peek to see whether anything is left
+        peek = result_cursor.fetchmany(1)
+        if not peek:
+            return True
+        result_cursor.push_back(peek)
+        return False
+    
+    @staticmethod
+    def _format_rows(columns: List[str], rows: List[tuple], result_format: str) -> Dict[str, Any]:
+        """Shape fetched rows as dicts or as a compact columnar table"""
+        if result_format == "columnar":
+            return {
+                "success": True,
+                "columns": columns,
+                "rows": [list(row) for row in rows],
+                "count": len(rows)
+            }
+        return {
+            "success": True,
+            "data": [dict(zip(columns, row)) for row in rows],
+            "count": len(rows)
+        }
     
     def create_note(self, title: str, content: str) -> Dict[str, Any]:
         """
@@ -95,35 +362,392 @@ class DatabaseTools:
             Dictionary with creation result
         """
         query = "INSERT INTO notes (title, content) VALUES (?, ?)"
-        return self.execute_query(query, (title, content))
+        conn = None
+        error = None
+        started = time.perf_counter()
+        try:
+            conn = self.pool.connection()
+            with conn:  # The note and its MinHash signature commit together
+                cursor = conn.execute(query, (title, content))
+                note_id = cursor.lastrowid
+                self.duplicates.note_added(conn, note_id, title, content)
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Error creating note: {error}")
+            return {"success": False, "error": error}
+        finally:
+            if conn is not None:
+                self.query_stats.record(conn, query, (title, content),
+                                        (time.perf_counter() - started) * 1000, 0, 0, error)
+        self.vectors.note_added(note_id, title, content)
+        return {"success": True, "affected_rows": 1, "last_row_id": note_id}
+    
+    def bulk_create_notes(self, notes: List[Dict[str, Any]],
+                          batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Insert many notes in batched transactions
+        
+        Args:
+            notes: Notes with "title", "content" and optional "created_at"
+                (ISO-8601 or epoch seconds, stored as UTC "YYYY-MM-DD HH:MM:SS")
+            batch_size: Notes per transaction (default: settings.import_batch_size)
+            
+        Returns:
+            Dictionary with import totals, per-batch throughput and skipped entries
+        """
+        return self._ingest_notes(iter_notes(notes), batch_size)
+    
+    def import_notes_from_directory(self, directory: str,
+                                    batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Import every Markdown (.md) and JSON Lines (.jsonl) file under a directory
+        
+        Args:
+            directory: Directory to walk recursively
+            batch_size: Notes per transaction (default: settings.import_batch_size)
+            
+        Returns:
+            Dictionary with import totals, per-batch throughput and skipped entries
+        """
+        if not os.path.isdir(directory):
+            return {"success": False, "error": f"Not a directory: {directory}"}
+        return self._ingest_notes(iter_directory_notes(directory), batch_size)
+    
+    def _ingest_notes(self, entries: Iterable[ParsedNote],
+                      batch_size: Optional[int]) -> Dict[str, Any]:
+        """Stream parsed notes into the database with executemany, one transaction per batch"""
+        batch_size = max(batch_size or settings.import_batch_size, 1)
+        query = """
+            INSERT INTO notes (title, content, created_at, updated_at)
+            VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, CURRENT_TIMESTAMP))
+        """
+        batches: List[Dict[str, Any]] = []
+        skipped: List[Dict[str, str]] = []
+        skipped_total = 0
+        inserted = 0
+        started = time.perf_counter()
+        
+        def skip(source: str, error: str) -> None:
+            nonlocal skipped_total
+            skipped_total += 1
+            if len(skipped) < settings.import_max_reported_errors:
+                skipped.append({"source": source, "error": error})
+        
+        def flush(sources: List[str], rows: List[tuple]) -> None:
+            nonlocal inserted
+            batch_started = time.perf_counter()
+            conn = self.pool.connection()
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM notes").fetchone()[0]
+            try:
+                with conn:
+                    conn.executemany(query, rows)
+                    self.duplicates.index_since(conn, last_id)
+                written = len(rows)
+            except sqlite3.Error:
+                # Isolate the offending rows instead of losing the whole batch
+                written = 0
+                with conn:
+                    for source, row in zip(sources, rows):
+                        try:
+                            conn.execute(query, row)
+                            written += 1
+                        except sqlite3.Error as e:
+                            skip(source, str(e))
+                    self.duplicates.index_since(conn, last_id)
+            self.vectors.sync()
+            elapsed = time.perf_counter() - batch_started
+            inserted += written
+            batches.append({
+                "batch": len(batches) + 1,
+                "rows": written,
+                "seconds": round(elapsed, 4),
+                "rows_per_second": round(written / elapsed) if elapsed else None
+            })
+        
+        try:
+            sources: List[str] = []
+            rows: List[tuple] = []
+            for source, note in entries:
+                if isinstance(note, str):
+                    skip(source, note)
+                    continue
+                sources.append(source)
+                rows.append((note["title"], note["content"], note["created_at"], note["created_at"]))
+                if len(rows) >= batch_size:
+                    flush(sources, rows)
+                    sources, rows = [], []
+            if rows:
+                flush(sources, rows)
+        except Exception as e:
+            logger.error(f"Bulk note import failed after {inserted} notes: {str(e)}")
+            return {"success": False, "error": str(e), "inserted": inserted,
+                    "batches": batches, "skipped": skipped_total, "skipped_entries": skipped}
+        
+        elapsed = time.perf_counter() - started
+        logger.info(f"Imported {inserted} notes in {len(batches)} batches ({skipped_total} skipped)")
+        return {
+            "success": True,
+            "inserted": inserted,
+            "skipped": skipped_total,
+            "skipped_entries": skipped,
+            "batches": batches,
+            "seconds": round(elapsed, 4),
+            "rows_per_second": round(inserted / elapsed) if elapsed else None
+        }
     
-    def get_notes(self, limit: int = 50) -> Dict[str, Any]:
+    @staticmethod
+    def _page_size(limit: Optional[int]) -> int:
+        """Apply the default page size and cap it"""
+        if not limit or limit < 1:
+            return settings.notes_page_size
+        return min(limit, settings.notes_max_page_size)
+    
+    def _paginate(self, query: str, params: tuple, limit: int,
+                  cursor_for: Callable[[Dict[str, Any]], Dict[str, Any]],
+                  offset: int = 0) -> Dict[str, Any]:
         """
-        Get all notes
+        Run a keyset-paginated query that fetches one extra row to detect more pages
         
         Args:
-            limit: Maximum number of notes to return
+            query: SELECT ending in "LIMIT ? OFFSET ?"
+            params: Query parameters, excluding the limit and offset
+            limit: Page size
+            cursor_for: Builds the cursor state from the last row of the page
+            offset: Rows to skip after the keyset position
             
         Returns:
-            Dictionary with notes data
+            Query result with a next_cursor (None on the last page)
         """
-        query = "SELECT * FROM notes ORDER BY created_at DESC LIMIT ?"
-        return self.execute_query(query, (limit,))
+        result = self.execute_query(query, params + (limit + 1, max(offset, 0)))
+        if not result["success"]:
+            return result
+        
+        rows = result["data"]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        result.update({
+            "data": rows,
+            "count": len(rows),
+            "next_cursor": encode_cursor(cursor_for(rows[-1])) if has_more else None
+        })
+        return result
     
-    def search_notes(self, search_term: str) -> Dict[str, Any]:
+    def get_notes(self, limit: Optional[int] = None, after: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get notes, newest first, one page at a time
+        
+        Args:
+            limit: Maximum number of notes to return (default: settings.notes_page_size)
+            after: next_cursor from the previous page
+            
+        Returns:
+            Dictionary with notes data and next_cursor
+        """
+        limit = self._page_size(limit)
+        cursor_for = lambda row: {"kind": "recent", "created_at": row["created_at"], "id": row["id"]}
+        
+        if after:
+            try:
+                state = decode_cursor(after)
+                if state.get("kind") != "recent":
+                    raise ValueError("Cursor does not belong to recent notes")
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            query = """
+                SELECT * FROM notes
+                WHERE (created_at, id) < (?, ?)
+                ORDER BY created_at DESC, id DESC
+                LIMIT ? OFFSET ?
+            """
+            return self._paginate(query, (state["created_at"], state["id"]), limit, cursor_for)
+        
+        query = "SELECT * FROM notes ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+        return self._paginate(query, (), limit, cursor_for)
+    
+    def search_notes(self, search_term: str, limit: Optional[int] = None, offset: int = 0,
+                     after: Optional[str] = None) -> Dict[str, Any]:
         """
         Search notes by title or content
         
+        Uses the FTS5 index when available, returning bm25-ranked results
+        with highlighted snippets; otherwise falls back to a LIKE scan.
+        
         Args:
             search_term: Term to search for
+            limit: Maximum number of notes to return (default: settings.notes_page_size)
+            offset: Number of matching notes to skip
+            after: next_cursor from the previous page
             
         Returns:
-            Dictionary with search results
+            Dictionary with search results and next_cursor
         """
-        query = """
+        limit = self._page_size(limit)
+        state = {}
+        if after:
+            try:
+                state = decode_cursor(after)
+                if state.get("kind") != "search" or state.get("term") != search_term:
+                    raise ValueError("Cursor does not belong to this search")
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+        
+        fts_query = self._to_fts_query(search_term)
+        if self.fts_enabled and fts_query and state.get("mode", "fts5") == "fts5":
+            keyset = ""
+            params: tuple = (fts_query,)
+            if state:
+                keyset = "AND (bm25(notes_fts), notes_fts.rowid) > (?, ?)"
+                params += (state["rank"], state["id"])
+            query = f"""
+                SELECT notes.*,
+                       highlight(notes_fts, 0, '[', ']') AS title_highlight,
+                       snippet(notes_fts, 1, '[', ']', '...', 16) AS snippet,
+                       bm25(notes_fts) AS rank
+                FROM notes_fts
+                JOIN notes ON notes.id = notes_fts.rowid
+                WHERE notes_fts MATCH ? {keyset}
+                ORDER BY rank, notes_fts.rowid
+                LIMIT ? OFFSET ?
+            """
+            cursor_for = lambda row: {
+                "kind": "search", "term": search_term, "mode": "fts5",
+                "rank": row["rank"], "id": row["id"]
+            }
+            result = self._paginate(query, params, limit, cursor_for, offset)
+            if result["success"]:
+                result["search_mode"] = "fts5"
+                return result
+            logger.warning(f"FTS search failed, falling back to LIKE: {result['error']}")
+            state = {}
+        
+        keyset = ""
+        search_pattern = f"%{search_term}%"
+        params = (search_pattern, search_pattern)
+        if state:
+            keyset = "AND (created_at, id) < (?, ?)"
+            params += (state["created_at"], state["id"])
+        query = f"""
             SELECT * FROM notes 
-            WHERE title LIKE ? OR content LIKE ? 
-            ORDER BY created_at DESC
+            WHERE (title LIKE ? OR content LIKE ?) {keyset}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
         """
-        search_pattern = f"%{search_term}%"
-        return self.execute_query(query, (search_pattern, search_pattern))
+        cursor_for = lambda row: {
+            "kind": "search", "term": search_term, "mode": "like",
+            "created_at": row["created_at"], "id": row["id"]
+        }
+        result = self._paginate(query, params, limit, cursor_for, offset)
+        if result["success"]:
+            result["search_mode"] = "like"
+        return result
+    
+    def _scored_notes(self, scored: List[tuple]) -> List[Dict[str, Any]]:
+        """Fetch id/title/snippet for (note id, score) pairs, keeping their order"""
+        if not scored:
+            return []
+        conn = self.pool.connection()
+        placeholders = ",".join("?" * len(scored))
+        rows = conn.execute(
+            f"SELECT id, title, substr(content, 1, 200) AS snippet, created_at FROM notes WHERE id IN ({placeholders})",
+            tuple(note_id for note_id, _ in scored)
+        ).fetchall()
+        by_id = {row["id"]: dict(row) for row in rows}
+        return [{**by_id[note_id], "score": round(score, 4)} for note_id, score in scored if note_id in by_id]
+    
+    def related_notes(self, note_id: int, limit: int = 5) -> Dict[str, Any]:
+        """
+        Find the notes most similar to an existing note
+        
+        Args:
+            note_id: Note to compare against (excluded from the results)
+            limit: Maximum number of related notes
+            
+        Returns:
+            Dictionary with notes ranked by cosine similarity
+        """
+        try:
+            scored = self.vectors.similar_to_note(note_id, self._page_size(limit))
+            if scored is None:
+                return {"success": False, "error": f"Note not found: {note_id}"}
+            notes = self._scored_notes(scored)
+            return {"success": True, "note_id": note_id, "data": notes, "row_count": len(notes)}
+        except Exception as e:
+            logger.error(f"Related notes lookup failed: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def semantic_search(self, query: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Rank notes by TF-IDF cosine similarity to free text
+        
+        Args:
+            query: Text to compare notes against
+            limit: Maximum number of results
+            
+        Returns:
+            Dictionary with notes ranked by similarity score
+        """
+        try:
+            notes = self._scored_notes(self.vectors.similar_to_text(query, self._page_size(limit)))
+            return {"success": True, "query": query, "data": notes, "row_count": len(notes),
+                    "indexed_notes": self.vectors.size}
+        except Exception as e:
+            logger.error(f"Semantic search failed: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def find_duplicates(self, threshold: Optional[float] = None, limit: int = 20,
+                        merge: bool = False) -> Dict[str, Any]:
+        """
+        List clusters of near-identical notes, optionally merging each into one note
+        
+        Args:
+            threshold: Minimum estimated Jaccard similarity of character shingles
+                (default: settings.duplicate_threshold)
+            limit: Maximum number of clusters to return (largest first)
+            merge: Keep the note with the longest content in each returned
+                cluster (oldest on ties) and delete the others
+            
+        Returns:
+            Dictionary with duplicate clusters and, when merging, what was deleted
+        """
+        threshold = settings.duplicate_threshold if threshold is None else threshold
+        try:
+            found = self.duplicates.clusters(threshold)
+            clusters = found[:self._page_size(limit)]
+            
+            conn = self.pool.connection()
+            note_ids = [note_id for cluster in clusters for note_id in cluster["note_ids"]]
+            notes = {}
+            for start in range(0, len(note_ids), 500):
+                chunk = note_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in conn.execute(
+                    f"""SELECT id, title, substr(content, 1, 200) AS snippet, length(content) AS length,
+                               created_at FROM notes WHERE id IN ({placeholders})""", chunk
+                ):
+                    notes[row["id"]] = dict(row)
+            for cluster in clusters:
+                cluster["notes"] = [notes[note_id] for note_id in cluster["note_ids"] if note_id in notes]
+                del cluster["note_ids"]
+            
+            result = {
+                "success": True,
+                "threshold": threshold,
+                "clusters": clusters,
+                "cluster_count": len(found),
+                "duplicate_notes": sum(len(cluster["notes"]) - 1 for cluster in clusters)
+            }
+            if merge:
+                deleted = []
+                with conn:
+                    for cluster in clusters:
+                        keep = max(cluster["notes"], key=lambda note: (note["length"] or 0, -note["id"]))
+                        drop = [note["id"] for note in cluster["notes"] if note["id"] != keep["id"]]
+                        conn.executemany("DELETE FROM notes WHERE id = ?", [(note_id,) for note_id in drop])
+                        cluster["kept"] = keep["id"]
+                        deleted.extend(drop)
+                result["deleted"] = deleted
+                logger.info(f"Merged {len(clusters)} duplicate clusters, deleted {len(deleted)} notes")
+            return result
+        except Exception as e:
+            logger.error(f"Duplicate detection failed: {str(e)}")
+            return {"success": False, "error": str(e)}
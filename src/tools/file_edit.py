@@ -0,0 +1,330 @@
+"""Streaming, atomic, precondition-guarded edits of text files"""
+
+import hashlib
+import io
+import mmap
+import os
+import re
+import shutil
+import stat
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from utils.line_index import get_line_index
+
+# Bytes copied per read when streaming unchanged regions
+COPY_CHUNK = 1024 * 1024
+
+# Process umask, applied to the permissions of newly created files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+_HUNK_HEADER = re.compile(rb"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+class EditError(Exception):
+    """An edit could not be applied; the file was left untouched"""
+
+class EditConflict(EditError):
+    """The file changed since the caller last saw it"""
+
+class _HashingWriter:
+    """File wrapper that hashes and counts everything written through it"""
+
+    def __init__(self, file):
+        self.file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+
+@contextmanager
+def atomic_writer(file_path: str) -> Iterator[_HashingWriter]:
+    """
+    Write a file through a temp file in the same directory, then os.replace it
+
+    Readers see either the old or the new file, never a partial one. The
+    path is resolved first, so writing through a symlink replaces its
+    target, and an existing file keeps its mode, owner and group (where
+    permitted). A file with several hard links is instead overwritten in
+    place from the finished temp file, so every link sees the new content;
+    that copy is not atomic. The temp file is removed if the block raises.
+    """
+    target = os.path.realpath(file_path)
+    try:
+        stats: Optional[os.stat_result] = os.stat(target)
+    except FileNotFoundError:
+        stats = None
+    in_place = stats is not None and stats.st_nlink > 1
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=f".{os.path.basename(target)}.",
+                                    suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w+b") as tmp:
+            writer = _HashingWriter(tmp)
+            yield writer
+            tmp.flush()
+            if in_place:
+                tmp.seek(0)
+                with open(target, "r+b") as original:
+                    shutil.copyfileobj(tmp, original, COPY_CHUNK)
+                    original.truncate()
+                    original.flush()
+                    os.fsync(original.fileno())
+            else:
+                os.fsync(tmp.fileno())
+        if in_place:
+            os.unlink(tmp_path)
+            return
+        if stats is None:
+            os.chmod(tmp_path, 0o666 & ~_UMASK)  # What open() would have created
+        else:
+            try:
+                os.chown(tmp_path, stats.st_uid, stats.st_gid)
+            except OSError:
+                pass  # Changing owner needs privileges; the new file keeps ours
+            os.chmod(tmp_path, stat.S_IMODE(stats.st_mode))  # After chown, which can clear setuid bits
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def file_sha256(file_path: str) -> str:
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def parse_unified_diff(diff: str) -> List[Tuple[int, int, List[Tuple[bytes, bytes]]]]:
+    """
+    Parse the hunks of a single-file unified diff
+
+    File headers (---/+++/diff/index) are ignored. Hunk bodies are read by
+    their line counts, and "\\ No newline at end of file" strips the newline
+    from the line before it.
+    Returns:
+        (old_start, old_count, [(tag, line_bytes), ...]) per hunk, where tag
+        is b" ", b"-" or b"+"
+    """
+    lines = diff.encode("utf-8").split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+    hunks = []
+    i = 0
+    while i < len(lines):
+        header = _HUNK_HEADER.match(lines[i])
+        i += 1
+        if not header:
+            continue
+        old_start = int(header.group(1))
+        old_count = int(header.group(2) or 1)
+        new_count = int(header.group(4) or 1)
+        body: List[Tuple[bytes, bytes]] = []
+        old_seen = new_seen = 0
+        while i < len(lines) and (old_seen < old_count or new_seen < new_count
+                                  or lines[i].startswith(b"\\")):
+            line = lines[i]
+            i += 1
+            if line.startswith(b"\\"):
+                if body:
+                    tag, text = body[-1]
+                    body[-1] = (tag, text[:-1])
+                continue
+            tag, text = (line[:1] or b" "), line[1:] + b"\n"  # Some tools strip the blank context line
+            if tag not in (b" ", b"-", b"+"):
+                raise EditError(f"Malformed hunk line {i}: {line[:40]!r}")
+            body.append((tag, text))
+            old_seen += tag != b"+"
+            new_seen += tag != b"-"
+        if old_seen != old_count or new_seen != new_count:
+            raise EditError(f"Hunk at line {old_start} is truncated")
+        hunks.append((old_start, old_count, body))
+    if not hunks:
+        raise EditError("No hunks found in diff")
+    return hunks
+
+class _Source:
+    """The file being edited: a memory map plus its line index"""
+
+    def __init__(self, file_path: str, stats: os.stat_result):
+        self.file_path = file_path
+        self.stats = stats
+        self.size = stats.st_size
+        self._file = open(file_path, "rb")
+        if self.size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = io.BytesIO(b"")  # mmap cannot map an empty file
+        self.position = 0
+
+    def close(self) -> None:
+        self.data.close()
+        self._file.close()
+
+    def line_offset(self, line_number: int) -> int:
+        """Byte offset where a 1-based line starts (file size past the end)"""
+        if not self.size:
+            return 0
+        return get_line_index(self.file_path, self.stats, self.data).offset_of_line(self.data, line_number)
+
+    @property
+    def total_lines(self) -> int:
+        if not self.size:
+            return 0
+        return get_line_index(self.file_path, self.stats, self.data).total_lines
+
+    def read(self, start: int, end: int) -> bytes:
+        return self.data[start:end] if self.size else b""
+
+    def copy_to(self, writer: _HashingWriter, end: int) -> None:
+        """Copy unchanged bytes from the current position up to end"""
+        for start in range(self.position, end, COPY_CHUNK):
+            writer.write(self.data[start:min(start + COPY_CHUNK, end)])
+        self.position = max(self.position, end)
+
+    def readline(self) -> bytes:
+        self.data.seek(self.position)
+        line = self.data.readline()
+        self.position += len(line)
+        return line
+
+def _common_prefix(first: bytes, second: bytes) -> int:
+    """Length of the common prefix, by binary search over slice comparisons (memcmp)"""
+    low, high = 0, min(len(first), len(second))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first[:middle] == second[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def _changed_span(old: bytes, new: bytes) -> Tuple[int, int]:
+    """(bytes removed, bytes inserted) once the common prefix and suffix are dropped"""
+    prefix = _common_prefix(old, new)
+    suffix = _common_prefix(old[prefix:][::-1], new[prefix:][::-1])
+    return len(old) - prefix - suffix, len(new) - prefix - suffix
+
+def check_precondition(file_path: str, stats: os.stat_result, expected_mtime: Optional[float],
+                       expected_sha256: Optional[str]) -> None:
+    """Raise EditConflict unless the file still matches what the caller last saw"""
+    if expected_mtime is not None and abs(stats.st_mtime - expected_mtime) > 1e-6:
+        raise EditConflict(f"File modified since mtime {expected_mtime} (now {stats.st_mtime})")
+    if expected_sha256 is not None and file_sha256(file_path) != expected_sha256.lower():
+        raise EditConflict("File content does not match expected_sha256")
+
+def apply_edit(file_path: str, operation: str, diff: Optional[str] = None,
+               start_line: Optional[int] = None, end_line: Optional[int] = None,
+               content: Optional[str] = None, expected_mtime: Optional[float] = None,
+               expected_sha256: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Apply one edit by streaming the file into a temp file and renaming it over the original
+
+    Args:
+        file_path: File to edit
+        operation: "patch", "replace_lines" or "append"
+        diff: Unified diff for "patch"
+        start_line: First 1-based line replaced by "replace_lines"; at most the
+            line count + 1, which appends
+        end_line: Last line replaced (inclusive, at most the line count);
+            start_line - 1 inserts before start_line
+        content: Replacement text for "replace_lines" or text for "append"
+        expected_mtime: Refuse the edit unless the file's mtime still matches
+        expected_sha256: Refuse the edit unless the file's SHA-256 still matches
+
+    Returns:
+        Dictionary with bytes removed/inserted and the new size, mtime and SHA-256
+    """
+    stats = os.stat(file_path)
+    check_precondition(file_path, stats, expected_mtime, expected_sha256)
+
+    removed = inserted = 0
+    hunks_applied = 0
+    source = _Source(file_path, stats)
+    try:
+        with atomic_writer(file_path) as writer:
+            if operation == "append":
+                text = (content or "").encode("utf-8")
+                source.copy_to(writer, source.size)
+                writer.write(text)
+                inserted = len(text)
+
+            elif operation == "replace_lines":
+                if start_line is None or start_line < 1:
+                    raise EditError("replace_lines needs start_line >= 1")
+                total_lines = source.total_lines
+                if start_line > total_lines + 1:
+                    raise EditError(f"start_line {start_line} is past the end of the file ({total_lines} lines)")
+                if end_line is None:
+                    end_line = min(start_line, total_lines)  # start_line = total + 1 appends
+                if end_line < start_line - 1:
+                    raise EditError("end_line must be >= start_line - 1")
+                if end_line > total_lines:
+                    raise EditError(f"end_line {end_line} is past the end of the file ({total_lines} lines)")
+                start = source.line_offset(start_line)
+                end = source.line_offset(end_line + 1)
+                text = (content or "").encode("utf-8")
+                if text and not text.endswith(b"\n") and end < source.size:
+                    text += b"\n"  # Keep the following line on its own line
+                source.copy_to(writer, start)
+                writer.write(text)
+                removed, inserted = _changed_span(source.read(start, end), text)
+                source.position = end
+                source.copy_to(writer, source.size)
+
+            elif operation == "patch":
+                line_number = 1
+                for old_start, old_count, body in parse_unified_diff(diff or ""):
+                    first = old_start if old_count else old_start + 1  # "-N,0" inserts after line N
+                    if first < line_number:
+                        raise EditError(f"Hunk at line {old_start} overlaps the previous hunk")
+                    source.copy_to(writer, source.line_offset(first))
+                    line_number = first
+                    for tag, text in body:
+                        if tag == b"+":
+                            writer.write(text)
+                            inserted += len(text)
+                            continue
+                        line = source.readline()
+                        if line != text:
+                            raise EditError(f"Hunk at line {old_start} does not match line {line_number}: "
+                                            f"expected {text[:60]!r}, found {line[:60]!r}")
+                        line_number += 1
+                        if tag == b" ":
+                            writer.write(line)
+                        else:
+                            removed += len(line)
+                    hunks_applied += 1
+                source.copy_to(writer, source.size)
+
+            else:
+                raise EditError(f"Unknown operation: {operation} (use patch, replace_lines or append)")
+
+            # Narrow the window for a concurrent writer slipping in during the copy
+            current = os.stat(file_path)
+            if (current.st_mtime_ns, current.st_size) != (stats.st_mtime_ns, stats.st_size):
+                raise EditConflict("File changed while the edit was being applied")
+    finally:
+        source.close()
+
+    new_stats = os.stat(file_path)
+    result = {
+        "success": True,
+        "file_path": file_path,
+        "operation": operation,
+        "bytes_removed": removed,
+        "bytes_inserted": inserted,
+        "file_size": writer.size,
+        "previous_size": stats.st_size,
+        "mtime": new_stats.st_mtime,
+        "sha256": writer.sha256.hexdigest()
+    }
+    if operation == "patch":
+        result["hunks_applied"] = hunks_applied
+    return result
@@ -2,25 +2,52 @@
 
 import os
 import json
-import pandas as pd
-from typing import Any, Dict, List
+import math
+import mmap
+import heapq
+import fnmatch
+import threading
+from typing import Any, Dict, List, Optional
 from utils.logging import get_logger
 from utils.validators import validate_file_path
+from utils.cursors import encode_cursor, decode_cursor
+from utils.line_index import get_line_index
+from utils.result_cache import get_result_cache
+from utils.serialization import to_json
+from utils.process_pool import WorkerTimeout, run_in_process
+from tools.csv_profiler import profile_csv
+from tools.file_edit import EditConflict, EditError, apply_edit, atomic_writer
 from config.settings import get_settings
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Response bytes reserved for everything in a read_file page except the content
+PAGE_ENVELOPE_BYTES = 4096
+
 class FileTools:
     """File operation tools for MCP server"""
     
     @staticmethod
-    def read_text_file(file_path: str) -> Dict[str, Any]:
+    def read_text_file(file_path: str, start_line: Optional[int] = None,
+                       max_lines: Optional[int] = None, byte_offset: Optional[int] = None,
+                       max_bytes: Optional[int] = None, tail_lines: Optional[int] = None,
+                       cursor: Optional[str] = None) -> Dict[str, Any]:
         """
-        Read content from a text file
+        Read content from a text file, one bounded page at a time
+        
+        Files are memory-mapped, so only the requested range is touched.
+        Line-based reads use a cached line-offset index, and pages that do
+        not reach EOF return a next_cursor to continue from.
         
         Args:
             file_path: Path to the text file
+            start_line: 1-based line to start reading from
+            max_lines: Maximum number of lines to return
+            byte_offset: Byte offset to start reading from
+            max_bytes: Maximum bytes to return (capped by max_file_size and the response budget)
+            tail_lines: Return only the last N lines of the file
+            cursor: next_cursor from a previous page
             
         Returns:
             Dictionary with file content and metadata
@@ -30,31 +57,160 @@ class FileTools:
             if not is_valid:
                 return {"success": False, "error": error}
             
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                
             file_stats = os.stat(file_path)
+            file_size = file_stats.st_size
+            content_budget = FileTools._content_budget()
+            page_bytes = min(max_bytes or settings.max_file_size, settings.max_file_size, content_budget)
             
-            return {
-                "success": True,
-                "content": content,
-                "file_size": file_stats.st_size,
-                "lines": len(content.splitlines()),
-                "file_path": file_path
-            }
+            if cursor:
+                state = decode_cursor(cursor)
+                if state.get("path") != os.path.abspath(file_path):
+                    return {"success": False, "error": "Cursor belongs to a different file"}
+                byte_offset, start_line = state["offset"], state.get("line")
+                max_lines = max_lines or state.get("max_lines")
+            
+            if file_size == 0:
+                return FileTools._text_page(file_path, file_stats, "", 0, 0, 1, None)
+            
+            with open(file_path, 'rb') as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                total_lines = None
+                
+                if tail_lines is not None:
+                    start = FileTools._tail_offset(mm, file_size, tail_lines)
+                    start = max(start, file_size - page_bytes)
+                    end = file_size
+                    line = None
+                elif byte_offset is not None and not cursor:
+                    start = min(max(byte_offset, 0), file_size)
+                    line = 1 if start == 0 else None
+                    end = FileTools._page_end(mm, start, file_size, page_bytes, max_lines)
+                elif start_line is not None and not cursor:
+                    index = get_line_index(file_path, file_stats, mm)
+                    total_lines = index.total_lines
+                    line = max(start_line, 1)
+                    start = index.offset_of_line(mm, line)
+                    if max_lines is not None:
+                        end = index.offset_of_line(mm, line + max_lines)
+                        end = FileTools._page_end(mm, start, end, page_bytes, None)
+                    else:
+                        end = FileTools._page_end(mm, start, file_size, page_bytes, None)
+                else:
+                    start = min(byte_offset or 0, file_size)
+                    line = start_line if cursor else 1
+                    end = FileTools._page_end(mm, start, file_size, page_bytes, max_lines)
+                
+                content = mm[start:end].decode('utf-8', errors='replace')
+                # Escaping can grow the text past the budget; shrink the page until it fits
+                while end - start > 1 and FileTools._encoded_size(content) > content_budget:
+                    page_bytes = (end - start) // 2
+                    if tail_lines is not None:
+                        start = end - page_bytes
+                        newline = mm.find(b"\n", start, end - 1)
+                        start = newline + 1 if newline != -1 else start
+                    else:
+                        end = FileTools._page_end(mm, start, end, page_bytes, None)
+                    content = mm[start:end].decode('utf-8', errors='replace')
+            
+            result = FileTools._text_page(file_path, file_stats, content, start, end, line, max_lines)
+            if total_lines is not None:
+                result["total_lines"] = total_lines
+            return result
             
         except Exception as e:
             logger.error(f"Error reading text file {file_path}: {str(e)}")
             return {"success": False, "error": str(e)}
     
     @staticmethod
-    def read_csv_file(file_path: str, max_rows: int = 1000) -> Dict[str, Any]:
+    def _content_budget() -> int:
+        """Largest page whose JSON still fits the response budget alongside the page metadata"""
+        return max(settings.response_max_bytes - PAGE_ENVELOPE_BYTES, 1024)
+    
+    @staticmethod
+    def _encoded_size(content: str) -> int:
+        """Bytes the content takes once JSON-escaped"""
+        return len(to_json(content, compact=True).encode("utf-8"))
+    
+    @staticmethod
+    def _page_end(mm: mmap.mmap, start: int, limit: int, page_bytes: int,
+                  max_lines: Optional[int]) -> int:
+        """End offset of a page, cut back to a line boundary when truncated"""
+        end = min(limit, start + page_bytes)
+        if max_lines is not None:
+            offset = start
+            for _ in range(max_lines):
+                newline = mm.find(b"\n", offset, end)
+                if newline == -1:
+                    offset = end
+                    break
+                offset = newline + 1
+            end = offset
+        if end < limit and end < len(mm) and mm[end - 1:end] != b"\n":
+            newline = mm.rfind(b"\n", start, end)
+            if newline != -1:
+                end = newline + 1
+        return end
+    
+    @staticmethod
+    def _tail_offset(mm: mmap.mmap, file_size: int, tail_lines: int) -> int:
+        """Scan backwards from EOF to where the last N lines start"""
+        if tail_lines <= 0:
+            return file_size
+        end = file_size - 1 if mm[file_size - 1:file_size] == b"\n" else file_size
+        for _ in range(tail_lines):
+            newline = mm.rfind(b"\n", 0, end)
+            if newline == -1:
+                return 0
+            end = newline
+        return end + 1
+    
+    @staticmethod
+    def _text_page(file_path: str, file_stats: os.stat_result, content: str, start: int,
+                   end: int, line: Optional[int], max_lines: Optional[int]) -> Dict[str, Any]:
+        """Build the response for one page of a text file"""
+        eof = end >= file_stats.st_size
+        # Only "\n" counts, as in the line index (str.splitlines also splits on \f, \r, \u2028, ...);
+        # a UTF-8 newline byte always decodes to one "\n", so this matches mm[start:end].count(b"\n")
+        newlines = content.count("\n")
+        result = {
+            "success": True,
+            "content": content,
+            "file_size": file_stats.st_size,
+            "mtime": file_stats.st_mtime,
+            "lines": newlines + (1 if content and not content.endswith("\n") else 0),
+            "file_path": file_path,
+            "start_byte": start,
+            "end_byte": end,
+            "start_line": line,
+            "eof": eof
+        }
+        if not eof:
+            # A page cut inside an over-long line resumes on that same line
+            next_line = line + newlines if line is not None else None
+            result["next_cursor"] = encode_cursor({
+                "path": os.path.abspath(file_path),
+                "offset": end,
+                "line": next_line,
+                "max_lines": max_lines
+            })
+        return result
+    
+    @staticmethod
+    def read_csv_file(file_path: str, max_rows: int = 1000, profile: bool = False,
+                      cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
         """
         Read and analyze CSV file
         
+        Parsing runs on the CPU worker processes, so it does not hold the
+        server's GIL. Previews are stopped after settings.api_timeout and
+        profiles after settings.csv_profile_timeout (by default only when
+        the caller cancels).
+        
         Args:
             file_path: Path to CSV file
-            max_rows: Maximum rows to read
+            max_rows: Maximum rows to read (preview mode only)
+            profile: Stream the whole file and compute per-column statistics
+            cancel_event: Set when the caller gives up; the worker is killed
             
         Returns:
             Dictionary with CSV data and analysis
@@ -64,27 +220,52 @@ class FileTools:
             if not is_valid:
                 return {"success": False, "error": error}
             
-            # Read CSV with pandas
-            df = pd.read_csv(file_path, nrows=max_rows)
-            
-            return {
-                "success": True,
-                "rows": len(df),
-                "columns": len(df.columns),
-                "column_names": df.columns.tolist(),
-                "data_types": df.dtypes.to_dict(),
-                "sample_data": df.head().to_dict('records'),
-                "file_path": file_path
-            }
+            return get_result_cache().get_or_compute(
+                "read_csv_file", file_path, {"max_rows": max_rows, "profile": profile},
+                lambda: run_in_process(FileTools._analyze_csv, file_path, max_rows, profile,
+                                       timeout=FileTools._csv_deadline(profile), cancel_event=cancel_event)
+            )
             
+        except WorkerTimeout as e:
+            logger.warning(f"Gave up reading CSV file {file_path}: {str(e)}")
+            return {"success": False, "error": str(e), "timed_out": True}
         except Exception as e:
             logger.error(f"Error reading CSV file {file_path}: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    @staticmethod
+    def _csv_deadline(profile: bool) -> float:
+        """Previews get api_timeout; whole-file profiles get csv_profile_timeout (0: only cancellation stops them)"""
+        if not profile:
+            return float(settings.api_timeout)
+        return float(settings.csv_profile_timeout) or math.inf
+    
+    @staticmethod
+    def _analyze_csv(file_path: str, max_rows: int, profile: bool) -> Dict[str, Any]:
+        """Parse the CSV and build the analysis (uncached; runs in a worker process)"""
+        if profile:
+            return profile_csv(file_path)
+        
+        import pandas as pd  # Deferred: pandas dominates server import time
+        
+        # Read CSV with pandas
+        df = pd.read_csv(file_path, nrows=max_rows)
+        
+        # Plain Python values only, so nothing pandas-specific is pickled back
+        return {
+            "success": True,
+            "rows": len(df),
+            "columns": len(df.columns),
+            "column_names": [str(name) for name in df.columns],
+            "data_types": {str(name): str(dtype) for name, dtype in df.dtypes.items()},
+            "sample_data": json.loads(df.head().to_json(orient="records", date_format="iso")),
+            "file_path": file_path
+        }
+    
     @staticmethod
     def write_text_file(file_path: str, content: str) -> Dict[str, Any]:
         """
-        Write content to a text file
+        Write content to a text file (atomically: temp file, then rename)
         
         Args:
             file_path: Path to write the file
@@ -97,14 +278,16 @@ class FileTools:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(content)
+            with atomic_writer(file_path) as writer:
+                writer.write(content.encode('utf-8'))
             
             logger.info(f"Successfully wrote file: {file_path}")
             return {
                 "success": True,
                 "message": f"File written successfully: {file_path}",
-                "bytes_written": len(content.encode('utf-8'))
+                "bytes_written": writer.size,
+                "mtime": os.stat(file_path).st_mtime,
+                "sha256": writer.sha256.hexdigest()
             }
             
         except Exception as e:
@@ -112,12 +295,70 @@ class FileTools:
             return {"success": False, "error": str(e)}
     
     @staticmethod
-    def list_directory(directory_path: str) -> Dict[str, Any]:
+    def edit_text_file(file_path: str, operation: str, diff: Optional[str] = None,
+                       start_line: Optional[int] = None, end_line: Optional[int] = None,
+                       content: Optional[str] = None, expected_mtime: Optional[float] = None,
+                       expected_sha256: Optional[str] = None) -> Dict[str, Any]:
         """
-        List contents of a directory
+        Edit a text file in place without resending it
+        
+        The file is streamed through a temp file and renamed over the
+        original, so a failed edit leaves it untouched. Pass the mtime or
+        sha256 from a previous read/edit to refuse the edit if the file has
+        changed since.
+        
+        Args:
+            file_path: Path to the file
+            operation: "patch" (unified diff), "replace_lines" or "append"
+            diff: Unified diff for "patch"
+            start_line: First line to replace (1-based)
+            end_line: Last line to replace, inclusive (start_line - 1 inserts)
+            content: Replacement or appended text
+            expected_mtime: mtime the file must still have
+            expected_sha256: SHA-256 the file must still have
+            
+        Returns:
+            Dictionary with bytes removed/inserted and the new mtime and sha256
+        """
+        try:
+            is_valid, error = validate_file_path(file_path)
+            if not is_valid:
+                return {"success": False, "error": error}
+            if content is not None and len(content) > settings.max_file_size:
+                return {"success": False, "error": f"Content exceeds max_file_size ({settings.max_file_size} bytes)"}
+            
+            result = apply_edit(file_path, operation, diff, start_line, end_line, content,
+                                expected_mtime, expected_sha256)
+            logger.info(f"Edited {file_path} ({operation}): -{result['bytes_removed']} +{result['bytes_inserted']} bytes")
+            return result
+            
+        except EditConflict as e:
+            return {"success": False, "error": str(e), "conflict": True}
+        except EditError as e:
+            return {"success": False, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Error editing file {file_path}: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    def list_directory(directory_path: str, sort_by: str = "name", descending: bool = False,
+                       pattern: Optional[str] = None, entry_type: Optional[str] = None,
+                       limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        List contents of a directory, one sorted and filtered page at a time
+        
+        Built on os.scandir: entry types come from the directory listing
+        itself, and entries are only stat'ed when sorting by size/mtime or
+        when they land on the returned page.
         
         Args:
             directory_path: Path to directory
+            sort_by: "name", "size" or "mtime"
+            descending: Reverse the sort order
+            pattern: Glob pattern entry names must match, e.g. "*.py"
+            entry_type: Only return "file" or "directory" entries
+            limit: Maximum entries per page (default: settings.directory_page_size)
+            cursor: next_cursor from the previous page
             
         Returns:
             Dictionary with directory contents
@@ -129,25 +370,92 @@ class FileTools:
             if not os.path.isdir(directory_path):
                 return {"success": False, "error": "Path is not a directory"}
             
+            if sort_by not in ("name", "size", "mtime"):
+                return {"success": False, "error": "sort_by must be 'name', 'size' or 'mtime'"}
+            if entry_type not in (None, "file", "directory"):
+                return {"success": False, "error": "entry_type must be 'file' or 'directory'"}
+            limit = min(limit or settings.directory_page_size, settings.directory_max_page_size)
+            
+            after = None
+            if cursor:
+                state = decode_cursor(cursor)
+                expected = [os.path.abspath(directory_path), sort_by, descending, pattern, entry_type]
+                if state.get("query") != expected:
+                    return {"success": False, "error": "Cursor belongs to a different listing"}
+                after = tuple(state["after"])
+            
+            # Sort keys are (key, name) so entries with equal sizes/mtimes still page stably
+            def sort_key(entry: os.DirEntry) -> tuple:
+                if sort_by == "name":
+                    return (entry.name, entry.name)
+                stats = FileTools._entry_stat(entry)
+                value = stats.st_size if sort_by == "size" else stats.st_mtime_ns
+                return (value, entry.name)
+            
+            matching = []
+            with os.scandir(directory_path) as entries:
+                for entry in entries:
+                    if pattern and not fnmatch.fnmatch(entry.name, pattern):
+                        continue
+                    if entry_type:
+                        is_dir = FileTools._entry_is_dir(entry)
+                        if is_dir != (entry_type == "directory"):
+                            continue
+                    matching.append(entry)
+            
+            keyed = [(sort_key(entry), entry) for entry in matching]
+            if after is not None:
+                if descending:
+                    keyed = [item for item in keyed if item[0] < after]
+                else:
+                    keyed = [item for item in keyed if item[0] > after]
+            select = heapq.nlargest if descending else heapq.nsmallest
+            page = select(limit + 1, keyed, key=lambda item: item[0])
+            has_more = len(page) > limit
+            page = page[:limit]
+            
             items = []
-            for item in os.listdir(directory_path):
-                item_path = os.path.join(directory_path, item)
-                item_stats = os.stat(item_path)
-                
+            for _, entry in page:
+                stats = FileTools._entry_stat(entry)
                 items.append({
-                    "name": item,
-                    "type": "directory" if os.path.isdir(item_path) else "file",
-                    "size": item_stats.st_size,
-                    "modified": item_stats.st_mtime
+                    "name": entry.name,
+                    "type": "directory" if FileTools._entry_is_dir(entry) else "file",
+                    "size": stats.st_size,
+                    "modified": stats.st_mtime
+                })
+            
+            next_cursor = None
+            if has_more:
+                next_cursor = encode_cursor({
+                    "query": [os.path.abspath(directory_path), sort_by, descending, pattern, entry_type],
+                    "after": list(page[-1][0])
                 })
             
             return {
                 "success": True,
                 "directory": directory_path,
                 "items": items,
-                "total_items": len(items)
+                "total_items": len(matching),
+                "returned": len(items),
+                "next_cursor": next_cursor
             }
             
         except Exception as e:
             logger.error(f"Error listing directory {directory_path}: {str(e)}")
             return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    def _entry_is_dir(entry: os.DirEntry) -> bool:
+        """Directory check from cached d_type data; broken symlinks count as files"""
+        try:
+            return entry.is_dir()
+        except OSError:
+            return False
+    
+    @staticmethod
+    def _entry_stat(entry: os.DirEntry) -> os.stat_result:
+        """Stat an entry (cached on the DirEntry), falling back to the link itself"""
+        try:
+            return entry.stat()
+        except OSError:
+            return entry.stat(follow_symlinks=False)
@@ -0,0 +1,213 @@
+"""Near-duplicate note detection with MinHash signatures and LSH buckets"""
+
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from utils.logging import get_logger
+from utils.sketches import MinHash
+from utils.sqlite_pool import SQLitePool
+
+logger = get_logger(__name__)
+
+# 16 bands of 4 rows: pairs above 0.7 similarity share a bucket about 99% of the time
+NUM_PERM = 64
+BANDS = 16
+
+# Shingle length in bytes; short enough to tolerate typos in quick captures
+SHINGLE_SIZE = 5
+
+# Buckets larger than this are compared against their first member only
+MAX_BUCKET_PAIRS = 32
+
+def note_shingles(notes: Iterable[Tuple[str, Optional[str]]]):
+    """
+    32-bit hashes of the byte shingles of each note's normalised text
+
+    All notes are packed into one buffer so the windows are hashed in a
+    single vectorised pass.
+    Returns:
+        (hashes, starts): concatenated hashes and the offset of each note's
+        run; every note gets at least one shingle
+    """
+    import numpy as np
+
+    # str.split() collapses the same (Unicode) whitespace as \s+, without a regex per note
+    texts = [" ".join(f"{title or ''} {content or ''}".lower().split()).encode("utf-8")
+             for title, content in notes]
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    buffer = np.frombuffer(b"".join(texts) + bytes(SHINGLE_SIZE), dtype=np.uint8).astype(np.uint64)
+    windows = np.zeros(len(buffer) - SHINGLE_SIZE + 1, dtype=np.uint64)
+    for offset in range(SHINGLE_SIZE):  # Pack each window's bytes into one integer
+        windows |= buffer[offset:offset + len(windows)] << np.uint64(8 * offset)
+
+    # Keep windows that start inside a note and do not run past its end
+    counts = np.maximum(lengths - SHINGLE_SIZE + 1, 1)
+    text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    positions = np.repeat(text_starts - starts, counts) + np.arange(int(counts.sum()))
+    kept = windows[positions]
+    short = lengths < SHINGLE_SIZE  # Mask off bytes of the following note
+    if short.any():
+        masks = (np.uint64(1) << (lengths[short] * 8).astype(np.uint64)) - np.uint64(1)
+        kept[starts[short]] &= masks
+    with np.errstate(over="ignore"):  # Fibonacci hashing down to 32 bits
+        return (kept * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32), starts
+
+class NoteDuplicateIndex:
+    """
+    MinHash signatures and LSH bucket keys kept in a side table
+
+    note_minhash holds one row per note: its signature and the bucket key
+    of each band. Finding duplicates groups equal keys band by band with
+    one vectorised sort each, so candidates come from shared buckets in
+    O(n log n) instead of comparing every pair, and are then confirmed by
+    comparing signatures. One row per note (rather than one per band)
+    keeps inserts cheap. Triggers drop a note's row when it is deleted or
+    edited; sync() fills in whatever is missing.
+    """
+
+    def __init__(self, pool: SQLitePool):
+        self.pool = pool
+        self._minhash: Optional[MinHash] = None
+        self._lock = threading.Lock()
+
+    @property
+    def minhash(self) -> MinHash:
+        if self._minhash is None:
+            self._minhash = MinHash(NUM_PERM)  # Deferred: keeps numpy out of server startup
+        return self._minhash
+
+    def ensure_schema(self, cursor: sqlite3.Cursor) -> None:
+        """Create the side tables and the triggers that invalidate them"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS note_minhash (
+                note_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL,
+                buckets BLOB NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS note_minhash_delete AFTER DELETE ON notes BEGIN
+                DELETE FROM note_minhash WHERE note_id = old.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS note_minhash_update AFTER UPDATE OF title, content ON notes BEGIN
+                DELETE FROM note_minhash WHERE note_id = old.id;
+            END
+        """)
+
+    def _store(self, conn: sqlite3.Connection, notes: Iterable[Tuple[int, str, Optional[str]]]) -> int:
+        """Compute and write signatures and bucket keys for (id, title, content) triples"""
+        notes = list(notes)
+        if not notes:
+            return 0
+        note_ids = [note[0] for note in notes]
+        hashes, starts = note_shingles((title, content) for _, title, content in notes)
+        signatures = self.minhash.signatures(hashes, starts)
+        keys = MinHash.band_keys(signatures, BANDS)
+        conn.executemany(
+            "INSERT OR REPLACE INTO note_minhash (note_id, signature, buckets) VALUES (?, ?, ?)",
+            [(note_id, signature.tobytes(), row.tobytes())
+             for note_id, signature, row in zip(note_ids, signatures, keys)]
+        )
+        return len(notes)
+
+    def note_added(self, conn: sqlite3.Connection, note_id: int, title: str, content: Optional[str]) -> None:
+        """Index a freshly inserted note inside the caller's transaction, so both commit together"""
+        self._store(conn, [(note_id, title, content)])
+
+    def index_since(self, conn: sqlite3.Connection, after_id: int = 0) -> int:
+        """
+        Index notes with id > after_id that have no signature yet
+
+        Runs inside the caller's transaction, so a batch of inserted notes
+        and their signatures are committed together.
+        Returns:
+            Number of notes indexed
+        """
+        rows = conn.execute("""
+            SELECT id, title, content FROM notes
+            WHERE id > ? AND NOT EXISTS (SELECT 1 FROM note_minhash WHERE note_id = notes.id)
+            ORDER BY id
+        """, (after_id,)).fetchall()
+        return self._store(conn, [tuple(row) for row in rows])
+
+    def sync(self) -> int:
+        """Index every note that has no signature yet (new, edited or pre-existing notes)"""
+        conn = self.pool.connection()
+        with self._lock:
+            with conn:
+                indexed = self.index_since(conn)
+        if indexed:
+            logger.debug(f"Indexed {indexed} notes for duplicate detection")
+        return indexed
+
+    @staticmethod
+    def _candidate_pairs(keys) -> set:
+        """Pairs of row positions that share a bucket in at least one band"""
+        import numpy as np
+
+        pairs = set()
+        for band in range(keys.shape[1]):
+            order = np.argsort(keys[:, band], kind="stable")
+            sorted_keys = keys[order, band]
+            # Start of every run of equal keys, and its length
+            starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+            lengths = np.diff(np.append(starts, len(sorted_keys)))
+            for start, length in zip(starts[lengths > 1].tolist(), lengths[lengths > 1].tolist()):
+                members = order[start:start + length].tolist()
+                if length > MAX_BUCKET_PAIRS:
+                    pairs.update((members[0], other) for other in members[1:])
+                    continue
+                pairs.update((first, second) for i, first in enumerate(members) for second in members[i + 1:])
+        return pairs
+
+    def clusters(self, threshold: float) -> List[Dict[str, Any]]:
+        """
+        Group notes whose estimated Jaccard similarity is at least threshold
+
+        Returns:
+            Clusters as {"note_ids", "min_similarity", "max_similarity"},
+            largest first
+        """
+        import numpy as np
+
+        self.sync()
+        rows = self.pool.connection().execute(
+            "SELECT note_id, signature, buckets FROM note_minhash ORDER BY note_id"
+        ).fetchall()
+        if len(rows) < 2:
+            return []
+        note_ids = [row[0] for row in rows]
+        signatures = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.uint32).reshape(len(rows), -1)
+        keys = np.frombuffer(b"".join(row[2] for row in rows), dtype=np.int64).reshape(len(rows), -1)
+
+        parent = list(range(len(rows)))
+
+        def find(row: int) -> int:
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+
+        edges = []
+        for first, second in self._candidate_pairs(keys):
+            similarity = MinHash.similarity(signatures[first], signatures[second])
+            if similarity >= threshold:
+                edges.append((first, second, similarity))
+                parent[find(first)] = find(second)
+
+        groups: Dict[int, Dict[str, Any]] = {}
+        for first, second, similarity in edges:
+            group = groups.setdefault(find(first), {"note_ids": set(), "similarities": []})
+            group["note_ids"].update((note_ids[first], note_ids[second]))
+            group["similarities"].append(similarity)
+
+        clusters = [{
+            "note_ids": sorted(group["note_ids"]),
+            "min_similarity": round(min(group["similarities"]), 3),
+            "max_similarity": round(max(group["similarities"]), 3)
+        } for group in groups.values()]
+        clusters.sort(key=lambda cluster: (-len(cluster["note_ids"]), cluster["note_ids"][0]))
+        return clusters
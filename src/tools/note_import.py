@@ -0,0 +1,125 @@
+"""Parsers for bulk note import sources"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, Tuple, Union
+
+# Each parsed entry is (source label, note dict) or (source label, error message)
+ParsedNote = Tuple[str, Union[Dict[str, Any], str]]
+
+# SQLite's CURRENT_TIMESTAMP format; created_at only sorts correctly if every row uses it
+SQLITE_TIMESTAMP = "%Y-%m-%d %H:%M:%S"
+
+def normalize_timestamp(value: Any) -> str:
+    """
+    Convert an imported timestamp to SQLite's UTC "YYYY-MM-DD HH:MM:SS" form
+    Args:
+        value: ISO-8601 string (a trailing "Z" or offset is converted to UTC,
+            a naive value is taken as UTC) or epoch seconds
+    Returns:
+        The normalised timestamp
+    Raises:
+        ValueError: The value is not a recognisable timestamp
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid timestamp {value!r}")
+    if isinstance(value, (int, float)):
+        try:
+            parsed = datetime.fromtimestamp(value, tz=timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"Epoch timestamp out of range: {value!r}") from None
+    elif isinstance(value, str):
+        text = value.strip()
+        if text[-1:] in ("Z", "z"):
+            text = text[:-1] + "+00:00"  # fromisoformat only accepts "Z" from Python 3.11
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            raise ValueError(f"Invalid ISO-8601 timestamp {value!r}") from None
+    else:
+        raise ValueError(f"Invalid timestamp type {type(value).__name__}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime(SQLITE_TIMESTAMP)
+
+def validate_note(note: Any) -> Union[Dict[str, Any], str]:
+    """
+    Normalise one note for insertion
+    Args:
+        note: Candidate note, expected to be a dict with title and content
+    Returns:
+        Normalised note dict, or an error message if it is malformed
+    """
+    if not isinstance(note, dict):
+        return f"Expected an object, got {type(note).__name__}"
+    title = note.get("title")
+    if not isinstance(title, str) or not title.strip():
+        return "Missing or empty title"
+    content = note.get("content", "")
+    if content is not None and not isinstance(content, str):
+        return "Content must be a string"
+    created_at = note.get("created_at")
+    if created_at is not None:
+        try:
+            created_at = normalize_timestamp(created_at)
+        except ValueError as e:
+            return f"created_at: {e}"
+    return {"title": title.strip(), "content": content, "created_at": created_at}
+
+def iter_notes(notes: Iterable[Any]) -> Iterator[ParsedNote]:
+    """Label and validate notes passed directly by the client"""
+    for index, note in enumerate(notes):
+        yield f"notes[{index}]", validate_note(note)
+
+def parse_markdown_note(file_path: str) -> Union[Dict[str, Any], str]:
+    """
+    Read a Markdown file as one note
+    The first "# " heading becomes the title; otherwise the file name is used.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return str(e)
+
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if line.strip():
+            if line.startswith("# "):
+                title = line[2:].strip()
+                content = "\n".join(lines[i + 1:]).strip()
+                return validate_note({"title": title, "content": content})
+            break
+    title = os.path.splitext(os.path.basename(file_path))[0]
+    return validate_note({"title": title, "content": text.strip()})
+
+def iter_jsonl_notes(file_path: str) -> Iterator[ParsedNote]:
+    """Read one note per line from a JSON Lines file"""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                source = f"{file_path}:{line_number}"
+                try:
+                    yield source, validate_note(json.loads(line))
+                except json.JSONDecodeError as e:
+                    yield source, f"Invalid JSON: {e.msg}"
+    except (OSError, UnicodeDecodeError) as e:
+        yield file_path, str(e)
+
+def iter_directory_notes(directory: str) -> Iterator[ParsedNote]:
+    """
+    Walk a directory, yielding notes from Markdown and JSON Lines files
+    Files are visited in sorted order so imports are reproducible.
+    """
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            extension = os.path.splitext(name)[1].lower()
+            if extension == ".jsonl":
+                yield from iter_jsonl_notes(file_path)
+            elif extension in (".md", ".markdown"):
+                yield file_path, parse_markdown_note(file_path)
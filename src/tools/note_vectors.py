@@ -0,0 +1,398 @@
+"""Hashed n-gram TF-IDF vectors for related-note and similarity search"""
+
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from utils.logging import get_logger
+from utils.sqlite_pool import SQLitePool
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_TOKEN = re.compile(r"\w+")
+
+# Notes read per query while (re)building the index
+_REBUILD_BATCH = 5000
+
+def note_features(title: str, content: Optional[str], dim: int) -> Dict[int, float]:
+    """
+    Hash a note's word unigrams and bigrams into a sparse term-frequency vector
+
+    Title words are counted twice. crc32 keeps bucket numbers stable across
+    processes (Python's hash() is salted), so a persisted index stays valid.
+    Frequencies are sublinear: 1 + log(count).
+    """
+    counts: Counter = Counter()
+    for text, weight in ((title or "", 2), (content or "", 1)):
+        tokens = _TOKEN.findall(text.lower())
+        for i, token in enumerate(tokens):
+            counts[zlib.crc32(token.encode("utf-8")) % dim] += weight
+            if i:
+                counts[zlib.crc32(f"{tokens[i - 1]} {token}".encode("utf-8")) % dim] += weight
+    return {bucket: 1.0 + math.log(count) for bucket, count in counts.items()}
+
+class NoteVectorIndex:
+    """
+    Sparse TF-IDF index over notes, stored as NumPy arrays in CSR layout
+
+    Rows hold raw term frequencies; IDF weights and row norms are applied
+    at query time, so adding a note never rewrites existing rows. The
+    index is loaded lazily on first query (and synced with any notes
+    added since it was saved), then kept up to date incrementally; notes
+    that reach note_added out of id order are merged in by re-sorting the
+    rows. Triggers log deleted and edited notes to note_vector_changes, so
+    a sync removes (and re-indexes) just those rows. Whether a sync has
+    anything to do is decided from MAX(id) and the change log's sequence,
+    both index lookups, so queries do not scan the notes table. Rows
+    inserted through raw SQL with an explicit id below the last synced id
+    are picked up by rebuild().
+    """
+
+    def __init__(self, pool: SQLitePool, path: str, dim: Optional[int] = None):
+        self.pool = pool
+        self.path = path
+        self.dim = dim or settings.vector_dim
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._unsaved = 0
+
+    @staticmethod
+    def ensure_schema(cursor) -> None:
+        """Create the change log and the triggers that feed it"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS note_vector_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                note_id INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS note_vector_delete AFTER DELETE ON notes BEGIN
+                INSERT INTO note_vector_changes (note_id) VALUES (old.id);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS note_vector_update AFTER UPDATE OF title, content ON notes BEGIN
+                INSERT INTO note_vector_changes (note_id) VALUES (old.id);
+            END
+        """)
+
+    # -------- storage --------
+
+    def _reset(self) -> None:
+        import numpy as np  # Deferred: keeps numpy out of server startup
+        self.count = 0
+        self.nnz = 0
+        self.ids = np.zeros(1024, dtype=np.int64)
+        self.indptr = np.zeros(1025, dtype=np.int64)
+        self.indices = np.zeros(65536, dtype=np.int32)
+        self.values = np.zeros(65536, dtype=np.float32)
+        self.df = np.zeros(self.dim, dtype=np.int32)
+        self.synced_id = 0  # Every note up to this id has been seen by a sync
+        self.change_seq = 0  # Last note_vector_changes entry applied
+
+    @staticmethod
+    def _grow(array, needed: int):
+        """Return array with room for at least needed items (capacity doubles)"""
+        import numpy as np
+        if needed <= len(array):
+            return array
+        grown = np.zeros(max(needed, len(array) * 2), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _append(self, note_id: int, features: Dict[int, float]) -> None:
+        import numpy as np
+        self.ids = self._grow(self.ids, self.count + 1)
+        self.indptr = self._grow(self.indptr, self.count + 2)
+        self.indices = self._grow(self.indices, self.nnz + len(features))
+        self.values = self._grow(self.values, self.nnz + len(features))
+        buckets = np.fromiter(features.keys(), dtype=np.int32, count=len(features))
+        end = self.nnz + len(features)
+        self.indices[self.nnz:end] = buckets
+        self.values[self.nnz:end] = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+        self.df[buckets] += 1
+        self.ids[self.count] = note_id
+        self.count += 1
+        self.nnz = end
+        self.indptr[self.count] = end
+        self._unsaved += 1
+
+    def _sort_rows(self) -> None:
+        """Restore id order after rows were appended out of order (one vectorised gather)"""
+        import numpy as np
+        n, nnz = self.count, self.nnz
+        order = np.argsort(self.ids[:n], kind="stable")
+        if np.all(order[1:] > order[:-1]):
+            return
+        lengths = np.diff(self.indptr[:n + 1])[order]
+        starts = self.indptr[:n][order]
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        gather = np.repeat(starts - indptr[:-1], lengths) + np.arange(nnz)
+        self.indices[:nnz] = self.indices[:nnz][gather]
+        self.values[:nnz] = self.values[:nnz][gather]
+        self.ids[:n] = self.ids[:n][order]
+        self.indptr[:n + 1] = indptr
+
+    def _load(self) -> None:
+        """Load the persisted index if it matches this configuration, then sync"""
+        import numpy as np
+        self._reset()
+        if os.path.exists(self.path):
+            try:
+                with np.load(self.path) as data:
+                    if int(data["dim"]) == self.dim:
+                        self.count = len(data["ids"])
+                        self.nnz = int(data["indptr"][-1])
+                        self.ids = self._grow(data["ids"].copy(), 1024)
+                        self.indptr = self._grow(data["indptr"].copy(), 1025)
+                        self.indices = self._grow(data["indices"].copy(), 65536)
+                        self.values = self._grow(data["values"].copy(), 65536)
+                        self.df = data["df"].copy()
+                        self.synced_id = int(data["synced_id"])
+                        self.change_seq = int(data["change_seq"])
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Discarding unreadable note vector index {self.path}: {str(e)}")
+                self._reset()
+        self._loaded = True
+        self._sync()
+
+    def save(self) -> None:
+        """Write the index next to the database (atomic replace)"""
+        import numpy as np
+        with self._lock:
+            if not self._loaded or not self._unsaved:
+                return
+            tmp_path = f"{self.path}.tmp.npz"
+            np.savez(tmp_path, dim=np.int64(self.dim), ids=self.ids[:self.count],
+                     indptr=self.indptr[:self.count + 1], indices=self.indices[:self.nnz],
+                     values=self.values[:self.nnz], df=self.df,
+                     synced_id=np.int64(self.synced_id), change_seq=np.int64(self.change_seq))
+            os.replace(tmp_path, self.path)
+            self._unsaved = 0
+            # Applied changes are now durable; an index saved by another process that
+            # still needed them sees the gap and rebuilds
+            conn = self.pool.connection()
+            with conn:
+                conn.execute("DELETE FROM note_vector_changes WHERE seq <= ?", (self.change_seq,))
+
+    def close(self) -> None:
+        """Persist pending additions"""
+        try:
+            self.save()
+        except OSError as e:
+            logger.warning(f"Could not save note vector index: {str(e)}")
+
+    # -------- updates --------
+
+    @staticmethod
+    def _watermark(conn) -> Tuple[int, int]:
+        """(highest note id, last change log sequence); both are index lookups"""
+        row = conn.execute("""
+            SELECT (SELECT COALESCE(MAX(id), 0) FROM notes),
+                   (SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'note_vector_changes')
+        """).fetchone()
+        return row[0], row[1]
+
+    def _sync(self) -> None:
+        """Apply logged deletes and edits, then index notes added since the last sync"""
+        conn = self.pool.connection()
+        max_id, change_seq = self._watermark(conn)
+        if max_id == self.synced_id and change_seq == self.change_seq:
+            return
+        changed = 0
+        if change_seq != self.change_seq:
+            note_ids = [row[0] for row in conn.execute(
+                "SELECT note_id FROM note_vector_changes WHERE seq > ? AND seq <= ? ORDER BY seq",
+                (self.change_seq, change_seq)
+            )]
+            if change_seq < self.change_seq or len(note_ids) != change_seq - self.change_seq:
+                logger.info("Note change log no longer covers the vector index; rebuilding")
+                self._rebuild(conn)
+                return
+            changed = self._apply_changes(conn, sorted(set(note_ids)))
+            self.change_seq = change_seq
+        added = self._index_from(conn, self.synced_id)
+        self.synced_id = max(self.synced_id, max_id)
+        if added or changed:
+            logger.debug(f"Indexed {added} new and {changed} changed notes for similarity search")
+        if self._unsaved >= settings.vector_save_every:
+            self.save()
+
+    def _rebuild(self, conn) -> None:
+        """Index every note from scratch"""
+        max_id, change_seq = self._watermark(conn)
+        self._reset()
+        self._index_from(conn, 0)
+        self.synced_id = max(max_id, int(self.ids[self.count - 1]) if self.count else 0)
+        self.change_seq = change_seq
+        self._unsaved = max(self._unsaved, 1)
+
+    def _remove(self, note_ids: List[int]) -> int:
+        """Drop the rows of these notes (where indexed) and their document frequencies"""
+        import numpy as np
+        n, nnz = self.count, self.nnz
+        wanted = np.asarray(note_ids, dtype=np.int64)
+        rows = np.searchsorted(self.ids[:n], wanted)
+        inside = rows < n
+        rows = rows[inside][self.ids[rows[inside]] == wanted[inside]]
+        if not len(rows):
+            return 0
+        keep = np.ones(n, dtype=bool)
+        keep[rows] = False
+        lengths = np.diff(self.indptr[:n + 1])
+        keep_values = np.repeat(keep, lengths)
+        self.df -= np.bincount(self.indices[:nnz][~keep_values], minlength=self.dim).astype(self.df.dtype)
+        kept_nnz = int(keep_values.sum())
+        self.indices[:kept_nnz] = self.indices[:nnz][keep_values]
+        self.values[:kept_nnz] = self.values[:nnz][keep_values]
+        self.ids[:n - len(rows)] = self.ids[:n][keep]
+        self.indptr[1:n - len(rows) + 1] = np.cumsum(lengths[keep])
+        self.count -= len(rows)
+        self.nnz = kept_nnz
+        self._unsaved += len(rows)
+        return len(rows)
+
+    def _apply_changes(self, conn, note_ids: List[int]) -> int:
+        """Remove deleted or edited notes, then re-index the edited ones already synced"""
+        self._remove(note_ids)
+        edited = [note_id for note_id in note_ids if note_id <= self.synced_id]
+        added = 0
+        for start in range(0, len(edited), 500):  # Stay under SQLite's bound-variable limit
+            chunk = edited[start:start + 500]
+            for row in conn.execute(
+                f"SELECT id, title, content FROM notes WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ):
+                self._append(row[0], note_features(row[1], row[2], self.dim))
+                added += 1
+        if added:
+            self._sort_rows()
+        return len(note_ids)
+
+    def _index_from(self, conn, last_id: int) -> int:
+        """Append every note with id > last_id not indexed yet (note_added may have got there first)"""
+        import numpy as np
+        first = int(np.searchsorted(self.ids[:self.count], last_id, side="right"))
+        present = set(self.ids[first:self.count].tolist())
+        added = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, title, content FROM notes WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, _REBUILD_BATCH)
+            ).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                if row[0] not in present:
+                    self._append(row[0], note_features(row[1], row[2], self.dim))
+                    added += 1
+            last_id = rows[-1][0]
+        if present and added:
+            self._sort_rows()
+        return added
+
+    def note_added(self, note_id: int, title: str, content: Optional[str]) -> None:
+        """Index a freshly inserted note (no-op until the index has been loaded)"""
+        import numpy as np
+        with self._lock:
+            if not self._loaded:
+                return  # Picked up by the sync on first load
+            out_of_order = bool(self.count) and note_id <= self.ids[self.count - 1]
+            if out_of_order:
+                row = int(np.searchsorted(self.ids[:self.count], note_id))
+                if self.ids[row] == note_id:
+                    return  # Already picked up by a sync
+            self._append(note_id, note_features(title, content, self.dim))
+            if out_of_order:
+                self._sort_rows()  # Committed after a later id, e.g. during an import
+            if self._unsaved >= settings.vector_save_every:
+                self.save()
+
+    def sync(self) -> None:
+        """Bring a loaded index up to date with the notes table"""
+        with self._lock:
+            if self._loaded:
+                self._sync()
+
+    def rebuild(self) -> int:
+        """Re-index every note from scratch; returns the number indexed"""
+        with self._lock:
+            self._loaded = True
+            self._rebuild(self.pool.connection())
+            self.save()
+            return self.count
+
+    # -------- queries --------
+
+    def _ensure_current(self) -> None:
+        if self._loaded:
+            self._sync()
+        else:
+            self._load()
+
+    def _scores(self, query_buckets, query_weights):
+        """Cosine similarity of every indexed note against a sparse query vector"""
+        import numpy as np
+        n = self.count
+        idf = (np.log((1.0 + n) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        indices = self.indices[:self.nnz]
+        weights = self.values[:self.nnz] * idf[indices]
+
+        query = np.zeros(self.dim, dtype=np.float32)
+        query[query_buckets] = query_weights * idf[query_buckets]
+        query_norm = float(np.sqrt(np.dot(query, query)))
+        if not query_norm or not n:
+            return np.zeros(n, dtype=np.float32)
+
+        starts = self.indptr[:n]
+        empty = self.indptr[1:n + 1] == starts
+        # A trailing zero keeps reduceat in bounds for empty rows at the end
+        dots = np.add.reduceat(np.append(weights * query[indices], 0), starts)
+        norms = np.sqrt(np.add.reduceat(np.append(weights * weights, 0), starts))
+        dots[empty] = 0
+        norms[empty | (norms == 0)] = 1
+        return dots / (norms * query_norm)
+
+    def _top_k(self, scores, limit: int, exclude_row: Optional[int] = None) -> List[Tuple[int, float]]:
+        import numpy as np
+        if exclude_row is not None:
+            scores[exclude_row] = -1
+        limit = min(limit, len(scores))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[row]), float(scores[row])) for row in top if scores[row] > 0]
+
+    def similar_to_text(self, text: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """(note id, score) pairs most similar to free text"""
+        import numpy as np
+        with self._lock:
+            self._ensure_current()
+            features = note_features("", text, self.dim)
+            if not features:
+                return []
+            buckets = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+            weights = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+            return self._top_k(self._scores(buckets, weights), limit)
+
+    def similar_to_note(self, note_id: int, limit: int = 5) -> Optional[List[Tuple[int, float]]]:
+        """(note id, score) pairs most similar to an existing note, or None if it is not indexed"""
+        import numpy as np
+        with self._lock:
+            self._ensure_current()
+            row = int(np.searchsorted(self.ids[:self.count], note_id))
+            if row >= self.count or self.ids[row] != note_id:
+                return None
+            start, end = self.indptr[row], self.indptr[row + 1]
+            buckets = self.indices[start:end].astype(np.int64)
+            return self._top_k(self._scores(buckets, self.values[start:end]), limit, exclude_row=row)
+
+    @property
+    def size(self) -> int:
+        """Number of indexed notes (0 until loaded)"""
+        return self.count if self._loaded else 0
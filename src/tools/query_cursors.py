@@ -0,0 +1,115 @@
+"""Server-side cursors for continuing truncated query results"""
+
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class ResultCursor:
+    """An open SELECT cursor on its own connection, plus rows already read ahead"""
+
+    def __init__(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor,
+                 columns: List[str], buffered: List[tuple], ttl: float):
+        self.conn = conn
+        self.cursor = cursor
+        self.columns = columns
+        self.buffered = buffered
+        self.ttl = ttl
+        self.expires_at = time.monotonic() + ttl
+        self.lock = threading.Lock()
+
+    def fetchmany(self, size: int) -> List[tuple]:
+        """Fetch rows, draining the read-ahead buffer first"""
+        rows = self.buffered[:size]
+        self.buffered = self.buffered[size:]
+        if len(rows) < size:
+            rows.extend(self.cursor.fetchmany(size - len(rows)))
+        return rows
+
+    def push_back(self, rows: List[tuple]) -> None:
+        """Return rows that did not fit in a page"""
+        self.buffered = rows + self.buffered
+
+    def touch(self) -> None:
+        """Extend the expiry after use"""
+        self.expires_at = time.monotonic() + self.ttl
+
+    def close(self) -> None:
+        """Close the cursor and its connection"""
+        try:
+            self.cursor.close()
+            self.conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing result cursor: {str(e)}")
+
+class ResultCursorStore:
+    """
+    Bounded registry of continuation cursors
+
+    Each cursor owns a dedicated connection so later statements on the
+    pool cannot reset it. Cursors expire after ttl seconds of inactivity
+    and the oldest is closed when max_open is exceeded.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_open: int = 8):
+        self.ttl = ttl
+        self.max_open = max_open
+        self._cursors: "OrderedDict[str, ResultCursor]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor,
+             columns: List[str], buffered: List[tuple]) -> str:
+        """Register a cursor and return its continuation token"""
+        token = secrets.token_urlsafe(16)
+        stale = []
+        with self._lock:
+            self._cursors[token] = ResultCursor(conn, cursor, columns, buffered, self.ttl)
+            stale.extend(self._expire_locked())
+            while len(self._cursors) > self.max_open:
+                stale.append(self._cursors.popitem(last=False)[1])
+        for result_cursor in stale:
+            result_cursor.close()
+        return token
+
+    def get(self, token: str) -> Optional[ResultCursor]:
+        """Look up a live cursor, refreshing its expiry"""
+        with self._lock:
+            stale = self._expire_locked()
+            result_cursor = self._cursors.get(token)
+            if result_cursor is not None:
+                self._cursors.move_to_end(token)
+                result_cursor.touch()
+        for expired in stale:
+            expired.close()
+        return result_cursor
+
+    def close(self, token: str) -> None:
+        """Close and forget one cursor"""
+        with self._lock:
+            result_cursor = self._cursors.pop(token, None)
+        if result_cursor is not None:
+            result_cursor.close()
+
+    def close_all(self) -> None:
+        """Close every open cursor"""
+        with self._lock:
+            cursors = list(self._cursors.values())
+            self._cursors.clear()
+        for result_cursor in cursors:
+            result_cursor.close()
+
+    @property
+    def open_count(self) -> int:
+        """Number of live cursors"""
+        return len(self._cursors)
+
+    def _expire_locked(self) -> List[ResultCursor]:
+        """Remove expired cursors; the caller closes them outside the lock"""
+        now = time.monotonic()
+        expired = [token for token, c in self._cursors.items() if c.expires_at <= now]
+        return [self._cursors.pop(token) for token in expired]
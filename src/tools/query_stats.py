@@ -0,0 +1,144 @@
+"""Per-statement timing, plan capture and slow-query logging"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+from utils.logging import get_logger
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Distinct normalised statements tracked before the least recently seen is dropped
+MAX_TRACKED_STATEMENTS = 500
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace and replace literals with ? so equivalent statements group together"""
+    query = _STRING_LITERAL.sub("?", query)
+    query = _NUMBER_LITERAL.sub("?", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+_slow_log: Optional[logging.Logger] = None
+_slow_log_lock = threading.Lock()
+
+def _get_slow_log() -> logging.Logger:
+    """JSON-lines slow-query log in logs_dir, rotated by size"""
+    global _slow_log
+    with _slow_log_lock:
+        if _slow_log is None:
+            os.makedirs(settings.logs_dir, exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(settings.logs_dir, "slow_queries.log"),
+                maxBytes=settings.slow_query_log_max_bytes,
+                backupCount=settings.slow_query_log_backups
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            slow_log = logging.getLogger("slow_queries")
+            slow_log.setLevel(logging.INFO)
+            slow_log.propagate = False  # Keep plans out of the main server log
+            slow_log.addHandler(handler)
+            _slow_log = slow_log
+        return _slow_log
+
+class QueryStats:
+    """
+    Aggregated query timings for one database
+
+    Every statement is grouped by its normalised text. Statements slower
+    than slow_ms also get their EXPLAIN QUERY PLAN captured, are kept in a
+    bounded in-memory history and are written to the slow-query log.
+    """
+
+    def __init__(self, slow_ms: Optional[float] = None, history: Optional[int] = None):
+        self.slow_ms = settings.slow_query_ms if slow_ms is None else slow_ms
+        self._statements: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._slow: deque = deque(maxlen=history or settings.slow_query_history)
+        self._lock = threading.Lock()
+
+    def record(self, conn: sqlite3.Connection, query: str, params: Optional[tuple],
+               elapsed_ms: float, rows_returned: int, vm_steps: int,
+               error: Optional[str] = None) -> None:
+        """
+        Account for one executed statement
+
+        Args:
+            conn: Connection the statement ran on, used to explain slow statements
+            query: Statement text as executed
+            params: Bound parameters
+            elapsed_ms: Wall time for execution and the first page of rows
+            rows_returned: Rows handed back to the caller
+            vm_steps: Approximate SQLite VM instructions executed (a proxy for rows scanned)
+            error: Error message if the statement failed
+        """
+        normalized = normalize_sql(query)
+        with self._lock:
+            entry = self._statements.pop(normalized, None)
+            if entry is None:
+                entry = {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                          "rows_returned": 0, "vm_steps": 0}
+            self._statements[normalized] = entry
+            entry["calls"] += 1
+            entry["errors"] += error is not None
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["rows_returned"] += rows_returned
+            entry["vm_steps"] += vm_steps
+            while len(self._statements) > MAX_TRACKED_STATEMENTS:
+                self._statements.popitem(last=False)
+
+        if elapsed_ms < self.slow_ms:
+            return
+
+        plan = self.explain(conn, query, params)
+        slow_query = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "statement": normalized,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "rows_returned": rows_returned,
+            "vm_steps": vm_steps,
+            "full_scan": any(step.startswith("SCAN ") and " USING " not in step for step in plan),
+            "plan": plan
+        }
+        if error:
+            slow_query["error"] = error
+        with self._lock:
+            self._slow.append(slow_query)
+        _get_slow_log().info(json.dumps(slow_query))
+
+    @staticmethod
+    def explain(conn: sqlite3.Connection, query: str, params: Optional[tuple]) -> List[str]:
+        """EXPLAIN QUERY PLAN details for a statement, or [] if it cannot be explained"""
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
+            return [row[3] for row in rows]
+        except sqlite3.Error:
+            return []
+
+    def slow_queries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent slow queries, newest first"""
+        with self._lock:
+            return list(reversed(self._slow))[:limit]
+
+    def summary(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Statements ordered by total time spent"""
+        with self._lock:
+            items = [(statement, dict(entry)) for statement, entry in self._statements.items()]
+        items.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+        return [
+            {"statement": statement, **entry,
+             "total_ms": round(entry["total_ms"], 3),
+             "max_ms": round(entry["max_ms"], 3),
+             "avg_ms": round(entry["total_ms"] / entry["calls"], 3)}
+            for statement, entry in items[:limit]
+        ]
@@ -0,0 +1,246 @@
+"""Parallel workspace content search"""
+
+import fnmatch
+import mmap
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from utils.logging import get_logger
+from utils.process_pool import ProcessPool
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_BINARY_SNIFF_BYTES = 8192
+
+# Files sent to a worker per task: one round trip covers many small files
+_FILES_PER_TASK = 64
+
+def _search_file(file_path: str, pattern: bytes, flags: int, context_lines: int,
+                 max_matches: int) -> Dict[str, Any]:
+    """
+    Find pattern matches in one file (runs in a worker process)
+
+    The file is memory-mapped and scanned with a bytes regex, so nothing
+    is decoded except the matched lines and their context.
+    """
+    matches: List[Dict[str, Any]] = []
+    try:
+        with open(file_path, "rb") as f:
+            if b"\0" in f.read(_BINARY_SNIFF_BYTES):
+                return {"file": file_path, "skipped": "binary", "matches": matches}
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return {"file": file_path, "matches": matches}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                regex = re.compile(pattern, flags)
+                counted_to = 0
+                line_number = 1
+                last_line_start = -1
+                for match in regex.finditer(mm):
+                    line_start = mm.rfind(b"\n", 0, match.start()) + 1
+                    if line_start == last_line_start:
+                        continue  # Report each line once
+                    last_line_start = line_start
+                    line_number += mm[counted_to:line_start].count(b"\n")
+                    counted_to = line_start
+                    line_end = mm.find(b"\n", match.start())
+                    line_end = len(mm) if line_end == -1 else line_end
+
+                    before_start = line_start
+                    for _ in range(context_lines):
+                        if before_start == 0:
+                            break
+                        before_start = mm.rfind(b"\n", 0, before_start - 1) + 1
+                    after_end = line_end
+                    for _ in range(context_lines):
+                        if after_end >= len(mm):
+                            break
+                        next_end = mm.find(b"\n", after_end + 1)
+                        after_end = len(mm) if next_end == -1 else next_end
+
+                    # The after-context slice starts with the match line's own newline
+                    after = mm[line_end:after_end].decode("utf-8", errors="replace").splitlines()[1:]
+                    matches.append({
+                        "line": line_number,
+                        "text": mm[line_start:line_end].decode("utf-8", errors="replace"),
+                        "before": mm[before_start:line_start].decode("utf-8", errors="replace").splitlines(),
+                        "after": after
+                    })
+                    if len(matches) >= max_matches:
+                        break
+    except (OSError, ValueError) as e:
+        return {"file": file_path, "skipped": str(e), "matches": matches}
+    return {"file": file_path, "matches": matches}
+
+def _search_files(file_paths: Sequence[str], pattern: bytes, flags: int, context_lines: int,
+                  max_matches: int) -> List[Dict[str, Any]]:
+    """Search a batch of files in one worker task"""
+    return [_search_file(path, pattern, flags, context_lines, max_matches) for path in file_paths]
+
+# Search workers come from utils.process_pool (fresh interpreters, not forks of
+# the server); a thread per worker waits on its task so batches run in parallel.
+_pool: Optional[ProcessPool] = None
+_dispatch: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPool:
+    """Get the shared search process pool, starting it on first use"""
+    global _pool, _dispatch
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPool(settings.search_processes, warm_modules=())
+            _dispatch = ThreadPoolExecutor(max_workers=_pool.size, thread_name_prefix="mcp-search")
+        return _pool
+
+def shutdown_search_pool() -> None:
+    """Stop the search worker processes"""
+    global _pool, _dispatch
+    with _pool_lock:
+        pool, dispatch, _pool, _dispatch = _pool, _dispatch, None, None
+    if pool is not None:
+        dispatch.shutdown(wait=False, cancel_futures=True)
+        pool.shutdown()
+
+class SearchTools:
+    """Content search tools for MCP server"""
+
+    @staticmethod
+    def iter_candidate_files(root: str, file_glob: Optional[str] = None) -> Iterator[str]:
+        """
+        Walk the workspace, yielding text-search candidates
+        Skips excluded directories and files over settings.max_file_size.
+        """
+        excluded = set(settings.workspace_index_exclude)
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in excluded:
+                                    stack.append(entry.path)
+                                continue
+                            if not entry.is_file():
+                                continue
+                            if file_glob and not (fnmatch.fnmatch(entry.name, file_glob) or
+                                                  fnmatch.fnmatch(os.path.relpath(entry.path, root), file_glob)):
+                                continue
+                            if entry.stat().st_size > settings.max_file_size:
+                                continue
+                        except OSError:
+                            continue
+                        yield entry.path
+            except OSError as e:
+                logger.warning(f"Cannot search {directory}: {str(e)}")
+
+    @staticmethod
+    def search_content(pattern: str, root: str = ".", regex: bool = False,
+                       file_glob: Optional[str] = None, ignore_case: bool = False,
+                       context_lines: int = 2, max_results: Optional[int] = None,
+                       max_bytes: Optional[int] = None,
+                       on_match: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Search file contents across the workspace in parallel
+
+        Files are fanned out to a process pool in batches; results are
+        collected as each batch finishes and passed to on_match immediately,
+        so callers can stream them. The search stops early once max_results matches
+        or max_bytes of match text have been collected.
+
+        Args:
+            pattern: Literal text, or a regular expression if regex=True
+            root: Directory to search
+            regex: Treat pattern as a regular expression
+            file_glob: Only search files whose name or relative path matches, e.g. "*.py"
+            ignore_case: Case-insensitive matching
+            context_lines: Lines of context before and after each match
+            max_results: Maximum matches to return (default: settings.search_max_results)
+            max_bytes: Budget for returned match text (default: settings.search_max_bytes)
+            on_match: Called with {"file", "matches"} for every file that matched
+
+        Returns:
+            Dictionary with matches grouped by file
+        """
+        try:
+            if not os.path.isdir(root):
+                return {"success": False, "error": f"Not a directory: {root}"}
+            max_results = max_results or settings.search_max_results
+            max_bytes = max_bytes or settings.search_max_bytes
+            raw_pattern = pattern.encode("utf-8") if regex else re.escape(pattern.encode("utf-8"))
+            flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+            re.compile(raw_pattern, flags)  # Fail fast on an invalid regex
+        except (re.error, ValueError) as e:
+            return {"success": False, "error": f"Invalid pattern: {str(e)}"}
+
+        pool = _get_pool()
+        files = SearchTools.iter_candidate_files(root, file_glob)
+        window = pool.size * 2  # Keep every worker busy while a batch is collected
+        pending = set()
+        results: List[Dict[str, Any]] = []
+        total_matches = files_searched = skipped = bytes_used = 0
+        truncated = False
+
+        def submit_next() -> bool:
+            batch = list(islice(files, _FILES_PER_TASK))
+            if not batch:
+                return False
+            pending.add(_dispatch.submit(pool.run, _search_files, batch, raw_pattern, flags,
+                                         context_lines, max_results))
+            return True
+
+        while len(pending) < window and submit_next():
+            pass
+
+        while pending and not truncated:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                if not truncated:
+                    submit_next()
+                try:
+                    batch_results = future.result()
+                except Exception as e:
+                    logger.warning(f"Search worker failed: {str(e)}")
+                    continue
+                for file_result in batch_results:
+                    files_searched += 1
+                    if "skipped" in file_result:
+                        skipped += 1
+                    if not file_result["matches"] or truncated:
+                        continue
+
+                    kept = []
+                    for match in file_result["matches"]:
+                        size = len(match["text"]) + sum(len(line) for line in match["before"] + match["after"])
+                        if total_matches >= max_results or bytes_used + size > max_bytes:
+                            truncated = True
+                            break
+                        kept.append(match)
+                        total_matches += 1
+                        bytes_used += size
+                    if kept:
+                        entry = {"file": os.path.relpath(file_result["file"], root), "matches": kept}
+                        results.append(entry)
+                        if on_match:
+                            on_match(entry)
+
+        for future in pending:
+            future.cancel()
+
+        return {
+            "success": True,
+            "pattern": pattern,
+            "results": results,
+            "total_matches": total_matches,
+            "files_with_matches": len(results),
+            "files_searched": files_searched,
+            "files_skipped": skipped,
+            "truncated": truncated
+        }
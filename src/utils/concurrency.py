@@ -0,0 +1,105 @@
+"""Bounded thread-pool offload for blocking tool work"""
+
+import asyncio
+import contextlib
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from mcp.server.lowlevel.server import request_ctx
+from utils.logging import get_logger
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+# One semaphore per connected client session; entries go away with the session
+_session_semaphores: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the shared worker pool (singleton pattern)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                settings = get_settings()
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.worker_threads,
+                    thread_name_prefix="mcp-worker"
+                )
+    return _executor
+
+def get_tool_limit(tool_name: str) -> int:
+    """Maximum number of concurrent calls allowed for a tool"""
+    settings = get_settings()
+    return settings.tool_concurrency_limits.get(tool_name, settings.tool_concurrency_default)
+
+def _get_semaphore(tool_name: str) -> asyncio.Semaphore:
+    """Get the per-tool semaphore, creating it on first use"""
+    semaphore = _semaphores.get(tool_name)
+    if semaphore is None:
+        semaphore = _semaphores[tool_name] = asyncio.Semaphore(get_tool_limit(tool_name))
+    return semaphore
+
+def _get_session_semaphore() -> Optional[asyncio.Semaphore]:
+    """Semaphore of the client session making the current request, if any"""
+    try:
+        session = request_ctx.get().session
+    except LookupError:
+        return None  # Called outside an MCP request (tests, startup)
+    semaphore = _session_semaphores.get(session)
+    if semaphore is None:
+        semaphore = _session_semaphores[session] = asyncio.Semaphore(get_settings().session_concurrency)
+    return semaphore
+
+def session_stats() -> Dict[str, int]:
+    """Number of client sessions seen that are still connected, and the per-session limit"""
+    return {"sessions": len(_session_semaphores), "session_concurrency": get_settings().session_concurrency}
+
+async def run_blocking(tool_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run blocking work on the shared pool without stalling the event loop
+
+    Calls are admitted through a per-session semaphore and then a per-tool
+    semaphore, so one busy client (over HTTP) cannot starve the others and
+    a burst of one slow tool cannot occupy every worker thread.
+
+    Args:
+        tool_name: Name used to look up the tool's concurrency limit
+        func: Blocking callable to run
+
+    Returns:
+        Whatever func returns
+    """
+    session_semaphore = _get_session_semaphore()
+    async with session_semaphore or contextlib.nullcontext(), _get_semaphore(tool_name):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+async def run_cancellable(tool_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Like run_blocking, but tells func when the caller gives up
+
+    func receives a threading.Event as its cancel_event keyword argument.
+    If the awaiting task is cancelled (e.g. the MCP client cancels the
+    request) the event is set so the worker can stop early.
+    """
+    cancel_event = threading.Event()
+    try:
+        return await run_blocking(tool_name, func, *args, cancel_event=cancel_event, **kwargs)
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+
+def shutdown_executor() -> None:
+    """Wait for in-flight work and stop the worker pool"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+    _semaphores.clear()
+    _session_semaphores.clear()
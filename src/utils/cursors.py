@@ -0,0 +1,35 @@
+"""Opaque pagination cursors"""
+
+import base64
+import json
+from typing import Any, Dict
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """
+    Encode pagination state as an opaque, URL-safe token
+    Args:
+        state: JSON-serialisable position to resume from
+    Returns:
+        Cursor string
+    """
+    raw = json.dumps(state, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor
+    Args:
+        cursor: Cursor string
+    Returns:
+        The original state dictionary
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict):
+        raise ValueError("Invalid cursor")
+    return state
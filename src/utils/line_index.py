@@ -0,0 +1,95 @@
+"""Sparse line-offset index for large text files"""
+
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# A checkpoint is stored every STRIDE lines; lookups scan forward from the nearest one
+STRIDE = 1024
+_SCAN_CHUNK = 16 * 1024 * 1024
+_MAX_CACHED_INDEXES = 32
+
+class LineIndex:
+    """Byte offsets of every STRIDE-th line start in one version of a file"""
+
+    def __init__(self, checkpoints: array, total_lines: int, file_size: int):
+        self.checkpoints = checkpoints
+        self.total_lines = total_lines
+        self.file_size = file_size
+
+    @classmethod
+    def build(cls, mm: mmap.mmap, file_size: int) -> "LineIndex":
+        """Scan the file once, recording a checkpoint every STRIDE lines"""
+        import numpy as np
+
+        checkpoints = array("Q", [0])
+        newlines_seen = 0
+        for start in range(0, file_size, _SCAN_CHUNK):
+            chunk = np.frombuffer(mm[start:start + _SCAN_CHUNK], dtype=np.uint8)
+            positions = np.flatnonzero(chunk == 10)
+            # Line k starts right after newline k-1, so checkpoints follow newlines
+            # whose global index g satisfies (g + 1) % STRIDE == 0
+            first = (-(newlines_seen + 1)) % STRIDE
+            checkpoints.extend(int(p) + start + 1 for p in positions[first::STRIDE])
+            newlines_seen += len(positions)
+
+        if checkpoints and checkpoints[-1] >= file_size and len(checkpoints) > 1:
+            checkpoints.pop()  # A trailing newline does not start a new line
+
+        ends_with_newline = file_size > 0 and mm[file_size - 1:file_size] == b"\n"
+        total_lines = newlines_seen + (0 if ends_with_newline or file_size == 0 else 1)
+        return cls(checkpoints, total_lines, file_size)
+
+    def offset_of_line(self, mm: mmap.mmap, line_number: int) -> int:
+        """
+        Byte offset where a line starts
+        Args:
+            mm: Memory map of the indexed file
+            line_number: 1-based line number
+        Returns:
+            Offset of the line start, or the file size if past the last line
+        """
+        if line_number > self.total_lines:
+            return self.file_size
+
+        line = max(line_number, 1) - 1
+        checkpoint = min(line // STRIDE, len(self.checkpoints) - 1)
+        offset = self.checkpoints[checkpoint]
+        for _ in range(line - checkpoint * STRIDE):
+            newline = mm.find(b"\n", offset)
+            if newline == -1:
+                return self.file_size
+            offset = newline + 1
+        return offset
+
+_cache: "OrderedDict[Tuple[str, int, int], LineIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def get_line_index(file_path: str, stat_result: os.stat_result, mm: mmap.mmap) -> LineIndex:
+    """
+    Get the line index for a file, building it only when the file changed
+    Args:
+        file_path: Path to the file
+        stat_result: Current stat of the file
+        mm: Memory map of the file
+    Returns:
+        LineIndex for this (path, mtime, size)
+    """
+    key = (os.path.abspath(file_path), stat_result.st_mtime_ns, stat_result.st_size)
+    with _cache_lock:
+        index: Optional[LineIndex] = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+
+    index = LineIndex.build(mm, stat_result.st_size)
+    with _cache_lock:
+        for stale in [k for k in _cache if k[0] == key[0]]:
+            del _cache[stale]  # Older versions of this file can never be hit again
+        _cache[key] = index
+        while len(_cache) > _MAX_CACHED_INDEXES:
+            _cache.popitem(last=False)
+    return index
@@ -0,0 +1,221 @@
+"""Low-overhead call metrics for MCP handlers"""
+
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from utils.logging import get_logger
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+
+# Latency bucket upper bounds in seconds: 0.1ms to ~100s, 25% apart
+BUCKETS: List[float] = [0.0001 * 1.25 ** i for i in range(63)]
+
+class HandlerStats:
+    """Counters and a fixed-bucket latency histogram for one handler"""
+
+    __slots__ = ("kind", "name", "calls", "errors", "seconds_total", "seconds_max",
+                 "response_bytes", "buckets")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+        self.response_bytes = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # Last slot counts overflow
+
+    def observe(self, seconds: float, error: bool, response_bytes: int) -> None:
+        """Record one call"""
+        self.calls += 1
+        self.errors += error
+        self.seconds_total += seconds
+        if seconds > self.seconds_max:
+            self.seconds_max = seconds
+        self.response_bytes += response_bytes
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Latency percentile in seconds, read from the bucket upper bounds"""
+        if not self.calls:
+            return 0.0
+        rank = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(BUCKETS[i], self.seconds_max) if i < len(BUCKETS) else self.seconds_max
+        return self.seconds_max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary with latency percentiles in milliseconds"""
+        return {
+            "kind": self.kind,
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": round(self.seconds_total / self.calls * 1000, 3) if self.calls else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.seconds_max * 1000, 3),
+            "response_bytes": self.response_bytes,
+            "mean_response_bytes": self.response_bytes // self.calls if self.calls else 0
+        }
+
+def _response_info(result: Any) -> tuple:
+    """(size in bytes, is_error) for a handler's return value"""
+    if isinstance(result, str):
+        return len(result.encode("utf-8")), False
+    content = getattr(result, "content", None)  # CallToolResult
+    if content is not None:
+        size = sum(len(getattr(block, "text", "").encode("utf-8")) for block in content)
+        return size, bool(getattr(result, "isError", False))
+    if isinstance(result, list):  # Prompts return content blocks
+        return sum(len(getattr(block, "text", "").encode("utf-8")) for block in result), False
+    return 0, False
+
+class MetricsRegistry:
+    """Per-handler statistics, shared by every instrumented handler"""
+
+    def __init__(self):
+        self._handlers: Dict[str, HandlerStats] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, kind: str, name: str, seconds: float, result: Any, failed: bool) -> None:
+        """Record one handler call; failed means it raised"""
+        size, is_error = (0, False) if failed else _response_info(result)
+        with self._lock:
+            stats = self._handlers.get(name)
+            if stats is None:
+                stats = self._handlers[name] = HandlerStats(kind, name)
+            stats.observe(seconds, failed or is_error, size)
+
+    def instrument(self, kind: str) -> Callable:
+        """
+        Decorator that times a handler and records its outcome
+
+        Works for async and sync handlers; the wrapper keeps the original
+        signature so FastMCP still sees the handler's parameters.
+        """
+        def decorator(func: Callable) -> Callable:
+            name = func.__name__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    started = time.perf_counter()
+                    result = None
+                    failed = True
+                    try:
+                        result = await func(*args, **kwargs)
+                        failed = False
+                        return result
+                    finally:
+                        self.observe(kind, name, time.perf_counter() - started, result, failed)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                result = None
+                failed = True
+                try:
+                    result = func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    self.observe(kind, name, time.perf_counter() - started, result, failed)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All handler statistics as plain data"""
+        with self._lock:
+            handlers = {name: stats.snapshot() for name, stats in sorted(self._handlers.items())}
+        return {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "total_calls": sum(h["calls"] for h in handlers.values()),
+            "total_errors": sum(h["errors"] for h in handlers.values()),
+            "handlers": handlers
+        }
+
+    def prometheus(self) -> str:
+        """Statistics in the Prometheus text exposition format"""
+        with self._lock:
+            handlers = [(f'kind="{stats.kind}",handler="{name}"', stats.calls, stats.errors,
+                         stats.response_bytes, stats.seconds_total, list(stats.buckets))
+                        for name, stats in sorted(self._handlers.items())]
+        lines = []
+        counters = [
+            ("mcp_handler_calls_total", "Handler invocations", 1),
+            ("mcp_handler_errors_total", "Handler invocations that raised or returned an error", 2),
+            ("mcp_handler_response_bytes_total", "Bytes of response text returned", 3)
+        ]
+        for metric, help_text, field in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{{{handler[0]}}} {handler[field]}" for handler in handlers)
+        
+        lines.append("# HELP mcp_handler_latency_seconds Handler latency")
+        lines.append("# TYPE mcp_handler_latency_seconds histogram")
+        for labels, calls, _, _, seconds_total, buckets in handlers:
+            cumulative = 0
+            for bound, count in zip(BUCKETS, buckets):
+                cumulative += count
+                lines.append(f'mcp_handler_latency_seconds_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'mcp_handler_latency_seconds_bucket{{{labels},le="+Inf"}} {calls}')
+            lines.append(f"mcp_handler_latency_seconds_sum{{{labels}}} {seconds_total:.6f}")
+            lines.append(f"mcp_handler_latency_seconds_count{{{labels}}} {calls}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Atomically replace path with the current Prometheus dump"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, path)
+
+# Global registry used by the server's handlers
+metrics = MetricsRegistry()
+
+_dump_thread: Optional[threading.Thread] = None
+_dump_stop = threading.Event()
+
+def start_metrics_dump() -> None:
+    """Write logs_dir/metrics.prom every settings.metrics_dump_seconds in a daemon thread"""
+    global _dump_thread
+    settings = get_settings()
+    if settings.metrics_dump_seconds <= 0 or _dump_thread is not None:
+        return
+    path = os.path.join(settings.logs_dir, "metrics.prom")
+    os.makedirs(settings.logs_dir, exist_ok=True)
+    _dump_stop.clear()
+
+    def run() -> None:
+        while not _dump_stop.wait(settings.metrics_dump_seconds):
+            try:
+                metrics.write_prometheus(path)
+            except OSError as e:
+                logger.warning(f"Could not write metrics dump: {str(e)}")
+
+    _dump_thread = threading.Thread(target=run, name="metrics-dump", daemon=True)
+    _dump_thread.start()
+
+def stop_metrics_dump() -> None:
+    """Stop the dump thread and write a final dump"""
+    global _dump_thread
+    if _dump_thread is None:
+        return
+    _dump_stop.set()
+    _dump_thread.join(timeout=5)
+    _dump_thread = None
+    try:
+        metrics.write_prometheus(os.path.join(get_settings().logs_dir, "metrics.prom"))
+    except OSError as e:
+        logger.warning(f"Could not write metrics dump: {str(e)}")
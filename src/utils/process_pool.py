@@ -0,0 +1,263 @@
+"""Warm worker processes for CPU-bound tool work, with per-call deadlines"""
+
+import importlib
+import math
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, Optional, Sequence
+from utils.logging import get_logger
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+
+# Modules imported by every worker before it takes its first task
+WARM_MODULES = ("pandas",)
+
+class WorkerTimeout(TimeoutError):
+    """A task ran past its deadline; its worker was killed and replaced"""
+
+class WorkerCrashed(RuntimeError):
+    """A worker process died while running a task"""
+
+def _worker_main(reader, writer, warm_modules: Sequence[str]) -> None:
+    """Worker loop: import the warm modules, then run (func, args, kwargs) tasks until told to stop"""
+    for name in warm_modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass  # Optional dependency; the task reports it if it needs the module
+    while True:
+        try:
+            task = reader.recv()
+        except (EOFError, OSError):
+            return  # The server went away
+        if task is None:
+            return
+        func, args, kwargs = task
+        try:
+            reply = ("ok", func(*args, **kwargs))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {str(e)}")
+        writer.send(reply)
+
+class _Worker:
+    """
+    One worker process and the parent ends of its two pipes
+
+    Workers are fresh interpreters (python -m utils.process_pool) rather
+    than forks: forking the server from a worker thread would copy locks
+    held by the thread pool, sampler and connection pool, and the
+    multiprocessing spawn/forkserver start methods would re-run server.py
+    as __mp_main__ in every worker. stdout is discarded so a stray print
+    cannot corrupt the stdio transport.
+    """
+
+    def __init__(self, warm_modules: Sequence[str]):
+        task_read, task_write = os.pipe()
+        result_read, result_write = os.pipe()
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "utils.process_pool", str(task_read), str(result_write), *warm_modules],
+                pass_fds=(task_read, result_write), env=env,
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL
+            )
+        except BaseException:
+            for fd in (task_write, result_read):
+                os.close(fd)
+            raise
+        finally:
+            os.close(task_read)
+            os.close(result_write)
+        self.writer = Connection(task_write, readable=False)
+        self.reader = Connection(result_read, writable=False)
+
+    def _close(self) -> None:
+        self.writer.close()
+        self.reader.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.wait(timeout=5)
+        self._close()
+
+    def stop(self) -> None:
+        try:
+            self.writer.send(None)
+        except (OSError, ValueError):
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        self._close()
+
+class ProcessPool:
+    """
+    Fixed set of long-lived worker processes for CPU-bound tool work
+
+    CSV parsing and similar work holds the GIL, so running it on the thread
+    pool still serialises every other tool. Here it runs in separate
+    processes that import pandas once, when they start, rather than on the
+    first call. Each task gets a whole worker; a task that passes its
+    deadline (or whose caller cancels) has its worker killed and replaced,
+    so a runaway parse cannot pin a CPU after the client has given up.
+    Tasks should return plain Python values (dicts, lists, str, numbers):
+    only the result crosses the process boundary, never intermediate
+    DataFrames.
+    """
+
+    def __init__(self, size: int, warm_modules: Sequence[str] = WARM_MODULES):
+        self.size = max(1, size)
+        self.warm_modules = tuple(warm_modules)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: set = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.tasks = 0
+        self.timeouts = 0
+        self.crashes = 0
+
+    def start(self) -> None:
+        """Start any missing workers so they are warm before the first call"""
+        with self._lock:
+            if self._closed:
+                return
+            while len(self._workers) < self.size:
+                worker = _Worker(self.warm_modules)
+                self._workers.add(worker)
+                self._idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill a worker and put a fresh one in its place"""
+        worker.kill()
+        with self._lock:
+            self._workers.discard(worker)
+            if self._closed:
+                return
+            replacement = _Worker(self.warm_modules)
+            self._workers.add(replacement)
+        self._idle.put(replacement)
+
+    def run(self, func: Callable[..., Any], *args, timeout: Optional[float] = None,
+            cancel_event: Optional[threading.Event] = None, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) in a worker process and wait for its result
+
+        Args:
+            func: Module-level (picklable) callable
+            timeout: Deadline in seconds, counted from submission, including
+                time spent waiting for a free worker (default: settings.api_timeout);
+                math.inf leaves cancel_event as the only limit
+            cancel_event: Kill the task early once this event is set
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            WorkerTimeout: The deadline passed or the caller cancelled
+            WorkerCrashed: The worker died mid-task
+            RuntimeError: func raised; the message carries its type and text
+        """
+        if timeout is None:
+            timeout = float(get_settings().api_timeout)
+        deadline = time.monotonic() + timeout
+        self.start()
+        try:
+            worker = self._idle.get(timeout=None if math.isinf(timeout) else max(timeout, 0))
+        except queue.Empty:
+            raise WorkerTimeout(f"No worker became free within {timeout:g}s") from None
+
+        try:
+            worker.writer.send((func, args, kwargs))
+        except Exception:
+            self._idle.put(worker)  # Nothing was sent if pickling the task failed
+            raise
+        self.tasks += 1
+        while True:
+            remaining = deadline - time.monotonic()
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if remaining <= 0 or cancelled:
+                self.timeouts += 1
+                self._replace(worker)
+                reason = "was cancelled" if cancelled else f"exceeded its {timeout:g}s deadline"
+                logger.warning(f"Worker task {getattr(func, '__qualname__', func)} {reason}; worker replaced")
+                raise WorkerTimeout(f"Task {reason}")
+            # Short polls so a cancellation is noticed promptly
+            wait = min(remaining, 0.25) if cancel_event is not None or math.isinf(remaining) else remaining
+            if worker.reader.poll(wait):
+                break
+
+        try:
+            status, value = worker.reader.recv()
+        except (EOFError, OSError):
+            self.crashes += 1
+            self._replace(worker)
+            raise WorkerCrashed("Worker process exited while running the task") from None
+        self._idle.put(worker)
+        if status == "error":
+            raise RuntimeError(value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker counts and task totals"""
+        return {
+            "workers": len(self._workers),
+            "idle_workers": self._idle.qsize(),
+            "tasks": self.tasks,
+            "timeouts": self.timeouts,
+            "crashes": self.crashes
+        }
+
+    def shutdown(self) -> None:
+        """Stop every worker; busy ones are killed"""
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+        idle = set()
+        while True:
+            try:
+                idle.add(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in workers:
+            if worker in idle:
+                worker.stop()
+            else:
+                worker.kill()
+
+_pool: Optional[ProcessPool] = None
+_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPool:
+    """Get the shared CPU worker pool (singleton pattern)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPool(get_settings().cpu_processes)
+    return _pool
+
+def run_in_process(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run func on the shared CPU worker pool; see ProcessPool.run"""
+    return get_process_pool().run(func, *args, **kwargs)
+
+def shutdown_process_pool() -> None:
+    """Stop the CPU worker processes"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+if __name__ == "__main__":
+    # Worker process entry point: python -m utils.process_pool TASK_FD RESULT_FD [MODULE ...]
+    _worker_main(Connection(int(sys.argv[1]), writable=False),
+                 Connection(int(sys.argv[2]), readable=False), sys.argv[3:])
@@ -0,0 +1,195 @@
+"""Fingerprint-keyed LRU cache for file analysis results"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from utils.logging import get_logger
+from config.settings import get_settings
+
+logger = get_logger(__name__)
+
+class ResultCache:
+    """
+    Two-tier cache of results derived from files
+
+    Entries are keyed by the file's fingerprint (absolute path, size,
+    mtime_ns, ctime_ns) plus the call parameters, so any change to the file
+    naturally misses. The memory tier is an LRU bounded by entry count and
+    pickled size; the optional disk tier lets results survive restarts.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 67108864,
+                 disk_dir: Optional[str] = None, disk_max_bytes: int = 268435456):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(file_path: str) -> Tuple[str, int, int, int]:
+        """Identify one version of a file"""
+        abs_path = os.path.abspath(file_path)
+        stats = os.stat(abs_path)
+        return abs_path, stats.st_size, stats.st_mtime_ns, stats.st_ctime_ns
+
+    def _key(self, namespace: str, file_path: str, params: Dict[str, Any]) -> str:
+        raw = json.dumps([namespace, self.fingerprint(file_path), params], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get_or_compute(self, namespace: str, file_path: str, params: Dict[str, Any],
+                       compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return a cached result for this file version, computing it on a miss
+
+        Args:
+            namespace: Name of the operation, e.g. "read_csv_file"
+            file_path: File the result is derived from
+            params: Call parameters that affect the result
+            compute: Produces the result on a miss
+
+        Returns:
+            The cached or freshly computed result; failed results are not cached
+        """
+        key = self._key(namespace, file_path, params)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        value = self._disk_get(key)
+        if value is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._memory_put(key, value, len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+            return value
+
+        with self._lock:
+            self.misses += 1
+        value = compute()
+        if isinstance(value, dict) and (value.get("success") is False or "error" in value):
+            return value
+
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._memory_put(key, value, len(payload))
+        self._disk_put(key, payload)
+        return value
+
+    def _memory_put(self, key: str, value: Any, size: int) -> None:
+        """Insert into the LRU, evicting until both limits hold"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pickle")
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        """Load an entry from the disk tier, if enabled and present"""
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                value = pickle.load(f)
+            os.utime(self._disk_path(key))  # Keep recently used entries from being pruned
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+            return None
+
+    def _disk_put(self, key: str, payload: bytes) -> None:
+        """Write an entry to the disk tier atomically, then prune old entries"""
+        if not self.disk_dir or len(payload) > self.disk_max_bytes:
+            return
+        try:
+            tmp_path = self._disk_path(key) + f".{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._disk_path(key))
+            self._prune_disk()
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key}: {str(e)}")
+
+    def _prune_disk(self) -> None:
+        """Delete least recently used disk entries beyond disk_max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pickle"):
+                    stats = entry.stat()
+                    entries.append((stats.st_mtime, stats.st_size, entry.path))
+                    total += stats.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        """Drop every memory entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size, for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": bool(self.disk_dir)
+            }
+
+# Global cache instance
+_result_cache: Optional[ResultCache] = None
+
+def get_result_cache() -> ResultCache:
+    """Get result cache instance (singleton pattern)"""
+    global _result_cache
+    if _result_cache is None:
+        settings = get_settings()
+        disk_dir = os.path.join(settings.data_dir, "cache") if settings.cache_disk_enabled else None
+        _result_cache = ResultCache(
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes,
+            disk_dir=disk_dir,
+            disk_max_bytes=settings.cache_disk_max_bytes
+        )
+    return _result_cache
@@ -0,0 +1,185 @@
+"""JSON encoding of tool and resource responses"""
+
+import base64
+import decimal
+import json
+import math
+from typing import Any, Optional, Tuple
+from mcp.types import CallToolResult, TextContent
+from config.settings import get_settings
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib encoder is used instead
+    orjson = None
+
+settings = get_settings()
+
+# Bytes kept free for the truncation note when a response is trimmed
+_NOTE_RESERVE = 256
+
+def _default(value: Any) -> Any:
+    """Convert values the encoders do not handle natively (numpy, pandas, paths, ...)"""
+    if type(value).__name__ in ("NaTType", "NAType"):  # pandas missing values
+        return None
+    if hasattr(value, "tolist"):  # numpy arrays and scalars, pandas Index/Series
+        return value.tolist()
+    if hasattr(value, "isoformat"):  # pandas Timestamp under the stdlib encoder
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    return str(value)  # Paths, dtypes and other descriptive objects
+
+def _clean_floats(value: Any) -> Any:
+    """Replace NaN/inf with None, which the stdlib encoder would emit as invalid JSON"""
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else value
+    if isinstance(value, dict):
+        return {k: _clean_floats(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean_floats(v) for v in value]
+    return value
+
+def to_json(value: Any, compact: Optional[bool] = None) -> str:
+    """
+    Encode a value as JSON text
+    Uses orjson when installed (numpy-aware, NaN becomes null), otherwise the stdlib encoder.
+    """
+    compact = settings.response_compact if compact is None else compact
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(value, default=_default, option=option).decode("utf-8")
+    value = json.loads(json.dumps(value, default=_default))  # Normalise numpy/pandas first
+    return json.dumps(_clean_floats(value), allow_nan=False,
+                      indent=None if compact else 2,
+                      separators=(",", ":") if compact else None)
+
+def _from_json(text: str) -> Any:
+    """Parse JSON text produced by to_json"""
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+def columnar(value: Any) -> Any:
+    """
+    Rewrite lists of same-shaped dicts as {"columns": [...], "rows": [[...]]}
+    so repeated keys are sent once.
+    """
+    if isinstance(value, dict):
+        return {k: columnar(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if len(value) > 1 and all(isinstance(item, dict) for item in value):
+            keys = list(value[0])
+            if all(list(item) == keys for item in value):
+                return {"columns": keys,
+                        "rows": [[columnar(item[k]) for k in keys] for item in value]}
+        return [columnar(item) for item in value]
+    return value
+
+def _longest_list(value: Any, path: tuple = ()) -> Tuple[tuple, int]:
+    """Path to the longest list anywhere in the value, and its length"""
+    best: Tuple[tuple, int] = ((), 0)
+    if isinstance(value, list):
+        best = (path, len(value))
+        children = enumerate(value)
+    elif isinstance(value, dict):
+        children = value.items()
+    else:
+        return best
+    for key, child in children:
+        candidate = _longest_list(child, path + (key,))
+        if candidate[1] > best[1]:
+            best = candidate
+    return best
+
+def _replace(value: Any, path: tuple, new: Any) -> Any:
+    """Copy of value with the item at path replaced (containers on the path are copied, not mutated)"""
+    if not path:
+        return new
+    copy = dict(value) if isinstance(value, dict) else list(value)
+    copy[path[0]] = _replace(value[path[0]], path[1:], new)
+    return copy
+
+def _get(value: Any, path: tuple) -> Any:
+    """Item at a path of keys/indices"""
+    for key in path:
+        value = value[key]
+    return value
+
+def fit_to_budget(value: Any, max_bytes: int, compact: bool) -> Tuple[Any, str, int]:
+    """
+    Trim the longest lists in a response until its encoding fits max_bytes
+
+    Returns:
+        (trimmed value, its JSON text, number of list items dropped)
+    """
+    text = to_json(value, compact)
+    dropped = 0
+    while len(text.encode("utf-8")) > max_bytes:
+        path, length = _longest_list(value)
+        if length == 0:
+            break
+        items = _get(value, path)
+        # Binary search for the longest prefix of this list that fits
+        low, high = 0, length - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if len(to_json(_replace(value, path, items[:middle]), compact).encode("utf-8")) <= max_bytes:
+                low = middle
+            else:
+                high = middle - 1
+        dropped += length - low
+        value = _replace(value, path, items[:low])
+        text = to_json(value, compact)
+    return value, text, dropped
+
+def encode_response(result: Any, compact: Optional[bool] = None,
+                    max_bytes: Optional[int] = None) -> Tuple[str, Any]:
+    """
+    Encode a response under the size budget
+
+    Args:
+        result: Tool or resource result
+        compact: Drop indentation and send repeated keys once (default: settings.response_compact)
+        max_bytes: Response budget (default: settings.response_max_bytes)
+
+    Returns:
+        (JSON text, the encoded value)
+    """
+    compact = settings.response_compact if compact is None else compact
+    max_bytes = max_bytes or settings.response_max_bytes
+    if compact:
+        result = columnar(result)
+    text = to_json(result, compact)
+    if len(text.encode("utf-8")) <= max_bytes:
+        return text, result
+    
+    budget = max(max_bytes - _NOTE_RESERVE, 0)
+    value, text, dropped = fit_to_budget(result, budget, compact)
+    if dropped and isinstance(value, dict) and len(text.encode("utf-8")) <= budget:
+        value = dict(value, response_truncated=True,
+                     response_note=f"{dropped} list items dropped to fit the {max_bytes}-byte response budget")
+    else:
+        value = {"success": False, "response_truncated": True,
+                 "error": f"Response exceeds the {max_bytes}-byte budget; request a smaller page"}
+    return to_json(value, compact), value
+
+def tool_result(result: Any, compact: Optional[bool] = None) -> CallToolResult:
+    """Wrap a tool result as MCP structured content plus its JSON text"""
+    text, value = encode_response(result, compact)
+    structured = _from_json(text)
+    if not isinstance(structured, dict):
+        structured = {"result": structured}
+    return CallToolResult(
+        content=[TextContent(type="text", text=text)],
+        structuredContent=structured,
+        isError=isinstance(value, dict) and value.get("success") is False
+    )
+
+def resource_text(result: Any) -> str:
+    """Encode a resource result as JSON text under the size budget"""
+    return encode_response(result)[0]
@@ -0,0 +1,220 @@
+"""Constant-memory streaming sketches"""
+
+import math
+import random
+from typing import Any, List, Optional, Tuple
+
+class HyperLogLog:
+    """
+    Approximate distinct counter over 64-bit hashes
+
+    Uses 2**precision one-byte registers (4KB at the default precision),
+    giving a typical relative error of about 1.6%.
+    """
+
+    def __init__(self, precision: int = 12):
+        import numpy as np
+
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = np.zeros(self.num_registers, dtype=np.uint8)
+
+    def add_hashes(self, hashes) -> None:
+        """
+        Add a batch of hashed values
+        Args:
+            hashes: numpy uint64 array, e.g. from pandas.util.hash_pandas_object
+        """
+        import numpy as np
+
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        value_bits = 64 - self.precision
+        indexes = (hashes >> np.uint64(value_bits)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << value_bits) - 1)
+        # Rank = position of the leftmost 1-bit in the remaining bits
+        with np.errstate(divide="ignore"):
+            highest_bit = np.floor(np.log2(remainder.astype(np.float64)))
+        ranks = np.where(remainder == 0, value_bits + 1, value_bits - highest_bit)
+        np.maximum.at(self.registers, indexes, ranks.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Fold another sketch of the same precision into this one"""
+        import numpy as np
+
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        """Estimated number of distinct values added"""
+        import numpy as np
+
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # Linear counting for small cardinalities
+        return int(round(estimate))
+
+class ReservoirSample:
+    """
+    Uniform fixed-size sample of a stream (Algorithm L)
+
+    Once the reservoir is full, the gap to the next replacement is drawn
+    directly, so cost grows with log(stream length) rather than per item.
+    """
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        self.size = size
+        self.seen = 0
+        self.items: List[Any] = []
+        self._random = random.Random(seed)
+        self._weight = 1.0
+        self._next_index = 0
+        if size > 0:
+            self._shrink_weight()
+            self._next_index = size + self._gap()
+
+    def _uniform(self) -> float:
+        """Uniform draw in the open interval (0, 1)"""
+        return self._random.random() or 1e-300
+
+    def _shrink_weight(self) -> None:
+        self._weight = min(self._weight * math.exp(math.log(self._uniform()) / self.size), 1.0 - 1e-16)
+
+    def _gap(self) -> int:
+        """Number of items to skip before the next replacement"""
+        return math.floor(math.log(self._uniform()) / math.log(1.0 - self._weight))
+
+    def add(self, item: Any) -> None:
+        """Offer one item to the sample"""
+        for _, slot in self.offer_batch(1):
+            if slot == len(self.items):
+                self.items.append(item)
+            else:
+                self.items[slot] = item
+
+    def offer_batch(self, batch_size: int) -> List[Tuple[int, int]]:
+        """
+        Decide which items of the next batch enter the sample
+
+        Lets callers materialise only the chosen rows of a large batch. The
+        caller must apply the returned pairs to items before the next call.
+        Args:
+            batch_size: Number of items in the batch
+        Returns:
+            List of (position_in_batch, slot) pairs in stream order; a slot
+            equal to the current sample length means append
+        """
+        chosen = []
+        batch_start = self.seen
+        batch_end = self.seen + batch_size
+        filled = len(self.items)
+
+        position = batch_start
+        while filled < self.size and position < batch_end:
+            chosen.append((position - batch_start, filled))
+            filled += 1
+            position += 1
+
+        while self.size > 0 and self._next_index < batch_end:
+            chosen.append((self._next_index - batch_start, self._random.randrange(self.size)))
+            self._shrink_weight()
+            self._next_index += self._gap() + 1
+
+        self.seen = batch_end
+        return chosen
+
+class MinHash:
+    """
+    MinHash signatures estimating Jaccard similarity between sets
+
+    Each of num_perm hash functions is a multiply-shift hash over the
+    32-bit input hashes, evaluated for the whole set at once. The fraction
+    of equal signature slots estimates the Jaccard similarity.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        import numpy as np
+
+        self.num_perm = num_perm
+        rng = np.random.default_rng(seed)
+        # Odd multipliers keep the multiply-shift family universal
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        """
+        Signature of a set of hashed items
+        Args:
+            hashes: 32-bit hashes of the set members (duplicates are harmless)
+        Returns:
+            numpy uint32 array of length num_perm
+        """
+        return self.signatures(hashes, [0])[0]
+
+    def signatures(self, hashes, starts, chunk_items: int = 4096):
+        """
+        Signatures of many sets stored back to back in one hash array
+        Args:
+            hashes: Concatenated 32-bit hashes of every set
+            starts: Offset of each set in hashes (sets must be non-empty)
+            chunk_items: Hashes permuted at once; the num_perm x chunk_items
+                scratch matrix is reused, so keep it cache-sized
+        Returns:
+            numpy uint32 array of shape (len(starts), num_perm)
+        """
+        import numpy as np
+
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.append(starts[1:], len(hashes))
+        result = np.empty((len(starts), self.num_perm), dtype=np.uint32)
+        scratch = np.empty((self.num_perm, chunk_items), dtype=np.uint64)
+        first = 0
+        while first < len(starts):
+            # Take whole sets until the chunk is full (always at least one)
+            last = max(int(np.searchsorted(ends, starts[first] + chunk_items, side="right")), first + 1)
+            block = hashes[starts[first]:ends[last - 1]]
+            if len(block) > scratch.shape[1]:
+                scratch = np.empty((self.num_perm, len(block)), dtype=np.uint64)
+            permuted = scratch[:, :len(block)]
+            # Multiply-shift hashing; uint64 arithmetic wraps modulo 2**64 by design.
+            # The shift is monotonic, so it is applied to the minima rather than every value.
+            np.multiply(self.a[:, None], block[None, :], out=permuted)
+            permuted += self.b[:, None]
+            minima = np.minimum.reduceat(permuted, starts[first:last] - starts[first], axis=1)
+            result[first:last] = (minima >> np.uint64(32)).T
+            first = last
+        return result
+
+    @staticmethod
+    def similarity(first, second) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        import numpy as np
+
+        return float(np.count_nonzero(first == second)) / len(first)
+
+    @staticmethod
+    def band_keys(signatures, bands: int):
+        """
+        LSH bucket key per band: signatures sharing any key are candidate pairs
+
+        With r = num_perm / bands rows per band, a pair with similarity s
+        becomes a candidate with probability 1 - (1 - s**r)**bands.
+        Args:
+            signatures: One signature, or a 2-D array with one per row
+            bands: Number of bands (must divide num_perm)
+        Returns:
+            numpy int64 array of shape (..., bands)
+        """
+        import numpy as np
+
+        signatures = np.asarray(signatures, dtype=np.uint64)
+        rows = signatures.reshape(*signatures.shape[:-1], bands, -1)
+        keys = np.full(rows.shape[:-1], 0xCBF29CE484222325, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for column in range(rows.shape[-1]):  # FNV-1a style fold of each band's values
+                keys = (keys ^ rows[..., column]) * np.uint64(0x100000001B3)
+        return keys.view(np.int64)
@@ -0,0 +1,62 @@
+"""Deadlines and cancellation for running SQLite statements"""
+
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Virtual machine instructions between progress handler checks
+CHECK_INTERVAL = 1000
+
+class QueryGuard:
+    """
+    Abort a connection's statements once a deadline passes or a cancel event is set
+
+    Installs a progress handler for the duration of the with-block. When the
+    handler returns non-zero SQLite stops the statement, and the pending
+    execute() or fetchmany() raises sqlite3.OperationalError("interrupted").
+    """
+
+    def __init__(self, conn: sqlite3.Connection, timeout: Optional[float],
+                 cancel_event: Optional[threading.Event] = None):
+        self.conn = conn
+        self.timeout = timeout
+        self.cancel_event = cancel_event
+        self.deadline = None
+        self.reason: Optional[str] = None
+        self.checks = 0
+
+    def __enter__(self) -> "QueryGuard":
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+        self.conn.set_progress_handler(self._check, CHECK_INTERVAL)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.set_progress_handler(None, 0)
+
+    def _check(self) -> int:
+        """Progress handler; non-zero aborts the running statement"""
+        self.checks += 1
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            self.reason = "cancelled"
+            return 1
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.reason = "timeout"
+            return 1
+        return 0
+
+    @property
+    def vm_steps(self) -> int:
+        """Approximate number of VM instructions run while the guard was active"""
+        return self.checks * CHECK_INTERVAL
+
+    def interrupted(self, error: BaseException) -> bool:
+        """Whether an exception was caused by this guard stopping the statement"""
+        return self.reason is not None and isinstance(error, sqlite3.OperationalError)
+
+    def describe(self) -> str:
+        """Human-readable reason for the interruption"""
+        if self.reason == "cancelled":
+            return "Query cancelled by client"
+        return f"Query exceeded its {self.timeout:g}s time limit"
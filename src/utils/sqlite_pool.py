@@ -0,0 +1,102 @@
+"""Pooled SQLite connections with tuned pragmas"""
+
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+class SQLitePool:
+    """
+    Per-thread pool of persistent SQLite connections
+
+    Each thread reuses one long-lived connection so the schema and page
+    cache stay warm between calls. Connections run in WAL mode so readers
+    do not block behind the writer.
+    """
+
+    def __init__(self, db_path: str, cache_size_kb: int = 65536,
+                 mmap_size: int = 268435456, busy_timeout_ms: int = 5000,
+                 cached_statements: int = 128):
+        self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a new connection and apply the pragmas"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.cached_statements,  # Prepared statements reused per connection
+            check_same_thread=False  # Only the owning thread uses it; close_all() may run elsewhere
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, opening it on first use"""
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+            self._prune_dead_threads()
+            conn = self._open()
+            self._connections[threading.get_ident()] = (threading.current_thread(), conn)
+
+        self._local.conn = conn
+        return conn
+
+    def detach(self) -> sqlite3.Connection:
+        """
+        Hand the calling thread's connection over to the caller
+
+        The pool forgets the connection (the thread gets a fresh one next
+        time) and the caller becomes responsible for closing it. Used to
+        keep a cursor open beyond the current call.
+        """
+        conn = self.connection()
+        with self._lock:
+            self._connections.pop(threading.get_ident(), None)
+        self._local.conn = None
+        return conn
+
+    def _prune_dead_threads(self) -> None:
+        """Close connections owned by threads that have exited"""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._connections[ident]
+
+    @property
+    def size(self) -> int:
+        """Number of open connections"""
+        return len(self._connections)
+
+    def close_all(self) -> None:
+        """Checkpoint the WAL and close every pooled connection"""
+        with self._lock:
+            self._closed = True
+            for _, conn in self._connections.values():
+                try:
+                    conn.execute("PRAGMA optimize")
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"Error closing connection to {self.db_path}: {str(e)}")
+            self._connections.clear()
+        self._local = threading.local()
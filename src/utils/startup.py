@@ -0,0 +1,28 @@
+"""Cold-start phase timing"""
+
+import time
+from typing import Any, Dict, List, Tuple
+
+class StartupTimer:
+    """Record how long each startup phase took, in order"""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._last = self._started
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """Close the current phase under the given name"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self) -> Dict[str, Any]:
+        """Per-phase and total times in milliseconds"""
+        return {
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases},
+            "total_ms": round((self._last - self._started) * 1000, 1)
+        }
+
+# Started as early as possible by the server module
+startup_timer = StartupTimer()
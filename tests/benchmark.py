@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the notes, file and resource operations
+
+Generates synthetic fixtures (a notes database, a large CSV and log file,
+and a deep directory tree), times each operation and compares the medians
+against a stored baseline. Exits non-zero when an operation is slower than
+its baseline by more than the regression threshold.
+
+    python tests/benchmark.py                      # small scale, compare to baseline
+    python tests/benchmark.py --scale full         # 1M notes, ~2GB CSV, 100k-entry tree
+    python tests/benchmark.py --update-baseline    # record the current timings
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add src to path
+current_dir = Path(__file__).parent
+project_root = current_dir.parent
+src_dir = project_root / "src"
+sys.path.insert(0, str(src_dir))
+
+from config.settings import get_settings
+
+# Fixture sizes per scale
+SCALES = {
+    "small": {"notes": 20000, "csv_rows": 200000, "log_lines": 200000, "tree_dirs": 50, "files_per_dir": 100},
+    "medium": {"notes": 200000, "csv_rows": 5000000, "log_lines": 2000000, "tree_dirs": 200, "files_per_dir": 250},
+    "full": {"notes": 1000000, "csv_rows": 40000000, "log_lines": 20000000, "tree_dirs": 400, "files_per_dir": 250}
+}
+
+WORDS = ("python sqlite meeting roadmap groceries budget travel reading fitness project "
+         "deadline review design notes idea research draft release backlog").split()
+
+DEFAULT_BASELINE = current_dir / "benchmark_baseline.json"
+
+def generate_notes(db_path: str, count: int) -> None:
+    """Build a notes database through the bulk import path"""
+    from tools.database_tools import DatabaseTools
+
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    db_tools = DatabaseTools(db_path)
+    batch = []
+    for i in range(count):
+        created_at = start + timedelta(seconds=i * 60)
+        batch.append({
+            "title": f"{rng.choice(WORDS).title()} note {i}",
+            "content": " ".join(rng.choice(WORDS) for _ in range(40)),
+            "created_at": created_at.strftime("%Y-%m-%d %H:%M:%S")
+        })
+        if len(batch) == 10000:
+            db_tools.bulk_create_notes(batch, batch_size=10000)
+            batch = []
+    if batch:
+        db_tools.bulk_create_notes(batch, batch_size=10000)
+    db_tools.close()
+
+def generate_csv(csv_path: str, rows: int) -> None:
+    """Write a four-column CSV in chunks"""
+    rng = random.Random(7)
+    categories = [f"category_{i}" for i in range(50)]
+    with open(csv_path, "w") as f:
+        f.write("id,value,category,timestamp\n")
+        for chunk_start in range(0, rows, 100000):
+            chunk = []
+            for i in range(chunk_start, min(chunk_start + 100000, rows)):
+                chunk.append(f"{i},{rng.random() * 1000:.4f},{categories[i % 50]},2024-01-{i % 28 + 1:02d}T12:00:00\n")
+            f.write("".join(chunk))
+
+def generate_log(log_path: str, lines: int) -> None:
+    """Write a plain-text log file"""
+    with open(log_path, "w") as f:
+        for chunk_start in range(0, lines, 100000):
+            f.write("".join(f"2024-01-01 12:00:00 INFO request {i} handled in {i % 97}ms\n"
+                            for i in range(chunk_start, min(chunk_start + 100000, lines))))
+
+def generate_tree(root: str, dirs: int, files_per_dir: int) -> None:
+    """Create a two-level directory tree of small files, a few containing a search needle"""
+    for d in range(dirs):
+        directory = os.path.join(root, f"group_{d // 20:02d}", f"dir_{d:04d}")
+        os.makedirs(directory, exist_ok=True)
+        for i in range(files_per_dir):
+            with open(os.path.join(directory, f"file_{i:05d}.txt"), "w") as f:
+                f.write(f"file {i} in directory {d}\n" + ("benchmark needle\n" if i % 500 == 0 else ""))
+
+def prepare_fixtures(fixtures_dir: str, scale: str) -> dict:
+    """Generate any fixtures that are missing and return their paths"""
+    sizes = SCALES[scale]
+    base = os.path.join(fixtures_dir, scale)
+    os.makedirs(base, exist_ok=True)
+    paths = {
+        "notes_db": os.path.join(base, "notes.db"),
+        "csv": os.path.join(base, "data.csv"),
+        "log": os.path.join(base, "app.log"),
+        "tree": os.path.join(base, "tree")
+    }
+    steps = [
+        ("notes_db", lambda: generate_notes(paths["notes_db"], sizes["notes"])),
+        ("csv", lambda: generate_csv(paths["csv"], sizes["csv_rows"])),
+        ("log", lambda: generate_log(paths["log"], sizes["log_lines"])),
+        ("tree", lambda: generate_tree(paths["tree"], sizes["tree_dirs"], sizes["files_per_dir"]))
+    ]
+    for name, generate in steps:
+        marker = os.path.join(base, f".{name}.done")
+        if os.path.exists(marker):
+            continue
+        print(f"🏗️ Generating {name} fixture ({scale})...")
+        started = time.perf_counter()
+        if os.path.isdir(paths[name]):
+            shutil.rmtree(paths[name])
+        elif os.path.exists(paths[name]):
+            os.remove(paths[name])
+        generate()
+        open(marker, "w").close()
+        print(f"   done in {time.perf_counter() - started:.1f}s")
+    return paths
+
+def build_operations(paths: dict, scratch_dir: str) -> dict:
+    """Benchmarked operations; each value is (setup or None, operation)"""
+    from tools.database_tools import DatabaseTools
+    from tools.file_tools import FileTools
+    from tools.search_tools import SearchTools
+    from resources.file_resources import FileResources
+    from resources.workspace_index import WorkspaceIndex
+    from utils.cursors import encode_cursor
+    from utils.result_cache import get_result_cache
+
+    db_tools = DatabaseTools(paths["notes_db"])
+    db_tools.query_stats.slow_ms = float("inf")  # Keep plan capture out of the timings
+    cache = get_result_cache()
+    total_notes = db_tools.execute_query("SELECT COUNT(*) AS n FROM notes")["data"][0]["n"]
+    old_note = db_tools.execute_query(
+        "SELECT created_at, id FROM notes ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+        (int(total_notes * 0.9),)
+    )["data"][0]
+    deep_cursor = encode_cursor({"kind": "recent", "created_at": old_note["created_at"], "id": old_note["id"]})
+    total_lines = SCALES[paths["scale"]]["log_lines"]
+    flat_dir = os.path.join(paths["tree"], "group_00", "dir_0000")
+    index_db = os.path.join(scratch_dir, "index.db")
+
+    def scratch_db() -> DatabaseTools:
+        scratch_path = os.path.join(scratch_dir, "scratch.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(scratch_path + suffix):
+                os.remove(scratch_path + suffix)
+        return DatabaseTools(scratch_path)
+
+    def bulk_import():
+        scratch = scratch_db()
+        result = scratch.bulk_create_notes([{"title": f"Note {i}", "content": "benchmark " * 20} for i in range(10000)])
+        scratch.close()
+        return result
+
+    def single_inserts():
+        scratch = scratch_db()
+        for i in range(200):
+            check_result(scratch.create_note(f"Note {i}", "benchmark " * 20))
+        scratch.close()
+
+    def sql_page():
+        result = db_tools.execute_query("SELECT * FROM notes", max_rows=500)
+        if result.get("continuation"):
+            db_tools.result_cursors.close(result["continuation"])
+        return result
+
+    def index_full_refresh():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(index_db + suffix):
+                os.remove(index_db + suffix)
+        tree_index = WorkspaceIndex(paths["tree"], index_db)
+        result = tree_index.refresh(full=True, timeout=math.inf, max_nodes=10**9)
+        tree_index.close()
+        return result
+
+    def index_incremental_refresh():
+        tree_index = WorkspaceIndex(paths["tree"], index_db)
+        result = tree_index.refresh(timeout=math.inf, max_nodes=10**9)
+        tree_index.close()
+        return result
+
+    return {
+        "notes.bulk_import_10k": (None, bulk_import),
+        "notes.create_note_x200": (None, single_inserts),
+        "notes.recent_first_page": (None, lambda: db_tools.get_notes(20)),
+        "notes.recent_deep_page": (None, lambda: db_tools.get_notes(20, after=deep_cursor)),
+        "notes.search_common": (None, lambda: db_tools.search_notes("python", limit=20)),
+        "notes.search_rare": (None, lambda: db_tools.search_notes("note 12345", limit=20)),
+        "notes.sql_count": (None, lambda: db_tools.execute_query("SELECT COUNT(*) FROM notes")),
+        "notes.sql_bounded_page": (None, sql_page),
+        "files.read_head": (None, lambda: FileTools.read_text_file(paths["log"], max_lines=200)),
+        "files.read_middle": (None, lambda: FileTools.read_text_file(paths["log"], start_line=total_lines // 2, max_lines=200)),
+        "files.read_tail": (None, lambda: FileTools.read_text_file(paths["log"], tail_lines=200)),
+        "csv.preview_cold": (cache.clear, lambda: FileTools.read_csv_file(paths["csv"], max_rows=100)),
+        "csv.profile_cold": (cache.clear, lambda: FileTools.read_csv_file(paths["csv"], profile=True)),
+        "csv.profile_cached": (None, lambda: FileTools.read_csv_file(paths["csv"], profile=True)),
+        "files.list_directory": (None, lambda: FileTools.list_directory(flat_dir, sort_by="size")),
+        "resources.file_info_cold": (cache.clear, lambda: FileResources.get_file_info(paths["csv"])),
+        "resources.directory_tree": (None, lambda: FileResources.get_directory_tree(paths["tree"], max_depth=3, max_nodes=10 ** 9)),
+        "index.full_refresh": (None, index_full_refresh),
+        "index.incremental_refresh": (None, index_incremental_refresh),
+        "search.content": (None, lambda: SearchTools.search_content("benchmark needle", paths["tree"]))
+    }, db_tools
+
+class OperationFailed(Exception):
+    """An operation reported failure, so its timing is not a valid sample"""
+
+def check_result(result) -> None:
+    """Raise OperationFailed if a result reports an error, a timeout or a partial answer"""
+    if not isinstance(result, dict):
+        return
+    if result.get("success") is False or result.get("error"):
+        raise OperationFailed(str(result.get("error") or "success: false"))
+    for flag in ("timed_out", "partial", "response_truncated"):
+        if result.get(flag):
+            raise OperationFailed(f"result has {flag}: true")
+
+def time_operation(setup, operation, repeat: int) -> dict:
+    """
+    Run an operation once to warm up, then repeat times; returns timings in seconds
+
+    Every result is checked, so a failing operation cannot pass for a fast one.
+    """
+    if setup:
+        setup()
+    check_result(operation())
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        result = operation()
+        samples.append(time.perf_counter() - started)
+        check_result(result)
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "max_s": max(samples)}
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """Operations slower than baseline * threshold (and by more than min_delta_ms)"""
+    regressions = []
+    thresholds = baseline.get("thresholds", {})
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        limit = thresholds.get(name, threshold)
+        ratio = current["median_s"] / previous["median_s"] if previous["median_s"] else 1.0
+        if ratio > limit and (current["median_s"] - previous["median_s"]) * 1000 > min_delta_ms:
+            regressions.append((name, previous["median_s"], current["median_s"], ratio, limit))
+    return regressions
+
+def main():
+    """Run the benchmarks"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "mcp-benchmarks"),
+                        help="Where generated fixtures are kept between runs")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true", help="Store these timings as the baseline")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="Fail when median time exceeds baseline by this factor")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Ignore slowdowns smaller than this, to absorb timer noise on fast operations")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="Run only operations whose name starts with this prefix")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.logs_dir = os.path.join(args.fixtures_dir, "logs")  # Keep benchmark logs out of the workspace
+
+    print(f"⏱️ MCP Server Benchmarks ({args.scale} scale)")
+    print("=" * 50)
+    paths = prepare_fixtures(args.fixtures_dir, args.scale)
+    paths["scale"] = args.scale
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        operations, db_tools = build_operations(paths, scratch_dir)
+        results = {}
+        failures = []
+        for name, (setup, operation) in operations.items():
+            if args.only and not name.startswith(args.only):
+                continue
+            try:
+                results[name] = time_operation(setup, operation, args.repeat)
+            except OperationFailed as e:
+                failures.append((name, str(e)))
+                print(f"   {name:<30} FAILED: {e}")
+                continue
+            print(f"   {name:<30} median {results[name]['median_s'] * 1000:10.2f}ms   "
+                  f"min {results[name]['min_s'] * 1000:10.2f}ms")
+        db_tools.close()
+
+    if failures:
+        print("=" * 50)
+        for name, error in failures:
+            print(f"❌ {name} failed: {error}")
+        return 1
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        stored = baseline if baseline.get("scale") == args.scale else {"thresholds": baseline.get("thresholds", {})}
+        stored.update({
+            "scale": args.scale,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine()
+        })
+        stored.setdefault("results", {}).update(results)
+        stored.setdefault("thresholds", {})
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\n💡 No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    if baseline.get("scale") != args.scale:
+        print(f"\n💡 Baseline was recorded at {baseline.get('scale')} scale; not comparing")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    print("=" * 50)
+    if regressions:
+        for name, before, after, ratio, limit in regressions:
+            print(f"❌ {name}: {before * 1000:.2f}ms -> {after * 1000:.2f}ms ({ratio:.2f}x, limit {limit}x)")
+        return 1
+    print(f"✅ No operation slower than {args.threshold}x baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -86,6 +86,1242 @@ def test_basic_functionality():
         print(f"❌ Functionality test failed: {e}")
         return False
 
+def test_note_search():
+    """Test full-text note search ranking and pagination"""
+    print("🔎 Testing note search...")
+    
+    try:
+        import tempfile
+        from tools.database_tools import DatabaseTools
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_tools = DatabaseTools(os.path.join(tmp_dir, "notes.db"))
+            db_tools.create_note("Groceries", "milk and eggs")
+            db_tools.create_note("Python tips", "use python generators for python pipelines")
+            db_tools.create_note("Meeting", "discussed python roadmap")
+            
+            result = db_tools.search_notes("python", limit=1)
+            assert result["success"] and result["count"] == 1
+            if db_tools.fts_enabled:
+                assert result["search_mode"] == "fts5"
+                assert result["data"][0]["title"] == "Python tips"
+                assert "[python]" in result["data"][0]["snippet"]
+            
+            second_page = db_tools.search_notes("python", limit=1, offset=1)
+            assert second_page["count"] == 1
+            assert second_page["data"][0]["id"] != result["data"][0]["id"]
+            
+            # Notes written before the index existed are backfilled
+            db_tools.execute_query("DROP TABLE notes_fts")
+            reopened = DatabaseTools(db_tools.db_path)
+            assert reopened.search_notes("eggs")["count"] == 1
+            reopened.close()
+            db_tools.close()
+        
+        print("✅ Note search tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Note search test failed: {e}")
+        return False
+
+def test_connection_pool():
+    """Test that database connections are pooled and tuned"""
+    print("🔌 Testing connection pool...")
+    
+    try:
+        import tempfile
+        import threading
+        from tools.database_tools import DatabaseTools
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_tools = DatabaseTools(os.path.join(tmp_dir, "notes.db"))
+            conn = db_tools.pool.connection()
+            db_tools.create_note("Pooled", "reuses the same connection")
+            assert db_tools.pool.connection() is conn
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            
+            # Each thread gets its own connection
+            other = []
+            worker = threading.Thread(target=lambda: other.append(db_tools.pool.connection()))
+            worker.start()
+            worker.join()
+            assert other[0] is not conn and db_tools.pool.size == 2
+            
+            db_tools.close()
+            assert db_tools.pool.size == 0
+        
+        print("✅ Connection pool tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Connection pool test failed: {e}")
+        return False
+
+def test_tool_concurrency():
+    """Test that blocking work is offloaded under per-tool limits"""
+    print("🧵 Testing tool concurrency limits...")
+    
+    try:
+        import asyncio
+        import threading
+        import time
+        from config.settings import get_settings
+        from utils.concurrency import run_blocking
+        
+        get_settings().tool_concurrency_limits["slow_tool"] = 2
+        active = []
+        peak = []
+        lock = threading.Lock()
+        
+        def slow_work():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return threading.current_thread().name
+        
+        async def run():
+            results = await asyncio.gather(*[run_blocking("slow_tool", slow_work) for _ in range(6)])
+            return results
+        
+        names = asyncio.run(run())
+        assert all(name.startswith("mcp-worker") for name in names)
+        assert max(peak) <= 2
+        
+        print("✅ Tool concurrency tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Tool concurrency test failed: {e}")
+        return False
+
+def test_ranged_file_reads():
+    """Test line-range, tail and cursor-based file reads"""
+    print("📄 Testing ranged file reads...")
+    
+    try:
+        import tempfile
+        from tools.file_tools import FileTools
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, "app.log")
+            with open(log_path, "w") as f:
+                f.writelines(f"line {i}\n" for i in range(1, 5001))
+            
+            result = FileTools.read_text_file(log_path, start_line=4097, max_lines=2)
+            assert result["content"] == "line 4097\nline 4098\n"
+            assert result["total_lines"] == 5000 and not result["eof"]
+            
+            tail = FileTools.read_text_file(log_path, tail_lines=2)
+            assert tail["content"] == "line 4999\nline 5000\n" and tail["eof"]
+            
+            # Following cursors visits every line exactly once
+            page = FileTools.read_text_file(log_path, max_lines=1500)
+            seen = page["lines"]
+            while not page["eof"]:
+                page = FileTools.read_text_file(log_path, cursor=page["next_cursor"])
+                assert page["content"].startswith(f"line {page['start_line']}\n")
+                seen += page["lines"]
+            assert seen == 5000
+            
+            # Form feeds and other splitlines() separators are not line breaks for the line index
+            feed_path = os.path.join(tmp_dir, "feeds.txt")
+            with open(feed_path, "w", newline="") as f:
+                f.writelines(f"page\f{i}\x0bx\r{i}\n" for i in range(1, 7))
+            page = FileTools.read_text_file(feed_path, max_lines=3)
+            assert page["lines"] == 3
+            page = FileTools.read_text_file(feed_path, cursor=page["next_cursor"])
+            assert page["start_line"] == 4 and page["content"].startswith("page\f4")
+        
+        print("✅ Ranged file read tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Ranged file read test failed: {e}")
+        return False
+
+def test_csv_profile():
+    """Test whole-file streaming CSV profiling"""
+    print("📈 Testing CSV profiling...")
+    
+    try:
+        import tempfile
+        from tools.csv_profiler import profile_csv
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, "data.csv")
+            with open(csv_path, "w") as f:
+                f.write("id,category,score\n")
+                for i in range(5000):
+                    score = "" if i % 10 == 0 else str(i % 100)
+                    f.write(f"{i},cat{i % 7},{score}\n")
+            
+            result = profile_csv(csv_path, chunk_rows=512, sample_size=5)
+            stats = {column["name"]: column for column in result["column_stats"]}
+            
+            assert result["rows"] == 5000
+            assert stats["id"]["min"] == 0 and stats["id"]["max"] == 4999
+            assert stats["id"]["mean"] == 2499.5
+            assert stats["score"]["null_count"] == 500
+            assert stats["category"]["type"] == "text"
+            assert stats["category"]["approx_distinct"] == 7
+            assert abs(stats["id"]["approx_distinct"] - 5000) < 250
+            assert len(result["sample_data"]) == 5
+        
+        print("✅ CSV profiling tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ CSV profiling test failed: {e}")
+        return False
+
+def test_result_cache():
+    """Test fingerprint-keyed result caching"""
+    print("🗃️ Testing result cache...")
+    
+    try:
+        import tempfile
+        from utils.result_cache import ResultCache
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "data.csv")
+            with open(file_path, "w") as f:
+                f.write("a,b\n1,2\n")
+            
+            calls = []
+            def compute():
+                calls.append(1)
+                return {"success": True, "rows": len(calls)}
+            
+            cache = ResultCache(max_entries=2, disk_dir=os.path.join(tmp_dir, "cache"))
+            cache.get_or_compute("csv", file_path, {"max_rows": 10}, compute)
+            assert cache.get_or_compute("csv", file_path, {"max_rows": 10}, compute)["rows"] == 1
+            assert cache.get_or_compute("csv", file_path, {"max_rows": 20}, compute)["rows"] == 2
+            assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+            
+            # Modifying the file changes its fingerprint
+            with open(file_path, "a") as f:
+                f.write("3,4\n")
+            assert cache.get_or_compute("csv", file_path, {"max_rows": 10}, compute)["rows"] == 3
+            assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+            
+            # A fresh cache is served from the disk tier
+            restarted = ResultCache(disk_dir=os.path.join(tmp_dir, "cache"))
+            assert restarted.get_or_compute("csv", file_path, {"max_rows": 10}, compute)["rows"] == 3
+            assert restarted.stats()["disk_hits"] == 1
+        
+        print("✅ Result cache tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Result cache test failed: {e}")
+        return False
+
+def test_note_pagination():
+    """Test keyset pagination of recent and searched notes"""
+    print("📑 Testing note pagination...")
+    
+    try:
+        import tempfile
+        from tools.database_tools import DatabaseTools
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_tools = DatabaseTools(os.path.join(tmp_dir, "notes.db"))
+            for i in range(25):
+                db_tools.create_note(f"Note {i}", f"shared keyword {i}")
+            
+            for fetch in (lambda after: db_tools.get_notes(10, after),
+                          lambda after: db_tools.search_notes("keyword", 10, after=after)):
+                ids, after = [], None
+                while True:
+                    page = fetch(after)
+                    assert page["success"]
+                    ids.extend(row["id"] for row in page["data"])
+                    after = page["next_cursor"]
+                    if after is None:
+                        break
+                assert sorted(ids) == list(range(1, 26))
+            
+            assert db_tools.get_notes(5)["data"][0]["id"] == 25
+            assert not db_tools.get_notes(5, after="garbage")["success"]
+            db_tools.close()
+        
+        print("✅ Note pagination tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Note pagination test failed: {e}")
+        return False
+
+def test_bulk_note_import():
+    """Test batched note import from lists and directories"""
+    print("📥 Testing bulk note import...")
+    
+    try:
+        import json
+        import tempfile
+        from tools.database_tools import DatabaseTools
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_tools = DatabaseTools(os.path.join(tmp_dir, "notes.db"))
+            
+            notes = [{"title": f"Imported {i}", "content": "bulk"} for i in range(7)]
+            notes.insert(3, {"content": "no title"})
+            result = db_tools.bulk_create_notes(notes, batch_size=3)
+            assert result["inserted"] == 7 and result["skipped"] == 1
+            assert result["skipped_entries"][0]["source"] == "notes[3]"
+            assert [batch["rows"] for batch in result["batches"]] == [3, 3, 1]
+            
+            notes_dir = os.path.join(tmp_dir, "export")
+            os.makedirs(notes_dir)
+            with open(os.path.join(notes_dir, "idea.md"), "w") as f:
+                f.write("# Big idea\n\nWrite it down.\n")
+            with open(os.path.join(notes_dir, "log.jsonl"), "w") as f:
+                f.write(json.dumps({"title": "From JSONL", "content": "x",
+                                    "created_at": "2024-01-01 09:00:00"}) + "\n")
+                f.write("{not json}\n")
+            result = db_tools.import_notes_from_directory(notes_dir)
+            assert result["inserted"] == 2 and result["skipped"] == 1
+            
+            found = db_tools.search_notes("Big idea")["data"][0]
+            assert found["content"] == "Write it down."
+            oldest = db_tools.execute_query("SELECT MIN(created_at) AS t FROM notes")["data"][0]["t"]
+            assert oldest == "2024-01-01 09:00:00"
+            
+            # Timestamps are normalised to SQLite's UTC format so they sort with CURRENT_TIMESTAMP
+            result = db_tools.bulk_create_notes([
+                {"title": "ISO", "content": "x", "created_at": "2023-06-01T12:30:00Z"},
+                {"title": "Offset", "content": "x", "created_at": "2023-06-01T14:00:00+02:00"},
+                {"title": "Epoch", "content": "x", "created_at": 1672531200},
+                {"title": "Garbage", "content": "x", "created_at": "last tuesday"}
+            ])
+            assert result["inserted"] == 3 and result["skipped_entries"][0]["source"] == "notes[3]"
+            stamps = {row["title"]: row["created_at"] for row in db_tools.execute_query(
+                "SELECT title, created_at FROM notes WHERE title IN ('ISO', 'Offset', 'Epoch')")["data"]}
+            assert stamps == {"ISO": "2023-06-01 12:30:00", "Offset": "2023-06-01 12:00:00",
+                              "Epoch": "2023-01-01 00:00:00"}
+            recent = db_tools.get_notes(limit=100)["data"]
+            assert [note["title"] for note in recent[-3:]] == ["ISO", "Offset", "Epoch"]
+            db_tools.close()
+        
+        print("✅ Bulk note import tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Bulk note import test failed: {e}")
+        return False
+
+def test_directory_listing():
+    """Test sorted, filtered and paginated directory listings"""
+    print("📂 Testing directory listing...")
+    
+    try:
+        import tempfile
+        from tools.file_tools import FileTools
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for i in range(12):
+                with open(os.path.join(tmp_dir, f"file{i:02d}.txt"), "w") as f:
+                    f.write("x" * i)
+            os.makedirs(os.path.join(tmp_dir, "subdir"))
+            
+            listing = FileTools.list_directory(tmp_dir, sort_by="size", descending=True,
+                                               pattern="*.txt", limit=5)
+            assert listing["total_items"] == 12 and listing["returned"] == 5
+            assert [item["size"] for item in listing["items"]] == [11, 10, 9, 8, 7]
+            
+            names = [item["name"] for item in listing["items"]]
+            while listing["next_cursor"]:
+                listing = FileTools.list_directory(tmp_dir, sort_by="size", descending=True,
+                                                   pattern="*.txt", limit=5,
+                                                   cursor=listing["next_cursor"])
+                names.extend(item["name"] for item in listing["items"])
+            assert names == [f"file{i:02d}.txt" for i in range(11, -1, -1)]
+            
+            dirs = FileTools.list_directory(tmp_dir, entry_type="directory")
+            assert [item["name"] for item in dirs["items"]] == ["subdir"]
+        
+        print("✅ Directory listing tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Directory listing test failed: {e}")
+        return False
+
+def test_workspace_index():
+    """Test incremental workspace indexing and file queries"""
+    print("🗂️ Testing workspace index...")
+    
+    try:
+        import shutil
+        import tempfile
+        from config.settings import get_settings
+        from resources.workspace_index import WorkspaceIndex
+        
+        with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as data_dir:
+            for name in ("docs", "src"):
+                os.makedirs(os.path.join(root, name, "nested"))
+                for i in range(3):
+                    with open(os.path.join(root, name, "nested", f"file{i}.py"), "w") as f:
+                        f.write("x" * (i + 1) * 100)
+            
+            index = WorkspaceIndex(root, os.path.join(data_dir, "index.db"))
+            assert index.refresh()["directories_rescanned"] == 5
+            assert index.refresh()["directories_rescanned"] == 0
+            
+            stats = index.get_stats()
+            assert stats["total_directories"] == 2 and stats["recursive_files"] == 6
+            
+            big = index.find_files(extension="py", min_size=200, order_by="size")
+            assert big["count"] == 4 and big["files"][0]["size"] == 300
+            
+            # Only the changed directories are re-listed
+            shutil.rmtree(os.path.join(root, "docs"))
+            with open(os.path.join(root, "src", "new.md"), "w") as f:
+                f.write("# new")
+            assert index.refresh()["directories_rescanned"] == 2
+            assert index.get_stats()["recursive_files"] == 4
+            assert index.find_files(name_pattern="*.md")["count"] == 1
+            
+            # In-place edits: written files update at once, others on the periodic full rescan
+            edited = os.path.join(root, "src", "nested", "file0.py")
+            with open(edited, "a") as f:
+                f.write("y" * 900)
+            assert index.refresh()["directories_rescanned"] == 0
+            assert index.find_files(min_size=1000)["count"] == 0
+            index.file_written(edited)
+            assert index.find_files(min_size=1000)["files"][0]["path"] == edited
+            with open(os.path.join(root, "src", "new.md"), "a") as f:
+                f.write("x" * 2000)
+            index._last_full_refresh -= get_settings().workspace_index_full_refresh_seconds
+            assert index.refresh()["full"]
+            assert index.find_files(min_size=1000)["count"] == 2
+            index.close()
+            
+            # A refresh past its node budget stops, reports truncated and is resumed by the next one
+            index = WorkspaceIndex(root, os.path.join(data_dir, "bounded.db"))
+            first = index.refresh(max_nodes=2)
+            assert first["truncated"] and first["full"] and index.find_files()["truncated"]
+            passes = 1
+            while index.refresh(max_nodes=2)["truncated"]:
+                passes += 1
+            assert passes > 1 and not index.truncated
+            assert index.get_stats()["recursive_files"] == 4 and index._last_full_refresh is not None
+            assert index.refresh(timeout=0)["truncated"]
+            # Callers arriving mid-refresh are answered from the index instead of waiting
+            with index._refresh_lock:
+                assert index.refresh(max_age=0)["in_progress"]
+            index.close()
+            
+            # The server's own data directory is left out
+            settings = get_settings()
+            original = settings.data_dir
+            settings.data_dir = os.path.join(root, "data")
+            try:
+                os.makedirs(settings.data_dir)
+                with open(os.path.join(settings.data_dir, "notes.db-wal"), "w") as f:
+                    f.write("wal")
+                index = WorkspaceIndex(root, os.path.join(data_dir, "index2.db"))
+                assert index.find_files(name_pattern="notes.db*")["count"] == 0
+                assert index.get_stats()["total_directories"] == 1
+                index.close()
+            finally:
+                settings.data_dir = original
+        
+        print("✅ Workspace index tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Workspace index test failed: {e}")
+        return False
+
+def test_content_search():
+    """Test parallel workspace content search"""
+    print("🔍 Testing content search...")
+    
+    try:
+        import tempfile
+        from tools import search_tools
+        from tools.search_tools import SearchTools, shutdown_search_pool
+        
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "app.py"), "w") as f:
+                f.write("import os\n\ndef main():\n    return TODO_value\n")
+            with open(os.path.join(root, "notes.md"), "w") as f:
+                f.write("todo: write docs\n")
+            with open(os.path.join(root, "image.bin"), "wb") as f:
+                f.write(b"TODO\0\0binary")
+            
+            streamed = []
+            result = SearchTools.search_content("TODO", root=root, ignore_case=True,
+                                                context_lines=1, on_match=streamed.append)
+            files = {entry["file"]: entry["matches"] for entry in result["results"]}
+            assert set(files) == {"app.py", "notes.md"} and len(streamed) == 2
+            assert files["app.py"][0]["line"] == 4
+            assert files["app.py"][0]["before"] == ["def main():"]
+            assert result["files_skipped"] == 1
+            
+            regex = SearchTools.search_content(r"def \w+\(", root=root, regex=True, file_glob="*.py")
+            assert regex["total_matches"] == 1
+            
+            limited = SearchTools.search_content("o", root=root, max_results=1)
+            assert limited["total_matches"] == 1 and limited["truncated"]
+            
+            # Many files go out in batches to process_pool workers (fresh interpreters, not forks)
+            many = os.path.join(root, "many")
+            os.makedirs(many)
+            for i in range(150):
+                with open(os.path.join(many, f"f{i}.txt"), "w") as f:
+                    f.write(f"line one\nneedle {i}\n")
+            batched = SearchTools.search_content("needle", root=many)
+            assert batched["files_searched"] == 150 and batched["total_matches"] == 150
+            workers = search_tools._get_pool()._workers
+            assert workers and all("utils.process_pool" in worker.process.args for worker in workers)
+            shutdown_search_pool()
+        
+        print("✅ Content search tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Content search test failed: {e}")
+        return False
+
+def test_bounded_sql_results():
+    """Test row/byte budgets and continuation tokens for SQL results"""
+    print("📏 Testing bounded SQL results...")
+    
+    try:
+        import tempfile
+        from tools.database_tools import DatabaseTools
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_tools = DatabaseTools(os.path.join(tmp_dir, "notes.db"))
+            db_tools.bulk_create_notes([{"title": f"Note {i}", "content": "x" * 100} for i in range(50)])
+            
+            page = db_tools.execute_query("SELECT id, content FROM notes ORDER BY id", max_rows=20)
+            assert page["count"] == 20 and page["truncated"]
+            ids = [row["id"] for row in page["data"]]
+            
+            # Byte budget cuts pages short; columnar pages list column names once
+            page = db_tools.fetch_more(page["continuation"], max_bytes=1000, result_format="columnar")
+            assert page["columns"] == ["id", "content"] and 0 < page["count"] < 20
+            ids.extend(row[0] for row in page["rows"])
+            
+            while page.get("continuation"):
+                token = page["continuation"]
+                page = db_tools.fetch_more(token, max_rows=20)
+                ids.extend(row["id"] for row in page["data"])
+            assert ids == list(range(1, 51))
+            assert not db_tools.fetch_more(token)["success"]
+            assert db_tools.result_cursors.open_count == 0
+            
+            # The pool keeps working after handing a connection to a cursor
+            assert db_tools.execute_query("SELECT COUNT(*) AS n FROM notes")["data"][0]["n"] == 50
+            db_tools.close()
+        
+        print("✅ Bounded SQL result tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Bounded SQL result test failed: {e}")
+        return False
+
+def test_query_timeouts():
+    """Test query deadlines and cancellation"""
+    print("⏱️ Testing query timeouts and cancellation...")
+    
+    try:
+        import tempfile
+        import threading
+        import time
+        from tools.database_tools import DatabaseTools
+        
+        runaway = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_tools = DatabaseTools(os.path.join(tmp_dir, "notes.db"))
+            
+            started = time.perf_counter()
+            result = db_tools.execute_query(runaway, timeout=0.2)
+            assert not result["success"] and result["timed_out"]
+            assert time.perf_counter() - started < 5
+            
+            # Rows read before the deadline come back as a partial result
+            result = db_tools.execute_query(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT i FROM n",
+                timeout=0.2
+            )
+            assert result["success"] and result["partial"] and result["count"] > 0
+            
+            cancel_event = threading.Event()
+            threading.Timer(0.1, cancel_event.set).start()
+            result = db_tools.execute_query(runaway, cancel_event=cancel_event)
+            assert not result["success"] and result["cancelled"]
+            
+            # The connection is still usable afterwards
+            assert db_tools.execute_query("SELECT 1 AS one")["data"] == [{"one": 1}]
+            db_tools.close()
+        
+        print("✅ Query timeout tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Query timeout test failed: {e}")
+        return False
+
+def test_slow_query_log():
+    """Test query timing, plan capture and the slow-query log"""
+    print("🐢 Testing slow-query log...")
+    
+    try:
+        import tempfile
+        from tools.database_tools import DatabaseTools
+        from tools.query_stats import normalize_sql
+        from prompts import get_optimize_database_prompt
+        
+        assert normalize_sql("SELECT *  FROM notes\n WHERE id = 42 AND title = 'a''b'") == \
+            "SELECT * FROM notes WHERE id = ? AND title = ?"
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_tools = DatabaseTools(os.path.join(tmp_dir, "notes.db"))
+            db_tools.query_stats.slow_ms = 0  # Treat every query as slow
+            db_tools.execute_query("SELECT * FROM notes WHERE content LIKE '%x%'")
+            db_tools.execute_query("SELECT * FROM notes WHERE content LIKE '%y%'")
+            
+            slow = db_tools.query_stats.slow_queries()
+            assert slow[0]["statement"] == "SELECT * FROM notes WHERE content LIKE ?"
+            assert slow[0]["full_scan"] and slow[0]["plan"]
+            summary = {s["statement"]: s for s in db_tools.query_stats.summary()}
+            assert summary["SELECT * FROM notes WHERE content LIKE ?"]["calls"] == 2
+            
+            prompt = get_optimize_database_prompt("notes", slow_queries=slow)
+            assert "full table scan" in prompt
+            db_tools.close()
+        
+        print("✅ Slow-query log tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Slow-query log test failed: {e}")
+        return False
+
+def test_structured_output():
+    """Test JSON encoding, compact mode and the response budget"""
+    print("📦 Testing structured tool output...")
+    
+    try:
+        import json
+        import numpy as np
+        import pandas as pd
+        from utils.serialization import encode_response, to_json, tool_result
+        
+        frame = pd.DataFrame({"a": [1, 2], "b": [0.5, np.nan]})
+        value = {"success": True, "dtypes": frame.dtypes.to_dict(), "total": np.int64(3),
+                 "mean": np.float64("nan"), "when": pd.Timestamp("2024-01-02")}
+        decoded = json.loads(to_json(value))
+        assert decoded["dtypes"] == {"a": "int64", "b": "float64"}
+        assert decoded["total"] == 3 and decoded["mean"] is None
+        assert decoded["when"].startswith("2024-01-02")
+        
+        # Compact mode sends repeated keys once and drops indentation
+        rows = {"success": True, "data": [{"id": i, "title": f"Note {i}"} for i in range(3)]}
+        text, _ = encode_response(rows, compact=True)
+        assert "\n" not in text
+        assert json.loads(text)["data"] == {"columns": ["id", "title"],
+                                            "rows": [[0, "Note 0"], [1, "Note 1"], [2, "Note 2"]]}
+        
+        # Oversized responses are trimmed and say so; the input is left intact
+        big = {"success": True, "data": [{"id": i, "text": "x" * 100} for i in range(1000)]}
+        text, trimmed = encode_response(big, compact=False, max_bytes=10000)
+        assert len(text.encode("utf-8")) <= 10000
+        assert trimmed["response_truncated"] and 0 < len(trimmed["data"]) < 1000
+        assert len(big["data"]) == 1000
+        
+        result = tool_result({"success": False, "error": "boom"})
+        assert result.isError and result.structuredContent["error"] == "boom"
+        
+        print("✅ Structured output tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Structured output test failed: {e}")
+        return False
+
+def test_handler_metrics():
+    """Test handler instrumentation and the Prometheus dump"""
+    print("📈 Testing handler metrics...")
+    
+    try:
+        import asyncio
+        import tempfile
+        from utils.metrics import MetricsRegistry
+        
+        registry = MetricsRegistry()
+        
+        @registry.instrument("tool")
+        async def echo(text: str) -> str:
+            return text
+        
+        @registry.instrument("prompt")
+        def broken() -> str:
+            raise ValueError("boom")
+        
+        for _ in range(100):
+            asyncio.run(echo("hello"))
+        try:
+            broken()
+        except ValueError:
+            pass
+        
+        snapshot = registry.snapshot()
+        assert snapshot["handlers"]["echo"]["calls"] == 100
+        assert snapshot["handlers"]["echo"]["response_bytes"] == 500
+        assert snapshot["handlers"]["echo"]["p50_ms"] <= snapshot["handlers"]["echo"]["p99_ms"]
+        assert snapshot["handlers"]["broken"]["errors"] == 1
+        assert echo.__name__ == "echo"  # FastMCP still sees the original handler
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "metrics.prom")
+            registry.write_prometheus(path)
+            with open(path) as f:
+                text = f.read()
+            assert 'mcp_handler_calls_total{kind="tool",handler="echo"} 100' in text
+            assert 'mcp_handler_latency_seconds_bucket{kind="tool",handler="echo",le="+Inf"} 100' in text
+        
+        print("✅ Handler metrics tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Handler metrics test failed: {e}")
+        return False
+
+def test_cold_start():
+    """Test that heavy dependencies load lazily and the database layer is shared"""
+    print("🧊 Testing cold start...")
+    
+    try:
+        import subprocess
+        import tempfile
+        from tools.database_tools import DatabaseTools
+        from resources.data_resources import DataResources
+        from utils.startup import StartupTimer
+        
+        # A fresh interpreter importing the tool and resource packages must not load pandas
+        probe = ("import sys; sys.path.insert(0, sys.argv[1]); import tools, resources; "
+                 "print(sorted(m for m in ('pandas', 'numpy', 'psutil') if m in sys.modules))")
+        loaded = subprocess.run([sys.executable, "-c", probe, str(src_dir)],
+                                capture_output=True, text=True, check=True).stdout.strip()
+        assert loaded == "[]", f"eagerly imported: {loaded}"
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_tools = DatabaseTools(os.path.join(tmp_dir, "notes.db"))
+            data_resources = DataResources(db_tools)
+            assert data_resources.db_tools is db_tools
+            data_resources.close()  # Does not close the shared pool
+            assert db_tools.execute_query("SELECT 1 AS one")["success"]
+            db_tools.close()
+        
+        timer = StartupTimer()
+        timer.mark("phase")
+        assert list(timer.report()["phases_ms"]) == ["phase"]
+        
+        print("✅ Cold start tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Cold start test failed: {e}")
+        return False
+
+def test_system_sampler():
+    """Test background system sampling and history summaries"""
+    print("🖥️ Testing system sampler...")
+    
+    try:
+        import time
+        from resources.system_sampler import SystemSampler
+        
+        sampler = SystemSampler(interval=0.05, history=5)
+        sampler.start()
+        time.sleep(0.5)
+        sampler.stop()
+        
+        assert len(sampler.samples) == 5  # Ring buffer keeps only the newest samples
+        latest = sampler.latest()
+        assert latest["process_rss"] > 0 and "disk_free" in latest
+        
+        summary = sampler.summary(minutes=1)
+        rss = summary["stats"]["process_rss"]
+        assert summary["samples"] >= 5 and rss["min"] <= rss["avg"] <= rss["max"]
+        assert sampler.static_info()["cpu_count"] >= 1
+        
+        print("✅ System sampler tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ System sampler test failed: {e}")
+        return False
+
+def test_note_similarity():
+    """Test the local vector index behind related_notes and semantic_search"""
+    print("🧭 Testing note similarity...")
+    
+    try:
+        import os
+        import tempfile
+        from tools.database_tools import DatabaseTools
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "vectors.db")
+            db = DatabaseTools(db_path)
+            db.bulk_create_notes([
+                {"title": "Sourdough starter", "content": "Feed the starter flour and water before baking bread"},
+                {"title": "Bread baking", "content": "Bake sourdough bread at high heat with a starter"},
+                {"title": "Python asyncio", "content": "Event loops, tasks and coroutines in Python"}
+            ])
+            
+            result = db.semantic_search("baking bread with a starter", limit=3)
+            assert result["success"] and result["indexed_notes"] == 3
+            assert result["data"][0]["title"] in ("Bread baking", "Sourdough starter")
+            assert all(note["title"] != "Python asyncio" for note in result["data"])
+            
+            # Notes added after the index loads are indexed incrementally
+            new_id = db.create_note("Async Python", "asyncio coroutines and tasks")["last_row_id"]
+            related = db.related_notes(new_id, limit=2)
+            assert related["success"] and related["data"][0]["title"] == "Python asyncio"
+            assert all(note["id"] != new_id for note in related["data"])
+            assert not db.related_notes(9999)["success"]
+            
+            # The index is saved next to the database and reloaded
+            db.close()
+            assert os.path.exists(db_path + ".vectors.npz")
+            db = DatabaseTools(db_path)
+            assert db.semantic_search("coroutines")["indexed_notes"] == 4
+            db.close()
+        
+        print("✅ Note similarity tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Note similarity test failed: {e}")
+        return False
+
+def test_duplicate_detection():
+    """Test MinHash/LSH near-duplicate clusters and merging"""
+    print("👯 Testing duplicate detection...")
+    
+    try:
+        import os
+        import tempfile
+        from tools.database_tools import DatabaseTools
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseTools(os.path.join(tmp, "dupes.db"))
+            text = "Call the plumber about the leaking kitchen tap before the weekend"
+            db.bulk_create_notes([
+                {"title": "Plumber", "content": text},
+                {"title": "Plumber", "content": text + "!"},
+                {"title": "Groceries", "content": "Eggs, milk, bread and coffee beans"}
+            ])
+            db.create_note("plumber", text.replace("kitchen", "kitchn") + " and the sink")
+            signed = db.execute_query("SELECT note_id FROM note_minhash WHERE note_id = 4")["data"]
+            assert signed == [{"note_id": 4}]
+            
+            # A note whose signature cannot be written is not created either
+            store = db.duplicates._store
+            db.duplicates._store = lambda conn, notes: (_ for _ in ()).throw(RuntimeError("disk full"))
+            try:
+                assert not db.create_note("Lost", "never committed")["success"]
+            finally:
+                db.duplicates._store = store
+            assert db.execute_query("SELECT COUNT(*) AS n FROM notes")["data"][0]["n"] == 4
+            
+            result = db.find_duplicates(threshold=0.6)
+            assert result["success"] and result["cluster_count"] == 1
+            cluster = result["clusters"][0]
+            assert sorted(note["id"] for note in cluster["notes"]) == [1, 2, 4]
+            
+            # Edits invalidate the stored signature and are re-indexed on the next scan
+            db.execute_query("UPDATE notes SET content = 'Book the dentist' WHERE id = 2")
+            assert len(db.find_duplicates(threshold=0.6)["clusters"][0]["notes"]) == 2
+            
+            merged = db.find_duplicates(threshold=0.6, merge=True)
+            assert merged["clusters"][0]["kept"] == 4 and merged["deleted"] == [1]
+            assert db.find_duplicates(threshold=0.6)["cluster_count"] == 0
+            remaining = db.execute_query("SELECT COUNT(*) AS n FROM note_minhash")["data"][0]["n"]
+            assert remaining == 3
+            db.close()
+        
+        print("✅ Duplicate detection tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Duplicate detection test failed: {e}")
+        return False
+
+def test_file_edits():
+    """Test diff, line-range and append edits with preconditions"""
+    print("✏️ Testing file edits...")
+    
+    try:
+        import os
+        import tempfile
+        from tools.file_tools import FileTools
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "notes.txt")
+            saved = FileTools.write_text_file(path, "".join(f"line {i}\n" for i in range(1, 11)))
+            
+            diff = "--- a/notes.txt\n+++ b/notes.txt\n@@ -2,3 +2,3 @@\n line 2\n-line 3\n+line three\n line 4\n"
+            result = FileTools.edit_text_file(path, "patch", diff=diff, expected_sha256=saved["sha256"])
+            assert result["success"] and result["hunks_applied"] == 1
+            assert result["bytes_removed"] == 7 and result["bytes_inserted"] == 11
+            
+            # The old hash no longer matches, so a stale edit is refused and nothing changes
+            stale = FileTools.edit_text_file(path, "append", content="x\n", expected_sha256=saved["sha256"])
+            assert not stale["success"] and stale["conflict"]
+            mismatch = FileTools.edit_text_file(path, "patch", diff=diff)
+            assert not mismatch["success"] and "does not match" in mismatch["error"]
+            
+            result = FileTools.edit_text_file(path, "replace_lines", start_line=5, end_line=6,
+                                              content="middle", expected_mtime=result["mtime"])
+            assert result["success"] and result["bytes_removed"] == 13 and result["bytes_inserted"] == 6
+            assert FileTools.edit_text_file(path, "append", content="line 11\n")["success"]
+            
+            with open(path) as f:
+                lines = f.read().splitlines()
+            assert lines[2] == "line three" and lines[4] == "middle" and lines[-1] == "line 11"
+            assert len(lines) == 10
+            
+            # Line numbers past the end are refused rather than clamped into an append
+            for start, end in ((50, None), (12, 11), (3, 20)):
+                past = FileTools.edit_text_file(path, "replace_lines", start_line=start, end_line=end, content="x")
+                assert not past["success"] and "past the end" in past["error"]
+            assert FileTools.edit_text_file(path, "replace_lines", start_line=11, content="line 12")["success"]
+            with open(path) as f:
+                assert f.read().splitlines()[-2:] == ["line 11", "line 12"]
+            assert os.listdir(tmp) == ["notes.txt"]  # No temp files left behind
+        
+        print("✅ File edit tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ File edit test failed: {e}")
+        return False
+
+def test_session_concurrency():
+    """Test that blocking work is limited per client session"""
+    print("🧵 Testing per-session concurrency...")
+    
+    try:
+        import asyncio
+        import time
+        from types import SimpleNamespace
+        from mcp.server.lowlevel.server import request_ctx
+        from config.settings import get_settings
+        from utils.concurrency import run_blocking, session_stats, shutdown_executor
+        
+        settings = get_settings()
+        original = settings.session_concurrency
+        settings.session_concurrency = 1
+        
+        async def call(session):
+            request_ctx.set(SimpleNamespace(session=session))
+            await run_blocking("session_test", time.sleep, 0.2)
+        
+        async def timed(*sessions):
+            started = time.perf_counter()
+            await asyncio.gather(*(call(session) for session in sessions))
+            return time.perf_counter() - started
+        
+        class Session:
+            """Stand-in for an MCP server session"""
+        
+        async def scenario():
+            first, second = Session(), Session()
+            timings = await timed(first, first), await timed(first, second)
+            assert session_stats()["sessions"] == 2
+            return timings
+        
+        try:
+            same, separate = asyncio.run(scenario())
+            assert same >= 0.4 and separate < 0.35, (same, separate)
+        finally:
+            settings.session_concurrency = original
+            shutdown_executor()
+        
+        print("✅ Per-session concurrency tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Per-session concurrency test failed: {e}")
+        return False
+
+def test_process_pool():
+    """Test warm worker processes, deadlines and CSV parsing off the main process"""
+    print("⚙️ Testing CPU worker processes...")
+    
+    try:
+        import math
+        import os
+        import sys
+        import tempfile
+        import threading
+        import time
+        from utils.process_pool import ProcessPool, WorkerTimeout, shutdown_process_pool
+        from tools.file_tools import FileTools
+        
+        pool = ProcessPool(1)
+        try:
+            # Workers import pandas before their first task, and are fresh interpreters, not forks
+            assert pool.run(eval, "'pandas' in __import__('sys').modules", timeout=30)
+            assert "tools.file_tools" in sys.modules
+            assert not pool.run(eval, "'tools.file_tools' in __import__('sys').modules", timeout=30)
+            
+            # With no deadline, only cancellation stops a task
+            cancel = threading.Event()
+            threading.Timer(0.5, cancel.set).start()
+            try:
+                pool.run(time.sleep, 30, timeout=math.inf, cancel_event=cancel)
+                assert False, "Expected WorkerTimeout"
+            except WorkerTimeout:
+                pass
+            assert pool.stats()["timeouts"] == 1
+            
+            # A task past its deadline is killed and its worker replaced
+            started = time.perf_counter()
+            try:
+                pool.run(time.sleep, 30, timeout=0.5)
+                assert False, "Expected WorkerTimeout"
+            except WorkerTimeout:
+                pass
+            assert time.perf_counter() - started < 5
+            assert pool.stats()["timeouts"] == 2 and pool.stats()["workers"] == 1
+            assert pool.run(pow, 2, 10, timeout=30) == 1024
+            
+            try:
+                pool.run(int, "not a number", timeout=30)
+                assert False, "Expected RuntimeError"
+            except RuntimeError as e:
+                assert "ValueError" in str(e)
+        finally:
+            pool.shutdown()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "pool.csv")
+            with open(csv_path, "w") as f:
+                f.write("name,score,seen\nada,1.5,2024-01-02\nbob,2.0,2024-03-04\n")
+            try:
+                result = FileTools.read_csv_file(csv_path)
+            finally:
+                shutdown_process_pool()
+            assert result["success"], result
+            assert result["data_types"]["score"] == "float64"
+            assert result["sample_data"][1] == {"name": "bob", "score": 2.0, "seen": "2024-03-04"}
+        
+        print("✅ CPU worker process tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ CPU worker process test failed: {e}")
+        return False
+
+def test_directory_tree():
+    """Test du-style directory trees, the node budget and the mtime cache"""
+    print("🌳 Testing directory size trees...")
+    
+    try:
+        import os
+        import tempfile
+        import time
+        from resources.directory_tree import DirectoryTreeWalker
+        from resources.file_resources import FileResources
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for directory, files in {"a": 3, os.path.join("a", "deep"): 2, "b": 1}.items():
+                os.makedirs(os.path.join(temp_dir, directory), exist_ok=True)
+                for i in range(files):
+                    with open(os.path.join(temp_dir, directory, f"f{i}.txt"), "w") as f:
+                        f.write("x" * 100 * (i + 1))
+            with open(os.path.join(temp_dir, "top.bin"), "wb") as f:
+                f.write(b"\0" * 1000)
+            
+            walker = DirectoryTreeWalker(threads=4)
+            try:
+                result = walker.walk(temp_dir, max_depth=1)
+                tree = result["directory_tree"]
+                assert (result["total_files"], result["total_dirs"]) == (7, 3), result
+                assert result["total_size"] == 600 + 300 + 100 + 1000
+                assert not result["truncated"] and result["dirs_rescanned"] == 4
+                # Children sorted largest first; totals include the depth-2 directory
+                assert [child["name"] for child in tree["children"]] == ["a", "b"]
+                assert tree["children"][0]["size"] == 900 and tree["children"][0]["files"] == 5
+                assert tree["children"][0]["children_omitted"] == 1
+                assert result["largest_files"][0] == {"path": os.path.join(temp_dir, "top.bin"), "size": 1000}
+                
+                # Only directories whose mtime changed are listed again
+                os.remove(os.path.join(temp_dir, "b", "f0.txt"))
+                result = walker.walk(temp_dir)
+                assert result["dirs_rescanned"] == 1 and result["total_files"] == 6
+                
+                # The node budget stops the walk and marks it truncated
+                result = walker.walk(temp_dir, max_nodes=2)
+                assert result["truncated"] and result["dirs_listed"] == 1
+                assert result["directory_tree"]["children"][0].get("truncated")
+                
+                # A listing that hangs (e.g. a dead network mount) is abandoned at the deadline
+                walker.clear()
+                list_directory = walker._list
+                walker._list = lambda path: (time.sleep(5) if path.endswith("deep") else None) or list_directory(path)
+                started = time.perf_counter()
+                result = walker.walk(temp_dir, timeout=0.5)
+                assert time.perf_counter() - started < 2
+                assert result["timed_out"] and result["truncated"] and result["total_files"] == 4
+                walker._list = list_directory
+            finally:
+                walker.close()
+            
+            assert "error" in FileResources.get_directory_tree(os.path.join(temp_dir, "top.bin"))
+        
+        print("✅ Directory size tree tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Directory size tree test failed: {e}")
+        return False
+
+def test_large_file_default_read():
+    """Test that a default read_file of a file over the response budget pages instead of failing"""
+    print("📜 Testing default reads of large files...")
+    
+    try:
+        import tempfile
+        from config.settings import get_settings
+        from tools.file_tools import FileTools
+        from utils.serialization import tool_result
+        
+        settings = get_settings()
+        original = settings.response_max_bytes
+        settings.response_max_bytes = 65536
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                file_path = os.path.join(temp_dir, "big.log")
+                line = '{"level": "info", "msg": "tab\\there"}\n'
+                expected = line * 10000  # ~400KB, mostly characters JSON escapes
+                with open(file_path, "w") as f:
+                    f.write(expected)
+                
+                result = FileTools.read_text_file(file_path)
+                assert result["success"] and not result["eof"] and result["next_cursor"]
+                assert not tool_result(result).isError
+                
+                pages = [result["content"]]
+                while not result["eof"]:
+                    result = FileTools.read_text_file(file_path, cursor=result["next_cursor"])
+                    assert result["success"] and not tool_result(result).isError
+                    pages.append(result["content"])
+                assert "".join(pages) == expected
+        finally:
+            settings.response_max_bytes = original
+        
+        print("✅ Large file default read tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Large file default read test failed: {e}")
+        return False
+
+def test_save_through_links():
+    """Test that saves and edits follow symlinks, keep hard links and keep permissions"""
+    print("🔗 Testing saves through links...")
+    
+    try:
+        import stat
+        import tempfile
+        from tools.file_tools import FileTools
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = os.path.join(temp_dir, "real.txt")
+            link = os.path.join(temp_dir, "link.txt")
+            with open(target, "w") as f:
+                f.write("old\n")
+            os.chmod(target, 0o640)
+            os.symlink(target, link)
+            
+            assert FileTools.write_text_file(link, "new\n")["success"]
+            assert os.path.islink(link)
+            with open(target) as f:
+                assert f.read() == "new\n"
+            assert stat.S_IMODE(os.stat(target).st_mode) == 0o640
+            
+            assert FileTools.edit_text_file(link, "append", content="more\n")["success"]
+            assert os.path.islink(link)
+            with open(target) as f:
+                assert f.read() == "new\nmore\n"
+            
+            # Hard links all see the new content
+            hard = os.path.join(temp_dir, "hard.txt")
+            os.link(target, hard)
+            assert FileTools.write_text_file(target, "shared\n")["success"]
+            assert os.path.samefile(target, hard)
+            with open(hard) as f:
+                assert f.read() == "shared\n"
+            assert not [name for name in os.listdir(temp_dir) if name.endswith(".tmp")]
+        
+        print("✅ Save through links tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Save through links test failed: {e}")
+        return False
+
+def test_note_vectors_out_of_order():
+    """Test that out-of-order inserts, deletes and edits update the vector index without a rebuild"""
+    print("🔀 Testing out-of-order note vectors...")
+    
+    try:
+        import os
+        import tempfile
+        from tools.database_tools import DatabaseTools
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseTools(os.path.join(tmp, "order.db"))
+            db.bulk_create_notes([
+                {"title": "Sourdough starter", "content": "Feed the starter flour and water"},
+                {"title": "Python asyncio", "content": "Event loops, tasks and coroutines"}
+            ])
+            assert db.semantic_search("starter")["indexed_notes"] == 2
+            
+            def no_rebuild(conn):
+                raise AssertionError("vector index was rebuilt")
+            rebuild = db.vectors._rebuild
+            db.vectors._rebuild = no_rebuild
+            
+            conn = db.pool.connection()
+            with conn:
+                conn.executemany("INSERT INTO notes (id, title, content) VALUES (?, ?, ?)", [
+                    (10, "Async Python", "asyncio coroutines and tasks"),
+                    (7, "Rye starter", "A rye flour starter for sourdough"),
+                    (8, "Event loops", "Python event loops run coroutines")
+                ])
+            # 10 commits its vector first, then 7 arrives late
+            db.vectors.note_added(10, "Async Python", "asyncio coroutines and tasks")
+            db.vectors.note_added(7, "Rye starter", "A rye flour starter for sourdough")
+            db.vectors.note_added(7, "Rye starter", "A rye flour starter for sourdough")
+            assert db.vectors.ids[:db.vectors.count].tolist() == [1, 2, 7, 10]
+            related = db.related_notes(7, limit=1)
+            assert related["success"] and related["data"][0]["title"] == "Sourdough starter"
+            
+            # A sync fills the gap left by 8 instead of rebuilding
+            db.vectors.sync()
+            assert db.vectors.ids[:db.vectors.count].tolist() == [1, 2, 7, 8, 10]
+            related = db.related_notes(8, limit=3)
+            assert related["success"] and related["data"][0]["title"] in ("Python asyncio", "Async Python")
+            
+            # Deletes and edits are applied row by row; queries check a watermark, not COUNT(*)
+            statements = []
+            conn.set_trace_callback(statements.append)
+            assert db.related_notes(8)["success"]
+            conn.set_trace_callback(None)
+            assert not any("COUNT(" in sql for sql in statements)
+            db.execute_query("DELETE FROM notes WHERE id = 10")
+            db.execute_query("UPDATE notes SET content = 'asyncio event loops and coroutines' WHERE id = 1")
+            related = db.related_notes(8, limit=3)
+            assert 1 in [note["id"] for note in related["data"]]  # Now about event loops too
+            assert all(note["id"] != 10 for note in related["data"])
+            vectors = db.vectors
+            incremental = (vectors.ids[:vectors.count].tolist(), vectors.df.copy(),
+                           vectors.values[:vectors.nnz].copy())
+            assert incremental[0] == [1, 2, 7, 8]
+            vectors._rebuild = rebuild
+            vectors.rebuild()
+            assert vectors.ids[:vectors.count].tolist() == incremental[0]
+            assert (vectors.df == incremental[1]).all()
+            assert (vectors.values[:vectors.nnz] == incremental[2]).all()
+            assert not db.execute_query("SELECT * FROM note_vector_changes")["data"]  # Pruned on save
+            db.close()
+        
+        print("✅ Out-of-order note vector tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Out-of-order note vector test failed: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("🚀 MCP Server Test Suite")
@@ -95,7 +1331,34 @@ def main():
         test_imports,
         test_configuration,
         test_tools,
-        test_basic_functionality
+        test_basic_functionality,
+        test_note_search,
+        test_connection_pool,
+        test_tool_concurrency,
+        test_ranged_file_reads,
+        test_csv_profile,
+        test_result_cache,
+        test_note_pagination,
+        test_bulk_note_import,
+        test_directory_listing,
+        test_workspace_index,
+        test_content_search,
+        test_bounded_sql_results,
+        test_query_timeouts,
+        test_slow_query_log,
+        test_structured_output,
+        test_handler_metrics,
+        test_cold_start,
+        test_system_sampler,
+        test_note_similarity,
+        test_duplicate_detection,
+        test_file_edits,
+        test_session_concurrency,
+        test_process_pool,
+        test_directory_tree,
+        test_large_file_default_read,
+        test_save_through_links,
+        test_note_vectors_out_of_order
     ]
     
     passed = 0